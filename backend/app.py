@@ -1,37 +1,10 @@
 import os
-import pickle
 from pathlib import Path
-import pandas as pd
-from azure.storage.blob import BlobServiceClient
-from flask import Flask, jsonify, request, send_file, render_template
+from flask import Flask, Response, g, jsonify, request, send_file, render_template
 from flask_cors import CORS
 import logging
 import sys
 
-# Nach den imports hinzufügen
-import pickle
-import sys
-from model.recipe_model import RecipeRecommender
-
-# Eigene Unpickler-Klasse definieren
-class CustomUnpickler(pickle.Unpickler):
-    def find_class(self, module, name):
-        if name == 'RecipeRecommender':
-            return RecipeRecommender
-        return super().find_class(module, name)
-
-# Modifiziere die Funktionen, die das Modell laden
-def load_model_safely(file_path):
-    with open(file_path, 'rb') as f:
-        return CustomUnpickler(f).load()
-
-# Ersetze diesen Block:
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from model.recipe_model import RecipeRecommender
-
-# Mit diesem:
-from pathlib import Path
-
 # Füge das Stammverzeichnis zum Python-Pfad hinzu, falls nötig
 root_dir = Path(__file__).parent.parent.absolute()
 if str(root_dir) not in sys.path:
@@ -39,67 +12,185 @@ if str(root_dir) not in sys.path:
 
 # Dann importiere die RecipeRecommender-Klasse
 from model.recipe_model import RecipeRecommender
+from model.cache import RecommendationCache
+from model.timing import StageTimer
+from backend.diagnostics import RequestProfiler, SlowQueryLog
+from backend.metrics import MetricsRegistry
+from backend.model_store import ModelCache, ModelManager, create_model_source
 
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Model laden
+# Model laden: im Hintergrund, damit der Server sofort startet.
+# Bereits heruntergeladene Versionen werden aus dem lokalen Cache geladen.
 print("*** Init and load model ***")
-model = None
+if 'AZURE_STORAGE_CONNECTION_STRING' not in os.environ and 'MODEL_SOURCE_DIR' not in os.environ:
+    print("CANNOT ACCESS AZURE BLOB STORAGE - Please set AZURE_STORAGE_CONNECTION_STRING or MODEL_SOURCE_DIR.")
 
-if 'AZURE_STORAGE_CONNECTION_STRING' in os.environ:
-    azureStorageConnectionString = os.environ['AZURE_STORAGE_CONNECTION_STRING']
-    try:
-        blob_service_client = BlobServiceClient.from_connection_string(azureStorageConnectionString)
-        print("Fetching blob containers...")
-        containers = list(blob_service_client.list_containers(include_metadata=True))
-        
-        # Filtern nach recipe-model-Containern
-        model_containers = [container for container in containers if container.name.startswith("recipe-model")]
-        
-        if model_containers:
-            # Höchste Versionsnummer finden
-            suffix = max(int(container.name.split("-")[-1]) for container in model_containers)
-            model_folder = f"recipe-model-{suffix}"
-            print(f"Using model {model_folder}")
-            
-            container_client = blob_service_client.get_container_client(model_folder)
-            blob_list = list(container_client.list_blobs())
-            
-            if blob_list:
-                blob_name = next(blob.name for blob in blob_list)
-                # Download the blob to a local file
-                os.makedirs("model", exist_ok=True)
-                download_file_path = os.path.join("model", "RecipeRecommender.pkl")
-                print(f"Downloading blob to {download_file_path}")
-                
-                with open(file=download_file_path, mode="wb") as download_file:
-                    download_file.write(container_client.download_blob(blob_name).readall())
-                    
-                # Modell aus Datei laden
-                    model = load_model_safely(download_file_path)
-                    print("Modell erfolgreich aus Azure Blob Storage geladen")
-            else:
-                print("Keine Blobs im Container gefunden")
-        else:
-            print("Keine recipe-model-Container gefunden")
-    except Exception as e:
-        print(f"Fehler beim Laden aus Azure: {e}")
-else:
-    print("CANNOT ACCESS AZURE BLOB STORAGE - Please set AZURE_STORAGE_CONNECTION_STRING. Current env: ")
-    print(os.environ)
+# Beispielanfragen zum Aufwärmen eines neuen Modells vor dem Austausch (Listen durch ';' getrennt)
+WARMUP_QUERIES = [
+    [ing.strip() for ing in query.split(',') if ing.strip()]
+    for query in os.environ.get('MODEL_WARMUP_QUERIES', 'Mehl,Eier,Milch,Zucker;Tomaten,Zwiebeln;Kartoffeln').split(';')
+    if query.strip()
+]
 
-# Stelle sicher, dass wir ein Modell haben
-if model is None:
-    print("FEHLER: Konnte kein Modell laden!")
-    raise Exception("Konnte kein Modell laden. Bitte stelle sicher, dass das Modell in Azure Blob Storage oder lokal verfügbar ist.")
+model_manager = ModelManager(
+    source=create_model_source(),
+    cache=ModelCache(os.environ.get('MODEL_CACHE_DIR', os.path.join(root_dir, 'model', 'artifact-cache'))),
+    warmup_queries=WARMUP_QUERIES
+)
 
 # Initialisiere Flask-App
 app = Flask(__name__)
 CORS(app)
 
+# Maximale Anzahl Zutatenlisten pro Batch-Anfrage
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 500))
+
+# Ergebniscache für häufige Zutatenkombinationen
+recommendation_cache = RecommendationCache(
+    max_entries=int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 1024)),
+    ttl_seconds=float(os.environ.get('RECOMMENDATION_CACHE_TTL', 600))
+)
+model_manager.add_listener(lambda model, version: recommendation_cache.set_model_version(version))
+model_manager.start(background=os.environ.get('MODEL_LOAD_BLOCKING', '0') != '1')
+
+# Regelmäßig auf neue Modellversionen prüfen (0 deaktiviert das Polling)
+MODEL_POLL_INTERVAL = float(os.environ.get('MODEL_POLL_INTERVAL', 300))
+
+# Unter dem Prefork-Server (backend/gunicorn.conf.py) wird die App im Master geladen.
+# Threads überleben den Fork nicht, daher startet dort jeder Worker sein Polling in init_worker().
+if os.environ.get('PREFORK_SERVER') != '1':
+    model_manager.start_polling(MODEL_POLL_INTERVAL)
+
+
+def init_worker():
+    """Initialisierung eines Worker-Prozesses nach dem Fork (Prefork-Server)."""
+    # Sofort im Hintergrund auf eine neuere Version prüfen: Der Master lädt nie neu, durch
+    # MAX_REQUESTS ersetzte Worker erben also das Modell vom Serverstart. Konnte der Master
+    # kein Modell laden, lädt der Worker es hier selbst und bleibt bis dahin nicht bereit.
+    model_manager.start(background=True)
+    model_manager.start_polling(MODEL_POLL_INTERVAL)
+
+# Token für Admin-Endpunkte; ohne Token sind sie deaktiviert
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Metriken für /metrics (Prometheus-Textformat)
+metrics = MetricsRegistry()
+REQUEST_COUNT = metrics.counter(
+    'recipefinder_http_requests_total', 'Anzahl HTTP-Anfragen', ('endpoint', 'method', 'status')
+)
+REQUEST_LATENCY = metrics.histogram(
+    'recipefinder_http_request_duration_seconds', 'Antwortzeit pro Endpunkt in Sekunden', ('endpoint',)
+)
+STAGE_LATENCY = metrics.histogram(
+    'recipefinder_request_stage_duration_seconds', 'Zeit pro Verarbeitungsstufe einer Anfrage in Sekunden',
+    ('endpoint', 'stage')
+)
+metrics.callback(
+    'recipefinder_model_info', 'Aktive Modellversion',
+    lambda: [((model_manager.version,), 1)] if model_manager.version else [], ('version',)
+)
+metrics.callback(
+    'recipefinder_model_ready', '1, sobald ein Modell geladen ist',
+    lambda: [((), int(model_manager.model is not None))]
+)
+metrics.callback(
+    'recipefinder_recommendation_cache_entries', 'Einträge im Ergebniscache',
+    lambda: [((), recommendation_cache.stats()['size'])]
+)
+metrics.callback(
+    'recipefinder_recommendation_cache_max_entries', 'Maximale Anzahl Einträge im Ergebniscache',
+    lambda: [((), recommendation_cache.max_entries)]
+)
+metrics.callback(
+    'recipefinder_recommendation_cache_events_total', 'Treffer, Fehlgriffe und Verdrängungen des Ergebniscaches',
+    lambda: [((event,), value) for event, value in recommendation_cache.stats().items()
+             if event in ('hits', 'misses', 'evictions', 'expirations', 'invalidations')],
+    ('event',), type_name='counter'
+)
+
+
+# Anfragen über dem Schwellwert werden mit Zutaten, Parametern und Stufenzeiten protokolliert ('' deaktiviert)
+slow_query_log = SlowQueryLog(
+    os.environ.get('SLOW_QUERY_LOG', os.path.join(root_dir, 'backend', 'logs', 'slow_queries.jsonl')),
+    threshold_ms=float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 500))
+)
+
+# Profiling einzelner Anfragen: per Header X-Profile (mit X-Admin-Token) oder als Stichprobe
+request_profiler = RequestProfiler(
+    os.environ.get('PROFILE_DIR', os.path.join(root_dir, 'backend', 'profiles')),
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+)
+
+
+@app.before_request
+def start_request_timer():
+    # Der Timer verteilt die Antwortzeit auf die Stufen, die die Routen markieren
+    g.stage_timer = StageTimer()
+
+    # X-Profile: save speichert das Profil, X-Profile: text gibt es statt der Antwort zurück
+    profile_mode = request.headers.get('X-Profile')
+    if profile_mode and ADMIN_TOKEN and request.headers.get('X-Admin-Token') == ADMIN_TOKEN:
+        g.profiler = request_profiler.start()
+        g.profile_mode = profile_mode.lower()
+    elif request_profiler.sampled():
+        g.profiler = request_profiler.start()
+        g.profile_mode = 'save'
+
+
+@app.after_request
+def record_request_metrics(response):
+    timer = g.pop('stage_timer', None)
+    if timer is None:
+        return response
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profile_path, profile_summary = request_profiler.stop(profiler, endpoint)
+        if g.get('profile_mode') == 'text':
+            response = Response(profile_summary, content_type='text/plain; charset=utf-8')
+        response.headers['X-Profile-File'] = os.path.basename(profile_path)
+
+    timer.mark('respond')
+    REQUEST_COUNT.inc(endpoint, request.method, str(response.status_code))
+    REQUEST_LATENCY.observe(timer.total, endpoint)
+    for stage, seconds in timer.stages.items():
+        STAGE_LATENCY.observe(seconds, endpoint, stage)
+
+    # Nur Anfragen an das Modell (die Routen legen die normalisierte Anfrage in g.query ab)
+    query = g.get('query')
+    if query is not None and slow_query_log.is_slow(timer.total):
+        slow_query_log.record(
+            endpoint, timer.total, timer.stages, g.get('model_version', model_manager.version),
+            query, status=response.status_code
+        )
+    return response
+
+def serialize_recommendations(recommendations):
+    """
+    Konvertiert MongoDB ObjectIds in den Empfehlungen für die JSON-Serialisierung.
+
+    Die Empfehlungen werden kopiert, da sie aus dem Ergebniscache stammen können.
+    """
+    serialized = []
+    for rec in recommendations:
+        full_recipe = rec['full_recipe']
+        if '_id' in full_recipe:
+            full_recipe = dict(full_recipe, _id=str(full_recipe['_id']))
+        serialized.append(dict(rec, full_recipe=full_recipe))
+    return serialized
+
+def parse_limit(data, default=5):
+    """Liest die Anzahl Empfehlungen ('limit'); None, falls sie keine ganze Zahl >= 1 ist."""
+    limit = data.get('limit', default)
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+        return None
+    return limit
+
 # Diese Funktion in app.py ersetzen:
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -109,6 +200,7 @@ def index():
     suggestions = []
     error_message = None
 
+    model, model_version = model_manager.snapshot()
     if model is None:
         error_message = "Das Rezeptempfehlungsmodell konnte nicht geladen werden. Bitte versuchen Sie es später erneut."
         return render_template('index.html', error_message=error_message)
@@ -118,42 +210,23 @@ def index():
             # Hole die eingegebenen Zutaten aus dem Formular
             ingredients_input = request.form.get('ingredients', '')
             user_ingredients = [ing.strip() for ing in ingredients_input.split(',') if ing.strip()]
+            g.stage_timer.mark('parse_request')
 
             if user_ingredients:
+                g.model_version = model_version
+                g.query = {
+                    'ingredients': list(RecommendationCache.normalize_ingredients(user_ingredients)),
+                    'top_n': 5, 'threshold': 0.3,
+                }
                 # Empfehle Rezepte basierend auf den eingegebenen Zutaten
-                recommendations = model.recommend(user_ingredients, top_n=5)
+                recommendations = recommendation_cache.recommend(
+                    model, user_ingredients, top_n=5, model_version=model_version, timer=g.stage_timer
+                )
                 
                 # Sortiere nach Übereinstimmung (absteigend)
+                # Vorhandene und fehlende Zutaten (anhand der Basiszutaten) liefert bereits das Modell
                 recommendations = sorted(recommendations, key=lambda x: x['match_percentage'], reverse=True)
                 
-                # Verarbeite die Zutaten für jedes Rezept
-                for rec in recommendations:
-                    # Liste für vorhandene Zutaten erstellen
-                    available_ingredients = []
-                    
-                    # Gehe alle Zutaten durch und prüfe, ob sie im Rezept vorkommen
-                    user_ingredients_lower = [ing.lower() for ing in user_ingredients]
-                    
-                    # Für jede Rezeptzutat
-                    for ingredient_obj in rec['full_recipe'].get('ingredients', []):
-                        if not isinstance(ingredient_obj, dict) or 'ingredient' not in ingredient_obj:
-                            continue
-                            
-                        ingredient_name = ingredient_obj['ingredient'].lower()
-                        
-                        # Prüfe, ob die Zutat in einer der Benutzerzutaten enthalten ist
-                        is_available = False
-                        for user_ing in user_ingredients_lower:
-                            if user_ing in ingredient_name:
-                                is_available = True
-                                break
-                                
-                        if is_available:
-                            available_ingredients.append(ingredient_obj)
-                    
-                    # Füge die Liste der vorhandenen Zutaten zum Rezept hinzu
-                    rec['available_ingredients'] = available_ingredients
-                
                 logger.info(f"{len(recommendations)} Rezepte für {user_ingredients} empfohlen")
             else:
                 logger.warning("Keine Zutaten eingegeben")
@@ -162,6 +235,7 @@ def index():
             search_term = request.form.get('search_ingredient', '')
             if search_term:
                 suggestions = model.suggest_ingredients(search_term, max_suggestions=5)
+                g.stage_timer.mark('suggest')
                 logger.info(f"{len(suggestions)} Vorschläge für '{search_term}' gefunden")
         except Exception as e:
             logger.error(f"Fehler bei der Verarbeitung der Anfrage: {e}")
@@ -176,15 +250,18 @@ def index():
 @app.route('/api/suggestions', methods=['GET'])
 def get_suggestions():
     """API-Endpunkt für Zutatvorschläge (für AJAX-Anfragen)."""
+    model = model_manager.model
     if model is None:
-        return jsonify({"error": "Modell nicht verfügbar"}), 500
+        return jsonify({"error": "Modell nicht verfügbar", "status": model_manager.status}), 503
         
     search_term = request.args.get('term', '')
     if not search_term or len(search_term) < 2:
         return jsonify([])
         
     try:
+        g.query = {'term': search_term, 'max_suggestions': 8}
         suggestions = model.suggest_ingredients(search_term, max_suggestions=8)
+        g.stage_timer.mark('suggest')
         return jsonify(suggestions)
     except Exception as e:
         logger.error(f"Fehler bei der Suche nach Zutatenvorschlägen: {e}")
@@ -193,8 +270,9 @@ def get_suggestions():
 @app.route('/api/recommend', methods=['POST'])
 def recommend_recipes():
     """API-Endpunkt für Rezeptempfehlungen (für AJAX-Anfragen)."""
+    model, model_version = model_manager.snapshot()
     if model is None:
-        return jsonify({"error": "Modell nicht verfügbar"}), 500
+        return jsonify({"error": "Modell nicht verfügbar", "status": model_manager.status}), 503
         
     try:
         data = request.get_json()
@@ -202,29 +280,104 @@ def recommend_recipes():
             return jsonify({"error": "Keine Zutaten übermittelt"}), 400
             
         ingredients = data['ingredients']
-        limit = data.get('limit', 5)
+        limit = parse_limit(data)
         
         if not ingredients:
             return jsonify({"error": "Leere Zutatenliste"}), 400
+        if limit is None:
+            return jsonify({"error": "'limit' muss eine ganze Zahl >= 1 sein"}), 400
+        g.model_version = model_version
+        g.query = {
+            'ingredients': list(RecommendationCache.normalize_ingredients(ingredients)),
+            'top_n': limit, 'threshold': 0.3,
+        }
+        g.stage_timer.mark('parse_request')
             
-        recommendations = model.recommend(ingredients, top_n=limit)
-        
-        # Konvertiere MongoDB ObjectIds für JSON-Serialisierung
-        for rec in recommendations:
-            if '_id' in rec['full_recipe']:
-                rec['full_recipe']['_id'] = str(rec['full_recipe']['_id'])
+        recommendations = recommendation_cache.recommend(
+            model, ingredients, top_n=limit, model_version=model_version, timer=g.stage_timer
+        )
+        recommendations = serialize_recommendations(recommendations)
+        g.stage_timer.mark('serialize')
                 
         return jsonify({"recommendations": recommendations})
     except Exception as e:
         logger.error(f"Fehler bei der Rezeptempfehlung: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/recommend/batch', methods=['POST'])
+def recommend_recipes_batch():
+    """API-Endpunkt für Rezeptempfehlungen zu mehreren Zutatenlisten in einem Aufruf."""
+    model = model_manager.model
+    if model is None:
+        return jsonify({"error": "Modell nicht verfügbar", "status": model_manager.status}), 503
+
+    try:
+        data = request.get_json()
+        if not data or 'queries' not in data:
+            return jsonify({"error": "Keine Anfragen übermittelt"}), 400
+
+        queries = data['queries']
+        limit = parse_limit(data)
+
+        if not isinstance(queries, list) or not queries:
+            return jsonify({"error": "Leere Anfrageliste"}), 400
+        if limit is None:
+            return jsonify({"error": "'limit' muss eine ganze Zahl >= 1 sein"}), 400
+        if len(queries) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Maximal {MAX_BATCH_SIZE} Anfragen pro Aufruf erlaubt"}), 400
+        for idx, ingredients in enumerate(queries):
+            if not isinstance(ingredients, list) or not ingredients:
+                return jsonify({"error": f"Leere oder ungültige Zutatenliste in Anfrage {idx}"}), 400
+
+        g.query = {
+            'queries': [list(RecommendationCache.normalize_ingredients(ingredients)) for ingredients in queries],
+            'top_n': limit, 'threshold': 0.3,
+        }
+        g.stage_timer.mark('parse_request')
+
+        # Ergebnisse werden in der Reihenfolge der Anfragen zurückgegeben
+        results = model.recommend_many(queries, top_n=limit, timer=g.stage_timer)
+
+        results = [{"recommendations": serialize_recommendations(recommendations)} for recommendations in results]
+        g.stage_timer.mark('serialize')
+        return jsonify({"results": results})
+    except Exception as e:
+        logger.error(f"Fehler bei der Batch-Rezeptempfehlung: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """API-Endpunkt mit Treffer-, Fehlgriff- und Verdrängungszählern des Ergebniscaches."""
+    return jsonify(recommendation_cache.stats())
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Metriken im Prometheus-Textformat: Anfragen, Latenzen pro Stufe, Modellversion und Ergebniscache."""
+    return Response(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
+
+@app.route('/admin/reload', methods=['POST'])
+def reload_model():
+    """Admin-Endpunkt: prüft sofort auf eine neue Modellversion und tauscht das Modell aus."""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin-Endpunkte sind deaktiviert (ADMIN_TOKEN nicht gesetzt)"}), 403
+    if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"error": "Nicht autorisiert"}), 401
+
+    force = request.args.get('force', '0') == '1'
+    reloaded = model_manager.reload(force=force)
+    if model_manager.error and not reloaded:
+        return jsonify({"reloaded": False, "model_version": model_manager.version, "error": model_manager.error}), 500
+    return jsonify({"reloaded": reloaded, "model_version": model_manager.version}), 200
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Einfacher Health-Check-Endpunkt für die Anwendung."""
-    if model is None:
-        return jsonify({"status": "error", "message": "Modell nicht verfügbar"}), 500
-    return jsonify({"status": "ok", "message": "Anwendung läuft"}), 200
+    """Health-Check-Endpunkt; meldet 'loading', solange das Modell noch geladen wird."""
+    status = model_manager.status
+    if status == 'loading':
+        return jsonify({"status": "loading", "message": "Modell wird geladen"}), 503
+    if status == 'error':
+        return jsonify({"status": "error", "message": f"Modell nicht verfügbar: {model_manager.error}"}), 500
+    return jsonify({"status": "ok", "message": "Anwendung läuft", "model_version": model_manager.version}), 200
 
 if __name__ == "__main__":
     # Für Entwicklungszwecke
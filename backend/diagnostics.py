@@ -0,0 +1,139 @@
+# backend/diagnostics.py
+# Slow-Query-Log und Profiling einzelner Anfragen
+#
+# SlowQueryLog hängt für jede Anfrage über dem Schwellwert einen JSON-Datensatz
+# an eine JSONL-Datei an (normalisierte Zutaten, Parameter, Zeiten pro Stufe,
+# Modellversion). Die Datei kann mit backend/replay_slow_queries.py offline
+# gegen ein Modell abgespielt werden.
+#
+# RequestProfiler führt einzelne Anfragen unter cProfile aus, entweder auf
+# Anforderung (Header X-Profile mit Admin-Token) oder stichprobenartig.
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class SlowQueryLog:
+    """Thread-sicheres Anhängen langsamer Anfragen an eine JSONL-Datei."""
+
+    def __init__(self, path, threshold_ms=500):
+        """
+        Args:
+            path (str): Zieldatei; None oder '' deaktiviert das Log.
+            threshold_ms (float): Anfragen ab dieser Dauer werden protokolliert.
+        """
+        self.path = path or None
+        self.threshold_ms = threshold_ms
+        self.written = 0
+        self._lock = threading.Lock()
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def is_slow(self, seconds):
+        return self.path is not None and seconds * 1000 >= self.threshold_ms
+
+    def record(self, endpoint, duration, stages, model_version, query, status=None):
+        """
+        Hängt einen Datensatz an, falls die Anfrage langsamer als der Schwellwert war.
+
+        Args:
+            endpoint (str): Route der Anfrage.
+            duration (float): Gesamtdauer in Sekunden.
+            stages (dict): Stufe -> Dauer in Sekunden (siehe StageTimer).
+            model_version (str): Version des verwendeten Modells.
+            query (dict): Normalisierte Anfrage, z.B. {'ingredients': [...], 'top_n': 5, 'threshold': 0.3}.
+            status (int): HTTP-Statuscode.
+
+        Returns:
+            bool: True, wenn ein Datensatz geschrieben wurde.
+        """
+        if not self.is_slow(duration):
+            return False
+        entry = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'endpoint': endpoint,
+            'status': status,
+            'duration_ms': round(duration * 1000, 3),
+            'model_version': model_version,
+            'stages_ms': {stage: round(seconds * 1000, 3) for stage, seconds in stages.items()},
+            **query,
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+                self.written += 1
+        except OSError as e:
+            logger.error(f"Slow-Query-Log {self.path} konnte nicht geschrieben werden: {e}")
+            return False
+        return True
+
+
+class RequestProfiler:
+    """
+    Führt einzelne Anfragen unter cProfile aus.
+
+    Es wird immer nur eine Anfrage gleichzeitig profiliert; weitere Anfragen laufen
+    in dieser Zeit normal. Profile werden als .prof-Datei (pstats) in directory gespeichert.
+    """
+
+    def __init__(self, directory, sample_rate=0.0, top=40):
+        """
+        Args:
+            directory (str): Zielverzeichnis der Profile.
+            sample_rate (float): Anteil der Anfragen, die ohne Anforderung profiliert werden (0 = nur auf Anforderung).
+            top (int): Anzahl Funktionen in der Textausgabe.
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.top = top
+        self._lock = threading.Lock()
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        """Startet das Profiling für die aktuelle Anfrage; None, falls bereits eine Anfrage profiliert wird."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Ein anderer Profiler ist bereits aktiv
+            self._lock.release()
+            return None
+        return profiler
+
+    def stop(self, profiler, name):
+        """
+        Beendet das Profiling und speichert das Profil.
+
+        Returns:
+            tuple: (Pfad der .prof-Datei, Textzusammenfassung nach kumulierter Zeit)
+        """
+        try:
+            profiler.disable()
+        finally:
+            self._lock.release()
+
+        os.makedirs(self.directory, exist_ok=True)
+        safe_name = ''.join(char if char.isalnum() else '_' for char in name).strip('_') or 'request'
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}-{os.getpid()}.prof")
+        profiler.dump_stats(path)
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(self.top)
+        logger.info(f"Profil gespeichert: {path}")
+        return path, summary.getvalue()
@@ -0,0 +1,72 @@
+# backend/gunicorn.conf.py
+# Produktionsserver: Modell einmal im Master laden, danach N Worker forken
+#
+# gunicorn -c backend/gunicorn.conf.py backend.app:app
+#
+# Mit preload_app wird backend.app im Master importiert und das Modell dort
+# synchron geladen (MODEL_LOAD_BLOCKING). Die Worker erben es per Fork und
+# teilen sich die schreibgeschützten Arrays copy-on-write; die Matrizen des
+# Artefakts sind ohnehin per mmap aus dem lokalen Cache eingeblendet.
+#
+# Der Master lädt danach nie neu. Jeder Worker prüft deshalb direkt nach dem Fork
+# und danach alle MODEL_POLL_INTERVAL Sekunden auf eine neuere Version; ersetzte
+# Worker laufen so nicht mit dem Modell vom Serverstart weiter. Jede Version wird
+# in ein eigenes Verzeichnis entpackt, gleichzeitig ladende Worker stören sich nicht.
+#
+# Umgebungsvariablen:
+#   WEB_CONCURRENCY       Anzahl Worker-Prozesse (Standard: verfügbare CPU-Kerne)
+#   GUNICORN_THREADS      Threads pro Worker (Standard: 4)
+#   PORT / GUNICORN_BIND  Adresse (Standard: 0.0.0.0:80)
+#   MAX_REQUESTS          Worker nach so vielen Anfragen ersetzen (Standard: 2000, 0 = nie)
+#   MAX_REQUESTS_JITTER   Zufällige Streuung, damit nicht alle Worker gleichzeitig neu starten (Standard: 200)
+#   GRACEFUL_TIMEOUT      Zeit für laufende Anfragen beim Beenden eines Workers (Standard: 30 s)
+
+import gc
+import os
+
+# Muss vor dem Import der App gesetzt sein (preload_app importiert sie im Master)
+os.environ.setdefault('MODEL_LOAD_BLOCKING', '1')
+os.environ['PREFORK_SERVER'] = '1'
+
+
+def available_cpus():
+    """Anzahl der CPU-Kerne, auf denen der Prozess laufen darf (berücksichtigt CPU-Affinität im Container)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '80')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', available_cpus()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+
+# Worker regelmäßig ersetzen (begrenzt Speicherwachstum) und dabei laufende Anfragen beenden lassen
+max_requests = int(os.environ.get('MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', 200))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+
+def when_ready(server):
+    from backend.app import model_manager
+    if model_manager.model is None:
+        server.log.warning(
+            f"Kein Modell im Master geladen ({model_manager.status}): Worker laden selbst und sind bis dahin nicht bereit (/health)"
+        )
+    else:
+        server.log.info(f"Modell {model_manager.version} im Master geladen, starte {workers} Worker x {threads} Threads")
+
+
+def pre_fork(server, worker):
+    # Objekte des Masters aus der zyklischen Garbage Collection nehmen, damit die
+    # Worker deren Speicherseiten nicht durch GC-Durchläufe kopieren
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from backend.app import init_worker
+    init_worker()
@@ -0,0 +1,138 @@
+# backend/metrics.py
+# Zähler, Histogramme und Gauges im Prometheus-Textformat (ohne zusätzliche Abhängigkeit)
+#
+# Jede Aktualisierung kostet eine Lock-Aufnahme und eine Dictionary-Operation,
+# damit die Metriken auch in Produktion immer aktiv bleiben können.
+
+import bisect
+import threading
+
+# Grenzen in Sekunden für Latenz-Histogramme (0.5 ms bis 10 s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monoton steigender Zähler, optional mit Labels."""
+
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, labels, (), value) for labels, value in sorted(values.items())]
+
+
+class Histogram:
+    """Histogramm mit festen Bucket-Grenzen, optional mit Labels."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [Zähler pro Bucket (ohne +Inf), Summe, Anzahl]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {labels: (list(state[0]), state[1], state[2]) for labels, state in self._values.items()}
+        samples = []
+        for labels, (bucket_counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                samples.append((f'{self.name}_bucket', labels, (('le', _format_value(bound)),), cumulative))
+            samples.append((f'{self.name}_bucket', labels, (('le', '+Inf'),), count))
+            samples.append((f'{self.name}_sum', labels, (), total))
+            samples.append((f'{self.name}_count', labels, (), count))
+        return samples
+
+
+class CallbackMetric:
+    """
+    Metrik, deren Werte erst beim Abruf von /metrics gelesen werden (z.B. Cache-Zähler).
+
+    callback() gibt eine Liste von (Labelwerte, Wert) zurück.
+    """
+
+    def __init__(self, name, documentation, callback, labelnames=(), type_name='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.type_name = type_name
+
+    def samples(self):
+        return [(self.name, tuple(labels), (), value) for labels, value in self.callback()]
+
+
+class MetricsRegistry:
+    """Sammelt Metriken und gibt sie im Prometheus-Textformat (Version 0.0.4) aus."""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, callback, labelnames=(), type_name='gauge'):
+        return self.register(CallbackMetric(name, documentation, callback, labelnames, type_name))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for sample_name, labels, extra, value in metric.samples():
+                lines.append(f'{sample_name}{_format_labels(metric.labelnames, labels, extra)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,342 @@
+# backend/model_store.py
+# Laden des Rezeptmodells aus Azure Blob Storage (oder einem lokalen Verzeichnis)
+# mit lokalem Artefakt-Cache und Laden im Hintergrund
+
+import gc
+import hashlib
+import logging
+import os
+import pickle
+import random
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+
+from model.recipe_model import RecipeRecommender
+
+logger = logging.getLogger(__name__)
+
+MODEL_CONTAINER_PREFIX = "recipe-model"
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+# Eigene Unpickler-Klasse für ältere Pickle-Modelle, die als __main__.RecipeRecommender gespeichert wurden
+class CustomUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if name == 'RecipeRecommender':
+            return RecipeRecommender
+        return super().find_class(module, name)
+
+
+def load_model_safely(file_path):
+    with open(file_path, 'rb') as f:
+        return CustomUnpickler(f).load()
+
+
+def load_model_file(file_path):
+    """Lädt ein Modell-Artefakt (.zip bzw. Verzeichnis) oder ein älteres Pickle-Modell."""
+    if file_path.endswith('.pkl'):
+        return load_model_safely(file_path)
+    return RecipeRecommender.load_artifact(file_path)
+
+
+def container_version(container_name):
+    """Gibt die Versionsnummer eines recipe-model-N-Containers zurück (oder None)."""
+    parts = container_name.split("-")
+    if container_name.startswith(MODEL_CONTAINER_PREFIX) and len(parts) == 3 and parts[-1].isdigit():
+        return int(parts[-1])
+    return None
+
+
+def pick_model_blob(blob_names):
+    """Bevorzugt das memory-mappbare Artefakt, ältere Versionen enthalten nur das Pickle."""
+    blob_names = sorted(blob_names)
+    return next((name for name in blob_names if name.endswith('.zip')), blob_names[0] if blob_names else None)
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    """Beschreibt eine Modellversion in der Quelle."""
+    container: str
+    blob_name: str
+    etag: str
+    size: int = 0
+
+    @property
+    def cache_key(self):
+        """Inhaltsadresse im lokalen Cache: Container plus Hash des ETags."""
+        digest = hashlib.sha256(f"{self.container}/{self.blob_name}/{self.etag}".encode('utf-8')).hexdigest()
+        return f"{self.container}-{digest[:16]}"
+
+
+class BlobModelSource:
+    """Modellquelle in Azure Blob Storage (ein Container recipe-model-N pro Version)."""
+
+    def __init__(self, connection_string):
+        from azure.storage.blob import BlobServiceClient
+        self.blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+
+    def latest_version(self):
+        """Findet den Container mit der höchsten Versionsnummer und dessen Modell-Blob."""
+        containers = [
+            container.name for container in self.blob_service_client.list_containers()
+            if container_version(container.name) is not None
+        ]
+        if not containers:
+            logger.warning("Keine recipe-model-Container gefunden")
+            return None
+
+        container = max(containers, key=container_version)
+        container_client = self.blob_service_client.get_container_client(container)
+        blobs = {blob.name: blob for blob in container_client.list_blobs()}
+        blob_name = pick_model_blob(blobs)
+        if blob_name is None:
+            logger.warning(f"Keine Blobs im Container {container} gefunden")
+            return None
+
+        blob = blobs[blob_name]
+        return ModelVersion(container, blob_name, str(blob.etag).strip('"'), blob.size or 0)
+
+    def download(self, version, target_path):
+        """Lädt den Blob in Blöcken direkt in eine Datei, ohne ihn im Speicher zu puffern."""
+        container_client = self.blob_service_client.get_container_client(version.container)
+        downloader = container_client.download_blob(version.blob_name, max_concurrency=2)
+        with open(target_path, 'wb') as f:
+            for chunk in downloader.chunks():
+                f.write(chunk)
+
+
+class LocalModelSource:
+    """
+    Modellquelle in einem lokalen Verzeichnis mit der gleichen Struktur wie der
+    Blob Storage (<root>/recipe-model-N/<blob>). Dient für Entwicklung und Tests.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def latest_version(self):
+        if not os.path.isdir(self.root):
+            logger.warning(f"Modellverzeichnis {self.root} existiert nicht")
+            return None
+        containers = [
+            name for name in os.listdir(self.root)
+            if container_version(name) is not None and os.path.isdir(os.path.join(self.root, name))
+        ]
+        if not containers:
+            logger.warning("Keine recipe-model-Verzeichnisse gefunden")
+            return None
+
+        container = max(containers, key=container_version)
+        blob_name = pick_model_blob(os.listdir(os.path.join(self.root, container)))
+        if blob_name is None:
+            logger.warning(f"Keine Dateien im Verzeichnis {container} gefunden")
+            return None
+
+        stat = os.stat(os.path.join(self.root, container, blob_name))
+        return ModelVersion(container, blob_name, f"{stat.st_mtime_ns:x}-{stat.st_size:x}", stat.st_size)
+
+    def download(self, version, target_path):
+        with open(os.path.join(self.root, version.container, version.blob_name), 'rb') as src, \
+                open(target_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+
+
+def create_model_source():
+    """Wählt die Modellquelle anhand der Umgebungsvariablen."""
+    if os.environ.get('MODEL_SOURCE_DIR'):
+        return LocalModelSource(os.environ['MODEL_SOURCE_DIR'])
+    if os.environ.get('AZURE_STORAGE_CONNECTION_STRING'):
+        return BlobModelSource(os.environ['AZURE_STORAGE_CONNECTION_STRING'])
+    return None
+
+
+class ModelCache:
+    """
+    Inhaltsadressierter lokaler Cache für Modell-Artefakte.
+
+    Jede Version liegt unter <directory>/<container>-<hash(etag)>/<blob>. Ist die
+    Datei bereits vorhanden, wird der Download übersprungen. Downloads werden in
+    eine temporäre Datei geschrieben und erst danach atomar umbenannt.
+    """
+
+    def __init__(self, directory, keep_versions=2):
+        self.directory = directory
+        self.keep_versions = keep_versions
+
+    def fetch(self, source, version):
+        """Gibt den lokalen Pfad der Version zurück und lädt sie nur bei Bedarf herunter."""
+        entry_dir = os.path.join(self.directory, version.cache_key)
+        local_path = os.path.join(entry_dir, version.blob_name)
+        if os.path.exists(local_path):
+            logger.info(f"Modell {version.container} ({version.etag}) aus lokalem Cache {local_path}")
+            return local_path
+
+        os.makedirs(entry_dir, exist_ok=True)
+        # Eigene temporäre Datei pro Prozess, da mehrere Worker dieselbe Version gleichzeitig laden können
+        tmp_path = f"{local_path}.{os.getpid()}.part"
+        logger.info(f"Lade Modell {version.container}/{version.blob_name} herunter nach {local_path}")
+        try:
+            source.download(version, tmp_path)
+            os.replace(tmp_path, local_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.prune(keep=version.cache_key)
+        return local_path
+
+    def prune(self, keep=None):
+        """Entfernt ältere Cache-Einträge, die neuesten keep_versions bleiben erhalten."""
+        entries = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, name))
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[self.keep_versions:]:
+            if os.path.basename(path) != keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+class ModelManager:
+    """
+    Hält das aktuell geladene Modell und tauscht es ohne Ausfallzeit aus.
+
+    Neue Versionen werden abseits des Request-Pfads geladen, mit einigen
+    Beispielanfragen aufgewärmt und dann durch eine einzige Zuweisung aktiviert.
+    Laufende Anfragen halten ihre eigene Referenz auf das alte Modell und
+    beenden ihre Arbeit damit; danach wird es vom Garbage Collector freigegeben.
+    Bis das erste Modell geladen ist, gilt die Anwendung als nicht bereit.
+    """
+
+    def __init__(self, source, cache, warmup_queries=None):
+        self.source = source
+        self.cache = cache
+        self.warmup_queries = warmup_queries or []
+        # (Modell, ModelVersion) als ein Tupel, damit beide immer konsistent gelesen werden
+        self._state = (None, None)
+        self.error = None
+        self.last_check = None
+        self.load_finished = threading.Event()
+        self._listeners = []
+        self._reload_lock = threading.Lock()
+        self._stop_polling = threading.Event()
+        self._thread = None
+        self._poll_thread = None
+
+    @property
+    def model(self):
+        return self._state[0]
+
+    @property
+    def version(self):
+        version = self._state[1]
+        return version.container if version is not None else None
+
+    def snapshot(self):
+        """Gibt (Modell, Version) einer Anfrage konsistent zurück."""
+        model, version = self._state
+        return model, version.container if version is not None else None
+
+    def add_listener(self, callback):
+        """Registriert einen Callback callback(model, version) für neu geladene Modelle."""
+        self._listeners.append(callback)
+
+    @property
+    def status(self):
+        if self.model is not None:
+            return 'ready'
+        if self.error is not None:
+            return 'error'
+        return 'loading'
+
+    def warm_up(self, model):
+        """Führt Beispielanfragen aus, damit Caches und gemappte Seiten vor dem Austausch geladen sind."""
+        for ingredients in self.warmup_queries:
+            model.recommend(ingredients, top_n=5)
+            model.suggest_ingredients(ingredients[0][:2], max_suggestions=8)
+
+    def reload(self, force=False):
+        """
+        Lädt die neueste Modellversion, falls sie sich von der aktiven unterscheidet.
+
+        Args:
+            force (bool): Auch bei unveränderter Version neu laden.
+
+        Returns:
+            bool: True, wenn ein neues Modell aktiviert wurde.
+        """
+        with self._reload_lock:
+            try:
+                if self.source is None:
+                    raise RuntimeError(
+                        "Keine Modellquelle konfiguriert. Bitte AZURE_STORAGE_CONNECTION_STRING oder MODEL_SOURCE_DIR setzen."
+                    )
+                self.last_check = time.time()
+                version = self.source.latest_version()
+                if version is None:
+                    raise RuntimeError("Keine Modellversion in der Modellquelle gefunden")
+                if version == self._state[1] and not force:
+                    # Die Quelle ist (wieder) erreichbar, ein früherer Fehler ist damit erledigt
+                    self.error = None
+                    return False
+
+                local_path = self.cache.fetch(self.source, version)
+                model = load_model_file(local_path)
+                self.warm_up(model)
+
+                # Atomarer Austausch: eine einzige Zuweisung der Referenz
+                old_model, old_version = self._state
+                self._state = (model, version)
+                self.error = None
+                logger.info(
+                    f"Modell {version.container} aktiviert"
+                    + (f" (vorher {old_version.container})" if old_version is not None else "")
+                )
+                for callback in self._listeners:
+                    callback(model, version.container)
+
+                # Speicher des alten Modells freigeben, sobald keine Anfrage es mehr verwendet
+                del old_model
+                gc.collect()
+                return True
+            except Exception as e:
+                self.error = str(e)
+                logger.error(f"Fehler beim Laden des Modells: {e}")
+                return False
+            finally:
+                self.load_finished.set()
+
+    def load(self):
+        """Lädt die neueste Modellversion (blockierend)."""
+        self.reload()
+        return self.model
+
+    def start(self, background=True):
+        """Startet das Laden des Modells, standardmäßig in einem Hintergrund-Thread."""
+        if not background:
+            return self.load()
+        self._thread = threading.Thread(target=self.load, name="model-loader", daemon=True)
+        self._thread.start()
+        return None
+
+    def start_polling(self, interval):
+        """
+        Prüft etwa alle interval Sekunden im Hintergrund auf eine neuere Modellversion.
+
+        Die Wartezeit wird um bis zu 10% gestreut, damit die Worker eines
+        Prefork-Servers die Quelle nicht alle gleichzeitig abfragen.
+        """
+        if interval <= 0 or self._poll_thread is not None:
+            return
+
+        def poll():
+            while not self._stop_polling.wait(interval * random.uniform(0.9, 1.1)):
+                self.reload()
+
+        self._poll_thread = threading.Thread(target=poll, name="model-poller", daemon=True)
+        self._poll_thread.start()
+
+    def stop_polling(self):
+        self._stop_polling.set()
@@ -0,0 +1,106 @@
+# backend/replay_slow_queries.py
+# Spielt ein Slow-Query-Log (backend/logs/slow_queries.jsonl) offline gegen ein Modell ab
+#
+# python backend/replay_slow_queries.py -m model/RecipeRecommender.zip
+# python backend/replay_slow_queries.py -m model/RecipeRecommender.zip --profile replay.prof
+#
+# Pro Datensatz werden die Stufenzeiten des Modells gemessen und den Zeiten
+# aus dem Log gegenübergestellt. Der Ergebniscache wird dabei nicht verwendet.
+
+import argparse
+import cProfile
+import json
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Füge das Stammverzeichnis zum Python-Pfad hinzu, falls das Modul als Skript ausgeführt wird
+root_dir = Path(__file__).parent.parent.absolute()
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from backend.model_store import load_model_file
+from model.timing import StageTimer
+
+
+def read_log(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay_entry(model, entry):
+    """Führt die protokollierte Anfrage aus und gibt den StageTimer zurück."""
+    timer = StageTimer()
+    top_n = entry.get('top_n', 5)
+    threshold = entry.get('threshold', 0.3)
+    if 'queries' in entry:
+        model.recommend_many(entry['queries'], top_n=top_n, threshold=threshold, timer=timer)
+    elif 'ingredients' in entry:
+        model.recommend(entry['ingredients'], top_n=top_n, threshold=threshold, timer=timer)
+    elif 'term' in entry:
+        model.suggest_ingredients(entry['term'], max_suggestions=entry.get('max_suggestions', 8))
+        timer.mark('suggest')
+    else:
+        return None
+    return timer
+
+
+def describe(entry):
+    if 'queries' in entry:
+        return f"{len(entry['queries'])} Anfragen (Batch)"
+    if 'ingredients' in entry:
+        return f"{len(entry['ingredients'])} Zutaten: {', '.join(entry['ingredients'][:8])}" + (
+            ' ...' if len(entry['ingredients']) > 8 else '')
+    return f"Vorschläge für '{entry.get('term')}'"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Replay a slow-query log against a model offline')
+    parser.add_argument('-l', '--log', default=str(root_dir / 'backend' / 'logs' / 'slow_queries.jsonl'),
+                        help='Slow-query log (JSON lines, default: backend/logs/slow_queries.jsonl)')
+    parser.add_argument('-m', '--model', required=True,
+                        help='Model artifact (.zip or directory) or legacy .pkl')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='Runs per entry; the fastest run is reported (default: 3)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Run the replay under cProfile and write the profile to FILE')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    entries = read_log(args.log)
+    if not entries:
+        raise SystemExit(f"Keine Einträge in {args.log}")
+    model = load_model_file(args.model)
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+
+    totals = []
+    for number, entry in enumerate(entries, start=1):
+        timers = [replay_entry(model, entry) for _ in range(args.repeat)]
+        if timers[0] is None:
+            print(f"[{number}] Unbekannter Eintrag übersprungen")
+            continue
+        best = min(timers, key=lambda timer: timer.total)
+        totals.append(best.total * 1000)
+
+        print(f"[{number}] {entry.get('endpoint')} {describe(entry)}")
+        print(f"     Log: {entry.get('duration_ms', 0):9.2f} ms ({entry.get('model_version')})  "
+              f"Replay: {best.total * 1000:9.2f} ms")
+        logged_stages = entry.get('stages_ms', {})
+        for stage, seconds in best.stages.items():
+            logged = logged_stages.get(stage)
+            logged_text = f"{logged:9.2f} ms" if logged is not None else "        -   "
+            print(f"       {stage:<13} {logged_text}  {seconds * 1000:9.2f} ms")
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(f"Profil gespeichert in {args.profile}")
+
+    if totals:
+        print(f"{len(totals)} Anfragen abgespielt: p50 {np.percentile(totals, 50):.2f} ms, "
+              f"p95 {np.percentile(totals, 95):.2f} ms, max {max(totals):.2f} ms")
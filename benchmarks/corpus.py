@@ -0,0 +1,104 @@
+# benchmarks/corpus.py
+# Synthetische Rezeptkorpora für Benchmarks
+#
+# Die Verteilungen (Zutaten pro Rezept, Häufigkeit der einzelnen Zutaten samt
+# Menge und Einheit) werden aus einem echten Export (spider/output.jl)
+# übernommen und beliebig oft neu gezogen. Damit das Vokabular wie bei echten
+# Daten mit der Korpusgröße wächst, wird ein kleiner Anteil der Zutaten als
+# Variante mit neuem Namen erzeugt (Zipf-verteilt).
+
+import json
+import string
+
+import numpy as np
+from bson import ObjectId
+
+from model.ingredients import add_base_ingredients
+
+
+class CorpusGenerator:
+    """Erzeugt Rezeptdokumente im Format der MongoDB-Collection."""
+
+    def __init__(self, source_file, seed=42, variant_rate=0.05):
+        """
+        Args:
+            source_file (str): Scrapy-Export (JSON lines) als Vorlage.
+            seed (int): Startwert des Zufallsgenerators (gleicher Seed = gleicher Korpus).
+            variant_rate (float): Anteil der Zutaten, die als neue Variante erzeugt werden.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.variant_rate = variant_rate
+
+        ingredient_objects = {}
+        counts = {}
+        lengths = []
+        with open(source_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                ingredients = [i for i in json.loads(line).get('ingredients') or [] if i.get('ingredient')]
+                if not ingredients:
+                    continue
+                lengths.append(len(ingredients))
+                for ingredient_obj in ingredients:
+                    key = ingredient_obj['ingredient']
+                    ingredient_objects.setdefault(key, ingredient_obj)
+                    counts[key] = counts.get(key, 0) + 1
+
+        if not lengths:
+            raise ValueError(f"Keine Rezepte mit Zutaten in {source_file} gefunden")
+
+        self.ingredients = list(ingredient_objects.values())
+        frequencies = np.array([counts[i['ingredient']] for i in self.ingredients], dtype=np.float64)
+        self.probabilities = frequencies / frequencies.sum()
+        self.lengths = np.array(lengths)
+
+    @staticmethod
+    def _variant_suffix(number):
+        """Kodiert eine Zahl als Buchstabenfolge (0 -> "a", 26 -> "ba"), damit sie ein eigener Term wird."""
+        letters = ''
+        while True:
+            number, remainder = divmod(number, 26)
+            letters = string.ascii_lowercase[remainder] + letters
+            if number == 0:
+                return letters
+
+    def _sample_ingredient_objects(self, count):
+        picks = self.rng.choice(len(self.ingredients), size=count, replace=False, p=self.probabilities)
+        result = []
+        for pick in picks:
+            ingredient_obj = dict(self.ingredients[pick])
+            ingredient_obj.pop('base_ingredient', None)
+            if self.rng.random() < self.variant_rate:
+                suffix = self._variant_suffix(int(self.rng.zipf(1.3)) % 100000)
+                ingredient_obj['ingredient'] = f"{ingredient_obj['ingredient'].split(',')[0]} {suffix}"
+            result.append(ingredient_obj)
+        return add_base_ingredients(result)
+
+    def recipes(self, size):
+        """Erzeugt size Rezeptdokumente (Generator)."""
+        max_length = len(self.ingredients)
+        for number in range(size):
+            length = min(int(self.rng.choice(self.lengths)), max_length)
+            ingredients = self._sample_ingredient_objects(length)
+            yield {
+                '_id': ObjectId(),
+                'name': f"{ingredients[0]['ingredient'].split(',')[0]} Rezept {number}",
+                'ingredients': ingredients,
+            }
+
+    def queries(self, count, min_ingredients=2, max_ingredients=6):
+        """Erzeugt Zutatenlisten für recommend(), gezogen aus derselben Verteilung."""
+        return [
+            [ingredient_obj['base_ingredient'] for ingredient_obj in
+             self._sample_ingredient_objects(int(self.rng.integers(min_ingredients, max_ingredients + 1)))]
+            for _ in range(count)
+        ]
+
+    def prefixes(self, count, min_length=2, max_length=4):
+        """Erzeugt Eingabepräfixe für suggest_ingredients()."""
+        picks = self.rng.choice(len(self.ingredients), size=count, p=self.probabilities)
+        return [
+            self.ingredients[pick]['ingredient'][:int(self.rng.integers(min_length, max_length + 1))]
+            for pick in picks
+        ]
@@ -0,0 +1,210 @@
+# benchmarks/run.py
+# Latenz- und Speicherbenchmark für RecipeRecommender über mehrere Korpusgrößen
+#
+# python -m benchmarks.run --sizes 1000,10000,100000 -o benchmark.json
+#
+# Jede Größe läuft in einem eigenen Prozess, damit der maximale Speicherbedarf
+# (Peak RSS) nicht von vorherigen Größen beeinflusst wird. Pro Größe werden
+# train, save, load, recommend und suggest gemessen (p50/p95/p99 in ms, Peak RSS in MB).
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+# Füge das Stammverzeichnis zum Python-Pfad hinzu, falls das Modul als Skript ausgeführt wird
+root_dir = Path(__file__).parent.parent.absolute()
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from benchmarks.corpus import CorpusGenerator
+
+DEFAULT_SOURCE = str(root_dir / 'spider' / 'output.jl')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    """Aktueller Speicherbedarf des Prozesses in Bytes (Linux), sonst None."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss():
+    """Bisheriger Höchststand des Speicherbedarfs in Bytes (ru_maxrss ist unter Linux in KB)."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class PeakRSS:
+    """Misst den höchsten Speicherbedarf innerhalb eines with-Blocks durch Abtasten in einem Thread."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while True:
+            rss = current_rss()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self.peak = current_rss() or 0
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        if current_rss() is None:
+            # Ohne /proc bleibt nur der prozessweite Höchststand
+            self.peak = max_rss()
+        return False
+
+
+def summarize(samples, peak_rss):
+    """Fasst Laufzeiten (Sekunden) zu Perzentilen in Millisekunden zusammen."""
+    values = np.array(samples) * 1000
+    return {
+        'count': len(samples),
+        'mean_ms': round(float(values.mean()), 4),
+        'p50_ms': round(float(np.percentile(values, 50)), 4),
+        'p95_ms': round(float(np.percentile(values, 95)), 4),
+        'p99_ms': round(float(np.percentile(values, 99)), 4),
+        'max_ms': round(float(values.max()), 4),
+        'peak_rss_mb': round(peak_rss / 2**20, 1),
+    }
+
+
+def measure(function, arguments):
+    """Ruft function für jedes Argument auf und gibt (Zusammenfassung, letztes Ergebnis) zurück."""
+    samples = []
+    result = None
+    with PeakRSS() as peak:
+        for argument in arguments:
+            start = time.perf_counter()
+            result = function(argument)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples, peak.peak), result
+
+
+def run_size(size, source, seed, queries, train_repeats, load_repeats, top_n):
+    """Benchmark für eine Korpusgröße (läuft in einem eigenen Prozess)."""
+    # Verhindert, dass die INFO-Ausgaben des Modells die Messung dominieren
+    logging.disable(logging.INFO)
+    from model.recipe_model import RecipeRecommender
+
+    generator = CorpusGenerator(source, seed=seed)
+    start = time.perf_counter()
+    documents = list(generator.recipes(size))
+    generate_seconds = time.perf_counter() - start
+    ingredient_queries = generator.queries(queries)
+    prefixes = generator.prefixes(queries)
+
+    def train(_):
+        model = RecipeRecommender('mongodb://offline')
+        # load_documents() ergänzt base_ingredient in place, daher Kopien der Zutatenlisten
+        model.load_documents({**doc, 'ingredients': [dict(i) for i in doc['ingredients']]} for doc in documents)
+        return model.preprocess_data()
+
+    stages = {}
+    stages['train'], model = measure(train, range(train_repeats))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'RecipeRecommender.zip')
+        stages['save'], _ = measure(model.save_artifact, [path])
+        artifact_bytes = os.path.getsize(path)
+        vocabulary = model.recipe_matrix.shape[1]
+        ingredients = len(model.ingredient_vocabulary)
+        del model, documents
+
+        stages['load'], model = measure(RecipeRecommender.load_artifact, [path] * load_repeats)
+        stages['recommend'], _ = measure(lambda q: model.recommend(q, top_n=top_n), ingredient_queries)
+        stages['suggest'], _ = measure(lambda p: model.suggest_ingredients(p, max_suggestions=8), prefixes)
+        del model
+
+    return {
+        'size': size,
+        'vocabulary': vocabulary,
+        'ingredients': ingredients,
+        'artifact_bytes': artifact_bytes,
+        'generate_seconds': round(generate_seconds, 3),
+        'max_rss_mb': round(max_rss() / 2**20, 1),
+        'stages': stages,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=root_dir, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark RecipeRecommender on synthetic corpora')
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='Comma separated corpus sizes (default: 1000,10000,100000)')
+    parser.add_argument('--source', default=DEFAULT_SOURCE,
+                        help='Scrapy export whose ingredient distribution is resampled (default: spider/output.jl)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--queries', type=int, default=500,
+                        help='recommend/suggest calls per size (default: 500)')
+    parser.add_argument('--train-repeats', type=int, default=1, help='Training runs per size (default: 1)')
+    parser.add_argument('--load-repeats', type=int, default=5, help='Artifact loads per size (default: 5)')
+    parser.add_argument('--top-n', type=int, default=5, help='top_n for recommend (default: 5)')
+    parser.add_argument('-o', '--output', help='Write the results as JSON to this file (default: stdout)')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = []
+    for size in sizes:
+        print(f"Benchmark mit {size} Rezepten ...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            result = executor.submit(
+                run_size, size, args.source, args.seed, args.queries,
+                args.train_repeats, args.load_repeats, args.top_n
+            ).result()
+        for stage, summary in result['stages'].items():
+            print(f"  {stage:<10} p50 {summary['p50_ms']:>10.3f} ms  p95 {summary['p95_ms']:>10.3f} ms  "
+                  f"p99 {summary['p99_ms']:>10.3f} ms  peak {summary['peak_rss_mb']:>8.1f} MB", file=sys.stderr)
+        results.append(result)
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+        print(f"Ergebnisse gespeichert in {args.output}", file=sys.stderr)
+    else:
+        print(output)
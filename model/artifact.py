@@ -0,0 +1,322 @@
+# model/artifact.py
+# Kompaktes, memory-mappbares Dateiformat für trainierte RecipeRecommender-Modelle
+#
+# Aufbau eines Artefakt-Verzeichnisses:
+#   manifest.json      Formatversion, Matrixformen und Liste der Arrays
+#   *.npy              Arrays der CSR/CSC-Matrizen und Rezeptattribute
+#   vocabulary.json    TF-IDF-Vokabular und Reihenfolge der Basiszutaten
+#   categories.json    Zuordnung Kategorie -> numerische ID
+#   recipes.*.npy      Rezept-Metadaten spaltenweise (JSON pro Wert, siehe model/columnar.py)
+#   suggestions.*.npy  Vorschlagsindex (siehe SuggestionIndex.to_arrays())
+#   classifier.pkl     Trainierter RandomForest-Klassifikator
+#
+# Ab Version 2 enthält das Artefakt zusätzlich die rohen Termhäufigkeiten, die
+# Dokumenthäufigkeiten und im Manifest das Wasserzeichen für inkrementelles Training.
+# Ab Version 3 liegen Rezept-Metadaten und Vorschlagsindex als memory-mappbare
+# Arrays vor; ein Laden parst keine Rezepte mehr und baut keinen Index neu auf.
+# Version 1 und 2 (recipes.json) lassen sich weiterhin laden, Version 1 erfordert
+# aber ein vollständiges Training.
+#
+# Die .npy-Dateien werden mit np.load(mmap_mode='r') geladen. Mehrere Worker-Prozesse
+# teilen sich die Seiten dadurch über den Page-Cache des Betriebssystems. ZIP-Dateien
+# werden dafür in ein Verzeichnis pro Version entpackt (siehe extract_artifact()).
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, csc_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from model.columnar import RecipeTable, StringArray
+from model.suggestions import SuggestionIndex
+
+ARTIFACT_FORMAT = 'recipe-recommender'
+ARTIFACT_VERSION = 3
+SUPPORTED_VERSIONS = (1, 2, 3)
+MANIFEST_FILE = 'manifest.json'
+
+# Dünnbesetzte Matrizen des Serving-Index: Attributname -> Speicherformat
+SPARSE_ATTRIBUTES = {
+    'recipe_matrix': 'csr',
+    'recipe_ingredient_matrix': 'csr',
+    'ingredient_postings': 'csc',
+    'term_postings': 'csc',
+    'term_counts': 'csr',
+}
+
+# Eindimensionale Arrays des Serving-Index
+ARRAY_ATTRIBUTES = [
+    'recipe_ingredient_counts',
+    'recipe_category_ids',
+    'recipe_count_order',
+    'document_frequency',
+    'recipe_ids',
+]
+
+
+def _save_sparse(directory, name, matrix, layout):
+    """Speichert die Komponenten einer CSR/CSC-Matrix als einzelne .npy-Dateien."""
+    matrix = matrix.tocsr() if layout == 'csr' else matrix.tocsc()
+    matrix.sort_indices()
+    for part in ('data', 'indices', 'indptr'):
+        np.save(os.path.join(directory, f'{name}.{part}.npy'), getattr(matrix, part))
+    return {'layout': layout, 'shape': list(matrix.shape)}
+
+
+def _load_sparse(directory, name, spec, mmap_mode):
+    """Lädt eine mit _save_sparse() gespeicherte Matrix ohne die Arrays zu kopieren."""
+    data, indices, indptr = (
+        np.load(os.path.join(directory, f'{name}.{part}.npy'), mmap_mode=mmap_mode)
+        for part in ('data', 'indices', 'indptr')
+    )
+    matrix_cls = csr_matrix if spec['layout'] == 'csr' else csc_matrix
+    matrix = matrix_cls((data, indices, indptr), shape=tuple(spec['shape']), copy=False)
+    # Die Indizes wurden sortiert gespeichert; erneutes Sortieren würde schreibgeschützte Arrays ändern
+    matrix.has_sorted_indices = True
+    return matrix
+
+
+def save_artifact(model, directory):
+    """
+    Speichert den Serving-Zustand eines trainierten Modells als Artefakt-Verzeichnis.
+
+    Das Artefakt wird in ein neues temporäres Verzeichnis geschrieben, das danach
+    das Zielverzeichnis ersetzt. So bleiben keine Dateien früherer Speicherungen
+    zurück (pack_artifact() packt das ganze Verzeichnis), und ein Modell, dessen
+    Arrays per mmap aus directory geladen wurden, kann dorthin zurückgespeichert werden.
+
+    Args:
+        model (RecipeRecommender): Trainiertes Modell mit Serving-Index.
+        directory (str): Zielverzeichnis (wird bei Bedarf angelegt bzw. ersetzt).
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp_directory = tempfile.mkdtemp(prefix=f'{os.path.basename(directory)}.tmp-', dir=parent)
+    os.chmod(tmp_directory, 0o755)
+    try:
+        _write_artifact(model, tmp_directory)
+        if os.path.isdir(directory):
+            # Ein Verzeichnis lässt sich nicht auf ein nicht leeres Ziel umbenennen: altes zuerst beiseitelegen
+            old_directory = f'{tmp_directory}.old'
+            os.rename(directory, old_directory)
+            os.rename(tmp_directory, directory)
+            shutil.rmtree(old_directory, ignore_errors=True)
+        else:
+            os.rename(tmp_directory, directory)
+    finally:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+
+
+def _write_artifact(model, directory):
+    """Schreibt alle Dateien des Artefakts in ein leeres Verzeichnis."""
+    manifest = {
+        'format': ARTIFACT_FORMAT,
+        'format_version': ARTIFACT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'n_recipes': int(model.recipe_matrix.shape[0]),
+        'sparse': {},
+        'arrays': [],
+        'incremental': {
+            'watermark': model.watermark.isoformat() if getattr(model, 'watermark', None) else None,
+            'n_documents': int(getattr(model, 'n_documents', 0)),
+            'rows_at_full_rebuild': int(getattr(model, 'rows_at_full_rebuild', 0)),
+            'changed_since_full': int(getattr(model, 'changed_since_full', 0)),
+            'category_source': getattr(model, 'category_source', None),
+        },
+    }
+
+    for name, layout in SPARSE_ATTRIBUTES.items():
+        if getattr(model, name, None) is None:
+            continue
+        manifest['sparse'][name] = _save_sparse(directory, name, getattr(model, name), layout)
+
+    for name in ARRAY_ATTRIBUTES:
+        if getattr(model, name, None) is None:
+            continue
+        values = np.asarray(getattr(model, name))
+        if values.dtype == object:
+            # z.B. Rezept-IDs: als Unicode-Array fester Breite speichern, damit es ohne Pickle per mmap ladbar ist
+            values = values.astype(str)
+        np.save(os.path.join(directory, f'{name}.npy'), values)
+        manifest['arrays'].append(name)
+    np.save(os.path.join(directory, 'idf.npy'), model.vectorizer.idf_)
+
+    with open(os.path.join(directory, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'tfidf': {term: int(idx) for term, idx in model.vectorizer.vocabulary_.items()},
+            'ingredients': list(model.ingredient_vocabulary),
+        }, f, ensure_ascii=False)
+
+    with open(os.path.join(directory, 'categories.json'), 'w', encoding='utf-8') as f:
+        json.dump({category: int(idx) for category, idx in model.category_map.items()}, f, ensure_ascii=False)
+
+    # Rezept-Metadaten spaltenweise ablegen (ein geladenes Modell hält sie bereits kodiert)
+    recipes = model.all_recipes
+    if not isinstance(recipes, RecipeTable):
+        recipes = RecipeTable.from_frame(recipes)
+    manifest['recipes'] = []
+    for column, data, offsets in recipes.arrays():
+        np.save(os.path.join(directory, f'recipes.{column}.data.npy'), data)
+        np.save(os.path.join(directory, f'recipes.{column}.offsets.npy'), offsets)
+        manifest['recipes'].append(column)
+
+    if getattr(model, 'suggestion_index', None) is None:
+        model._build_suggestion_index()
+    manifest['suggestions'] = {'max_prefix_results': model.suggestion_index.max_prefix_results, 'arrays': []}
+    for name, values in model.suggestion_index.to_arrays().items():
+        np.save(os.path.join(directory, f'suggestions.{name}.npy'), values)
+        manifest['suggestions']['arrays'].append(name)
+
+    with open(os.path.join(directory, 'classifier.pkl'), 'wb') as f:
+        pickle.dump(model.classifier, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Das Manifest zuletzt schreiben, damit ein Verzeichnis ohne Manifest als unvollständig gilt
+    with open(os.path.join(directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    return directory
+
+
+def load_artifact(model, directory, mmap_mode='r'):
+    """
+    Lädt ein Artefakt-Verzeichnis in ein (leeres) RecipeRecommender-Objekt.
+
+    Args:
+        model (RecipeRecommender): Zu befüllendes Modell.
+        directory (str): Artefakt-Verzeichnis.
+        mmap_mode (str): Modus für np.load, None lädt die Arrays vollständig in den Speicher.
+    """
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Kein Modell-Artefakt in {directory} gefunden ({MANIFEST_FILE} fehlt)")
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get('format') != ARTIFACT_FORMAT or manifest.get('format_version') not in SUPPORTED_VERSIONS:
+        raise ValueError(
+            f"Nicht unterstütztes Artefaktformat {manifest.get('format')} v{manifest.get('format_version')} "
+            f"(erwartet {ARTIFACT_FORMAT} v{ARTIFACT_VERSION})"
+        )
+
+    for name, spec in manifest['sparse'].items():
+        setattr(model, name, _load_sparse(directory, name, spec, mmap_mode))
+    for name in manifest['arrays']:
+        setattr(model, name, np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode))
+
+    with open(os.path.join(directory, 'vocabulary.json'), 'r', encoding='utf-8') as f:
+        vocabulary = json.load(f)
+    model.vectorizer = TfidfVectorizer(vocabulary=vocabulary['tfidf'])
+    model.vectorizer.idf_ = np.load(os.path.join(directory, 'idf.npy'))
+    model.ingredient_vocabulary = {ingredient: idx for idx, ingredient in enumerate(vocabulary['ingredients'])}
+    model.ingredient_names = set(vocabulary['ingredients'])
+
+    with open(os.path.join(directory, 'categories.json'), 'r', encoding='utf-8') as f:
+        model.category_map = json.load(f)
+    model.reverse_category_map = {idx: category for category, idx in model.category_map.items()}
+
+    if 'recipes' in manifest:
+        model.all_recipes = RecipeTable({
+            column: StringArray(
+                np.load(os.path.join(directory, f'recipes.{column}.data.npy'), mmap_mode=mmap_mode),
+                np.load(os.path.join(directory, f'recipes.{column}.offsets.npy'), mmap_mode=mmap_mode),
+            )
+            for column in manifest['recipes']
+        })
+    else:
+        # Version 1 und 2: Rezept-Metadaten als JSON
+        with open(os.path.join(directory, 'recipes.json'), 'r', encoding='utf-8') as f:
+            model.all_recipes = pd.DataFrame(json.load(f))
+    if 'recipe_ids' not in manifest['arrays']:
+        if '_id' in model.all_recipes.columns:
+            model.recipe_ids = model.all_recipes['_id'].astype(str).to_numpy()
+        else:
+            model.recipe_ids = np.full(len(model.all_recipes), '', dtype=object)
+
+    # Ohne gespeicherten Index wird er beim ersten Vorschlag aufgebaut
+    model.suggestion_index = None
+    if 'suggestions' in manifest:
+        model.suggestion_index = SuggestionIndex.from_arrays(
+            {name: np.load(os.path.join(directory, f'suggestions.{name}.npy'), mmap_mode=mmap_mode)
+             for name in manifest['suggestions']['arrays']},
+            max_prefix_results=manifest['suggestions']['max_prefix_results']
+        )
+
+    with open(os.path.join(directory, 'classifier.pkl'), 'rb') as f:
+        model.classifier = pickle.load(f)
+
+    incremental = manifest.get('incremental', {})
+    model.watermark = datetime.fromisoformat(incremental['watermark']) if incremental.get('watermark') else None
+    model.n_documents = incremental.get('n_documents', 0)
+    model.rows_at_full_rebuild = incremental.get('rows_at_full_rebuild', 0)
+    model.changed_since_full = incremental.get('changed_since_full', 0)
+    model.category_source = incremental.get('category_source')
+
+    return model
+
+
+def pack_artifact(directory, zip_path):
+    """Packt ein Artefakt-Verzeichnis unkomprimiert in eine ZIP-Datei (für den Upload)."""
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for filename in sorted(os.listdir(directory)):
+            archive.write(os.path.join(directory, filename), arcname=filename)
+    return zip_path
+
+
+def extraction_directory(zip_path):
+    """
+    Versionsabhängiges Verzeichnis, in das eine Artefakt-ZIP-Datei entpackt wird.
+
+    Der Name enthält einen Hash des Manifests (mit Erstellungszeitpunkt), jede
+    Modellversion erhält also ihr eigenes Verzeichnis und ein bereits geladenes
+    Artefakt wird nie durch eine neuere Version überschrieben.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as archive:
+        digest = hashlib.sha256(archive.read(MANIFEST_FILE)).hexdigest()[:12]
+    return f"{zip_path[:-len('.zip')]}-{digest}"
+
+
+def extract_artifact(zip_path, directory=None):
+    """
+    Entpackt eine Artefakt-ZIP-Datei in ein Verzeichnis, aus dem per mmap geladen werden kann.
+
+    Mehrere Prozesse (z.B. Worker des Prefork-Servers) dürfen dieselbe Version
+    gleichzeitig entpacken: Jeder entpackt in ein eigenes temporäres Verzeichnis,
+    das atomar umbenannt wird. Existiert das Ziel mit vollständigem Manifest
+    bereits, wird es unverändert verwendet; ein vorhandenes Verzeichnis wird nie
+    gelöscht, da ein anderer Prozess gerade daraus laden kann.
+
+    Args:
+        zip_path (str): Artefakt-ZIP-Datei.
+        directory (str): Zielverzeichnis, standardmäßig extraction_directory(zip_path).
+
+    Returns:
+        str: Verzeichnis mit dem entpackten Artefakt.
+    """
+    directory = directory or extraction_directory(zip_path)
+    if os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+        return directory
+
+    parent = os.path.dirname(os.path.abspath(directory))
+    tmp_directory = tempfile.mkdtemp(prefix=f'{os.path.basename(directory)}.tmp-', dir=parent)
+    os.chmod(tmp_directory, 0o755)
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as archive:
+            archive.extractall(tmp_directory)
+        try:
+            os.rename(tmp_directory, directory)
+        except OSError:
+            # Ein anderer Prozess war schneller; dessen Verzeichnis ist vollständig, da ebenfalls umbenannt
+            if not os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+                raise
+    finally:
+        # Nur das eigene temporäre Verzeichnis entfernen (nach erfolgreichem Umbenennen existiert es nicht mehr)
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+    return directory
@@ -0,0 +1,139 @@
+# model/cache.py
+# Begrenzter LRU/TTL-Cache für Rezeptempfehlungen
+
+import threading
+import time
+from collections import OrderedDict
+
+from model.timing import NULL_TIMER
+
+
+class RecommendationCache:
+    """
+    Thread-sicherer Ergebniscache für RecipeRecommender.recommend().
+
+    Der Schlüssel besteht aus der normalisierten, reihenfolgeunabhängigen
+    Zutatenmenge sowie top_n und threshold. Einträge verfallen nach ttl_seconds,
+    bei vollem Cache wird der am längsten nicht genutzte Eintrag verdrängt.
+    Wechselt die Modellversion, wird der Cache geleert.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=600, clock=time.monotonic):
+        """
+        Args:
+            max_entries (int): Maximale Anzahl Einträge (0 deaktiviert den Cache).
+            ttl_seconds (float): Lebensdauer eines Eintrags in Sekunden (None = unbegrenzt).
+            clock (callable): Zeitquelle, standardmäßig time.monotonic.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.model_version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def normalize_ingredients(user_ingredients):
+        """Normalisiert Zutaten wie recommend() und entfernt Reihenfolge und Duplikate."""
+        return tuple(sorted({ingredient.lower().strip() for ingredient in user_ingredients} - {''}))
+
+    @classmethod
+    def make_key(cls, user_ingredients, top_n, threshold):
+        """Erstellt den Cache-Schlüssel für eine Empfehlungsanfrage."""
+        return cls.normalize_ingredients(user_ingredients), int(top_n), float(threshold)
+
+    def get(self, key):
+        """Gibt den gespeicherten Wert zurück oder None, falls nicht vorhanden oder abgelaufen."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and self.clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, model_version=None):
+        """
+        Speichert einen Wert und verdrängt bei Bedarf die ältesten Einträge.
+
+        Werte, die mit einer inzwischen ersetzten model_version berechnet wurden, werden verworfen.
+        """
+        if self.max_entries <= 0:
+            return
+        expires_at = self.clock() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if model_version is not None and model_version != self.model_version:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def recommend(self, model, user_ingredients, top_n=5, threshold=0.3, model_version=None, timer=None):
+        """
+        Liefert Empfehlungen aus dem Cache oder berechnet sie mit model.recommend().
+
+        Die zurückgegebene Liste wird zwischen Anfragen geteilt und darf vom
+        Aufrufer nicht verändert werden. Gehört model_version nicht zur aktuellen
+        Version des Caches (z.B. während eines Modellwechsels), wird der Cache umgangen.
+        Ein optionaler StageTimer erhält die Stufe cache_lookup sowie die Stufen des Modells.
+        """
+        timer = timer or NULL_TIMER
+        key = self.make_key(user_ingredients, top_n, threshold)
+        if model_version is not None and model_version != self.model_version:
+            return model.recommend(list(key[0]), top_n=top_n, threshold=threshold, timer=timer)
+
+        recommendations = self.get(key)
+        timer.mark('cache_lookup')
+        if recommendations is None:
+            recommendations = model.recommend(list(key[0]), top_n=top_n, threshold=threshold, timer=timer)
+            self.put(key, recommendations, model_version=model_version)
+        return recommendations
+
+    def set_model_version(self, version):
+        """Setzt die Modellversion und leert den Cache, falls sie sich geändert hat."""
+        with self._lock:
+            if version == self.model_version:
+                return
+            self.model_version = version
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+
+    def clear(self):
+        """Leert den Cache."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Gibt die Cache-Zähler für Monitoring und Dimensionierung zurück."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'model_version': self.model_version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,137 @@
+# model/columnar.py
+# Memory-mappbare Spalten aus UTF-8-Blobs mit Offsets
+#
+# Eine Spalte besteht aus zwei Arrays: data (uint8, alle Werte hintereinander)
+# und offsets (int64, Länge n + 1). Wert i liegt in data[offsets[i]:offsets[i + 1]].
+# Beide Arrays lassen sich mit np.load(mmap_mode='r') einblenden; dekodiert wird
+# nur der Wert, auf den tatsächlich zugegriffen wird.
+
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def json_value(value):
+    """Konvertiert NumPy- und BSON-Werte in JSON-kompatible Werte."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {key: json_value(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_value(val) for val in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def encode_strings(values):
+    """Kodiert Zeichenketten als (data, offsets)."""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8) if encoded else np.empty(0, dtype=np.uint8)
+    return data, offsets
+
+
+class StringArray:
+    """
+    Unveränderliche Folge von Zeichenketten auf Basis von (data, offsets).
+
+    Unterstützt len(), Indexzugriff und Iteration. Zugriffe laufen über
+    memoryviews, die ohne NumPy-Skalare direkt Python-Werte liefern; raw()
+    gibt die UTF-8-Bytes zurück (gleiche Sortierung wie die Zeichenketten,
+    z.B. für die Binärsuche mit bisect).
+    """
+
+    __slots__ = ('data', 'offsets', '_data', '_offsets')
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+        self._data = memoryview(data)
+        self._offsets = memoryview(offsets)
+
+    @classmethod
+    def from_strings(cls, values):
+        return cls(*encode_strings(values))
+
+    def __reduce__(self):
+        # memoryviews lassen sich nicht pickeln (save_model), sie werden beim Laden neu erstellt
+        return self.__class__, (np.asarray(self.data), np.asarray(self.offsets))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def raw(self, index):
+        """Gibt die UTF-8-Bytes des Werts index zurück."""
+        offsets = self._offsets
+        return self._data[offsets[index]:offsets[index + 1]].tobytes()
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError(index)
+        # Für index >= len(self) löst offsets[index + 1] den IndexError aus
+        offsets = self._offsets
+        return str(self._data[offsets[index]:offsets[index + 1]], 'utf-8')
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class RecipeTable:
+    """
+    Spaltenweise gespeicherte Rezept-Metadaten mit Dekodierung pro Zeile.
+
+    Jede Spalte ist ein StringArray mit einem JSON-Wert pro Rezept. Ein geladenes
+    Artefakt muss damit nicht alle Rezepte parsen; recommend() dekodiert nur die
+    Zeilen der Empfehlungen. Für Änderungen (inkrementelles Training) wird die
+    Tabelle mit to_frame() in einen DataFrame umgewandelt.
+    """
+
+    def __init__(self, columns):
+        """
+        Args:
+            columns (dict): Spaltenname -> StringArray mit JSON-kodierten Werten.
+        """
+        self._columns = dict(columns)
+        lengths = {len(values) for values in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Spalten der Rezepttabelle haben unterschiedliche Längen: {sorted(lengths)}")
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Kodiert alle Spalten eines DataFrames."""
+        return cls({
+            column: StringArray.from_strings(
+                json.dumps(json_value(value), ensure_ascii=False) for value in frame[column].tolist()
+            )
+            for column in frame.columns
+        })
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def __len__(self):
+        return self._length
+
+    def row(self, index):
+        """Gibt ein Rezept als Dictionary (Spalte -> Wert) zurück."""
+        return {column: json.loads(values[index]) for column, values in self._columns.items()}
+
+    def column(self, name):
+        """Dekodiert eine vollständige Spalte als Liste."""
+        return [json.loads(value) for value in self._columns[name]]
+
+    def to_frame(self):
+        """Dekodiert die Tabelle vollständig als DataFrame."""
+        return pd.DataFrame({column: self.column(column) for column in self._columns})
+
+    def arrays(self):
+        """Gibt die zu speichernden Arrays als (Spalte, data, offsets) zurück."""
+        return [(column, values.data, values.offsets) for column, values in self._columns.items()]
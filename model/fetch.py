@@ -0,0 +1,45 @@
+# cd model
+# python fetch.py -c '***AZURE_STORAGE_CONNECTION_STRING***' -o previous.zip
+# Lädt das zuletzt hochgeladene Modell-Artefakt für inkrementelles Training herunter
+
+from azure.storage.blob import BlobServiceClient
+import argparse
+
+try:
+    parser = argparse.ArgumentParser(description='Download latest model artifact')
+    parser.add_argument('-c', '--connection', required=True, help="azure storage connection string")
+    parser.add_argument('-o', '--output', default='previous.zip', help="local file for the artifact (default: previous.zip)")
+    args = parser.parse_args()
+
+    blob_service_client = BlobServiceClient.from_connection_string(args.connection)
+
+    # Container mit der höchsten Versionsnummer suchen (wie in save.py)
+    container_name = None
+    suffix = 0
+    for container in blob_service_client.list_containers():
+        parts = container['name'].split("-")
+        if container['name'].startswith("recipe-model") and len(parts) == 3 and parts[-1].isdigit():
+            if int(parts[-1]) > suffix:
+                suffix = int(parts[-1])
+                container_name = container['name']
+
+    if container_name is None:
+        print("Kein vorheriges Modell gefunden")
+        exit(0)
+
+    # Ältere Versionen enthalten nur das Pickle und eignen sich nicht für inkrementelles Training
+    container_client = blob_service_client.get_container_client(container_name)
+    blob_names = [blob.name for blob in container_client.list_blobs()]
+    if "RecipeRecommender.zip" not in blob_names:
+        print(f"Kein Modell-Artefakt in {container_name} gefunden")
+        exit(0)
+
+    print(f"Lade {container_name}/RecipeRecommender.zip nach {args.output}")
+    with open(args.output, "wb") as f:
+        for chunk in container_client.download_blob("RecipeRecommender.zip").chunks():
+            f.write(chunk)
+
+except Exception as ex:
+    print('Exception:')
+    print(ex)
+    exit(1)
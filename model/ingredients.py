@@ -0,0 +1,79 @@
+# model/ingredients.py
+# Normalisierung von Zutaten auf ihre Basiszutat
+#
+# Wird beim Import (Scrapy-Pipeline, MongoImporter) einmal pro Zutat ausgeführt und
+# als Feld 'base_ingredient' im Dokument gespeichert. Modell und App lesen danach
+# nur noch den gespeicherten Wert.
+
+import hashlib
+import json
+import re
+
+# Kommentare in Klammern werden für die Zutatenerkennung entfernt
+PARENTHESES_PATTERN = re.compile(r'\([^)]*\)')
+
+BASE_INGREDIENT_FIELD = 'base_ingredient'
+
+
+def base_ingredient(ingredient_text):
+    """
+    Normalisiert einen Zutatentext auf die Basiszutat.
+
+    Entfernt Kommentare in Klammern sowie Zusatzinformationen nach dem ersten
+    Komma und wandelt in Kleinbuchstaben um, z.B.
+    "Milchreis (Rundkornreis), z.B. Camolino" -> "milchreis". Fehlender Text ergibt ''.
+    """
+    return PARENTHESES_PATTERN.sub('', ingredient_text or '').split(',')[0].strip().lower()
+
+
+def ingredient_base(ingredient_obj):
+    """Gibt die gespeicherte Basiszutat eines Zutatenobjekts zurück oder berechnet sie (ältere Dokumente)."""
+    stored = ingredient_obj.get(BASE_INGREDIENT_FIELD)
+    return stored if stored is not None else base_ingredient(ingredient_obj['ingredient'])
+
+
+def recipe_base_ingredients(ingredients_list):
+    """Gibt die Basiszutaten einer Zutatenliste in Originalreihenfolge zurück (ohne leere Einträge)."""
+    bases = (
+        ingredient_base(ingredient_obj)
+        for ingredient_obj in ingredients_list
+        if isinstance(ingredient_obj, dict) and 'ingredient' in ingredient_obj
+    )
+    return [base for base in bases if base]
+
+
+def add_base_ingredients(ingredients_list):
+    """
+    Ergänzt jedes Zutatenobjekt um das Feld 'base_ingredient' (in place).
+
+    Bereits vorhandene Werte werden nicht neu berechnet.
+
+    Returns:
+        list: Die übergebene Zutatenliste.
+    """
+    for ingredient_obj in ingredients_list or []:
+        if isinstance(ingredient_obj, dict) and 'ingredient' in ingredient_obj \
+                and ingredient_obj.get(BASE_INGREDIENT_FIELD) is None:
+            ingredient_obj[BASE_INGREDIENT_FIELD] = base_ingredient(ingredient_obj['ingredient'])
+    return ingredients_list
+
+
+def recipe_content_hash(recipe):
+    """
+    Berechnet einen stabilen Inhalts-Hash (SHA-256) über Name und normalisierte Zutaten.
+
+    Dient dem Delta-Import, um unveränderte Rezepte zu erkennen. Felder wie _id
+    oder updated_at gehen nicht in den Hash ein.
+    """
+    ingredients = [
+        [
+            (ingredient_obj.get('ingredient') or '').strip(),
+            ingredient_base(ingredient_obj),
+            ingredient_obj.get('amount'),
+            (ingredient_obj.get('unit') or '').strip(),
+        ]
+        for ingredient_obj in recipe.get('ingredients') or []
+        if isinstance(ingredient_obj, dict) and 'ingredient' in ingredient_obj
+    ]
+    payload = json.dumps([(recipe.get('name') or '').strip(), ingredients], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
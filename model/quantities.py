@@ -0,0 +1,188 @@
+# model/quantities.py
+# Parsen von Mengenangaben und Umrechnung in kanonische Einheiten (g, ml, piece)
+#
+# Wird vom Spider (parse_ingredient) und vom MongoImporter verwendet. Alle Muster
+# und Tabellen werden einmal beim Import des Moduls aufgebaut.
+#
+# Micro-Benchmark über alle Zutatenzeilen eines Exports:
+#   python -m model.quantities spider/output.jl
+
+import re
+from dataclasses import dataclass
+
+# Unicode-Brüche und ihr Wert
+FRACTIONS = {
+    '¼': 0.25, '½': 0.5, '¾': 0.75,
+    '⅓': 1 / 3, '⅔': 2 / 3,
+    '⅕': 0.2, '⅖': 0.4, '⅗': 0.6, '⅘': 0.8,
+    '⅙': 1 / 6, '⅚': 5 / 6,
+    '⅛': 0.125, '⅜': 0.375, '⅝': 0.625, '⅞': 0.875,
+}
+_FRACTION_CHARS = ''.join(FRACTIONS)
+
+# Eine Zahl: "2", "1,5", "0.25", "1½", "1 ½", "½", "1/2"
+_NUMBER = rf'\d*\s*[{_FRACTION_CHARS}]|\d+\s*/\s*\d+|\d+(?:[.,]\d+)?'
+# Trennzeichen eines Bereichs: "1-2", "1 – 2", "1 bis 2"
+_RANGE_SEPARATOR = r'-|–|—|bis'
+# Ungefähre Angaben: "ca. 200 g", "etwa 2 EL" (die Menge wird unverändert übernommen)
+_APPROXIMATE = r'(?i:ca\.|circa|etwa|ungefähr)\s*'
+
+QUANTITY_PATTERN = re.compile(
+    rf'\s*(?:{_APPROXIMATE})?(?P<low>{_NUMBER})(?:\s*(?:{_RANGE_SEPARATOR})\s*(?P<high>{_NUMBER}))?\s*(?P<unit>[A-Za-zÄÖÜäöüß]+\.?)?'
+)
+_NUMBER_PATTERN = re.compile(rf'(?P<whole>\d*)\s*(?P<fraction>[{_FRACTION_CHARS}])|(?P<num>\d+)\s*/\s*(?P<den>\d+)')
+
+CANONICAL_UNITS = ('g', 'ml', 'piece')
+
+# Einheit (klein geschrieben, ohne Punkt) -> (kanonische Einheit, Faktor)
+# Löffel, Prise und Messerspitze sind Näherungswerte.
+UNIT_CONVERSIONS = {
+    'mg': ('g', 0.001), 'g': ('g', 1.0), 'gr': ('g', 1.0), 'kg': ('g', 1000.0),
+    'prise': ('g', 0.5), 'prisen': ('g', 0.5),
+    'msp': ('g', 0.5), 'messerspitze': ('g', 0.5), 'messerspitzen': ('g', 0.5),
+    'ml': ('ml', 1.0), 'cl': ('ml', 10.0), 'dl': ('ml', 100.0), 'l': ('ml', 1000.0),
+    'tl': ('ml', 5.0), 'el': ('ml', 15.0), 'tasse': ('ml', 200.0), 'tassen': ('ml', 200.0),
+    '': ('piece', 1.0), 'stück': ('piece', 1.0), 'stk': ('piece', 1.0), 'paar': ('piece', 2.0),
+}
+# Gebinde und Zählmengen werden als Stück gezählt
+for _unit in (
+    'bund', 'zweig', 'zweige', 'scheibe', 'scheiben', 'tranche', 'tranchen', 'dose', 'dosen',
+    'päckchen', 'pck', 'beutel', 'handvoll', 'becher', 'glas', 'gläser', 'zehe', 'zehen',
+    'blatt', 'blätter', 'würfel', 'stange', 'stangen', 'knolle', 'knollen', 'kugel', 'kugeln',
+):
+    UNIT_CONVERSIONS[_unit] = ('piece', 1.0)
+
+
+@dataclass(frozen=True)
+class Quantity:
+    """Ergebnis von parse_quantity(); Bereiche wie "1-2" werden als Mittelwert in amount geführt."""
+    amount: float = None
+    unit: str = ''
+    amount_min: float = None
+    amount_max: float = None
+    canonical_amount: float = None
+    canonical_unit: str = None
+
+
+def parse_number(text):
+    """Wandelt eine Zahl wie "1,5", "1½" oder "1/2" in float um; None für Brüche mit Nenner 0."""
+    match = _NUMBER_PATTERN.fullmatch(text.strip())
+    if match is None:
+        return float(text.replace(',', '.'))
+    if match.group('fraction'):
+        return float(match.group('whole') or 0) + FRACTIONS[match.group('fraction')]
+    denominator = int(match.group('den'))
+    return int(match.group('num')) / denominator if denominator else None
+
+
+def to_canonical(amount, unit):
+    """
+    Rechnet eine Menge in die kanonische Einheit um.
+
+    Returns:
+        tuple: (Menge, Einheit) mit Einheit aus CANONICAL_UNITS, bzw. (None, None)
+            für unbekannte Einheiten oder fehlende Mengen.
+    """
+    conversion = UNIT_CONVERSIONS.get((unit or '').rstrip('.').lower())
+    if amount is None or conversion is None:
+        return None, None
+    canonical_unit, factor = conversion
+    return amount * factor, canonical_unit
+
+
+def parse_quantity(amount_text):
+    """
+    Zerlegt eine Mengenangabe in Menge und Einheit.
+
+    Beispiele: "200 g" -> 200.0 g (200 g), "1-2 EL" -> 1.5 EL (22.5 ml),
+    "½ Päckchen" -> 0.5 Päckchen (0.5 piece), "ca. 200 g" -> 200.0 g. Ohne
+    gültige Zahl (z.B. "etwas" oder "1/0 TL") bleibt amount None und der Text
+    wird als Einheit übernommen.
+    """
+    amount_text = (amount_text or '').strip()
+    match = QUANTITY_PATTERN.match(amount_text)
+    if match is None:
+        return Quantity(unit=amount_text)
+
+    low = parse_number(match.group('low'))
+    high = parse_number(match.group('high')) if match.group('high') else low
+    if low is None or high is None:
+        return Quantity(unit=amount_text)
+    amount = (low + high) / 2
+    unit = match.group('unit') or ''
+    canonical_amount, canonical_unit = to_canonical(amount, unit)
+    return Quantity(amount, unit, low, high, canonical_amount, canonical_unit)
+
+
+def add_quantities(ingredients_list):
+    """
+    Ergänzt jedes Zutatenobjekt um 'canonical_amount' und 'canonical_unit' (in place).
+
+    Ältere Exporte mit einer Menge als Text (z.B. "1-2") werden dabei neu geparst.
+
+    Returns:
+        list: Die übergebene Zutatenliste.
+    """
+    for ingredient_obj in ingredients_list or []:
+        if not isinstance(ingredient_obj, dict) or 'canonical_unit' in ingredient_obj:
+            continue
+        amount = ingredient_obj.get('amount')
+        unit = ingredient_obj.get('unit') or ''
+        if isinstance(amount, str):
+            quantity = parse_quantity(f"{amount} {unit}")
+            ingredient_obj['amount'], ingredient_obj['unit'] = quantity.amount, quantity.unit
+            amount, unit = quantity.amount, quantity.unit
+        ingredient_obj['canonical_amount'], ingredient_obj['canonical_unit'] = to_canonical(amount, unit)
+    return ingredients_list
+
+
+def format_amount(amount, unit):
+    """Setzt eine geparste Menge wieder als Text zusammen, wie er auf der Rezeptseite steht (z.B. "1½ EL")."""
+    if amount is None:
+        return unit or ''
+    whole = int(amount)
+    fraction = next((char for char, value in FRACTIONS.items() if abs(amount - whole - value) < 1e-9), None)
+    if fraction is not None:
+        text = f"{whole or ''}{fraction}"
+    else:
+        text = f"{amount:g}".replace('.', ',')
+    return f"{text} {unit}".strip()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description='Micro-benchmark for the ingredient quantity parser')
+    parser.add_argument('input', nargs='?', default='spider/output.jl',
+                        help='Scrapy JSON lines export (default: spider/output.jl)')
+    parser.add_argument('-r', '--repeat', type=int, default=20,
+                        help='Passes over all ingredient lines (default: 20)')
+    args = parser.parse_args()
+
+    # Rekonstruiere die Mengentexte der Rezeptseiten aus dem Export
+    amount_texts = []
+    with open(args.input, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                for ingredient_obj in json.loads(line).get('ingredients') or []:
+                    amount = ingredient_obj.get('amount')
+                    unit = ingredient_obj.get('unit') or ''
+                    amount_texts.append(format_amount(amount, unit) if not isinstance(amount, str) else f"{amount} {unit}")
+
+    if not amount_texts:
+        raise SystemExit(f"Keine Zutatenzeilen in {args.input} gefunden")
+
+    unknown_units = {quantity.unit for quantity in map(parse_quantity, amount_texts) if quantity.canonical_unit is None}
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for amount_text in amount_texts:
+            parse_quantity(amount_text)
+    elapsed = time.perf_counter() - start
+
+    total = len(amount_texts) * args.repeat
+    print(f"{len(amount_texts)} Zutatenzeilen x {args.repeat}: {total / elapsed:,.0f} Zeilen/s "
+          f"({elapsed / total * 1e6:.2f} µs/Zeile)")
+    if unknown_units:
+        print(f"Einheiten ohne Umrechnung: {', '.join(sorted(unknown_units))}")
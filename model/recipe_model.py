@@ -2,27 +2,73 @@
 # Verbessertes Modell zum Empfehlen von Rezepten basierend auf vorhandenen Zutaten
 
 import argparse
+import bisect
 import sys
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+from sklearn.preprocessing import normalize
+from scipy.sparse import csr_matrix, diags, vstack
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import pickle
 import re
 import os
+from array import array
+from datetime import datetime, timezone
+from bson import ObjectId
 from pymongo import MongoClient
 import logging
+from pathlib import Path
 from dotenv import load_dotenv
 
+# Füge das Stammverzeichnis zum Python-Pfad hinzu, falls das Modul als Skript ausgeführt wird
+root_dir = Path(__file__).parent.parent.absolute()
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from model.columnar import RecipeTable
+from model.suggestions import SuggestionIndex
+from model.ingredients import add_base_ingredients, ingredient_base, recipe_base_ingredients
+from model.timing import NULL_TIMER
+from model import artifact
+
 load_dotenv()
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Felder, die für Training und Empfehlungen aus MongoDB geladen werden (_id ist implizit enthalten)
+RECIPE_PROJECTION = {
+    'name': 1,
+    'category': 1,
+    'ingredients.ingredient': 1,
+    'ingredients.base_ingredient': 1,
+    'ingredients.amount': 1,
+    'ingredients.unit': 1,
+}
+
+# Ab diesem Anteil geänderter Rezepte bzw. unbekannter Terme wird statt
+# eines inkrementellen Updates vollständig neu trainiert
+DEFAULT_DRIFT_THRESHOLD = 0.2
+
+
+def assign_category(ingredients_text):
+    """Ordnet einem Rezept ohne Kategorie eine einfache Kategorie anhand der Zutaten zu."""
+    if 'mehl' in ingredients_text and ('zucker' in ingredients_text or 'schokolade' in ingredients_text):
+        return 'Gebäck'
+    elif 'fleisch' in ingredients_text or 'huhn' in ingredients_text or 'rind' in ingredients_text:
+        return 'Fleischgerichte'
+    elif 'fisch' in ingredients_text or 'lachs' in ingredients_text:
+        return 'Fischgerichte'
+    elif 'gemüse' in ingredients_text or 'tomate' in ingredients_text or 'salat' in ingredients_text:
+        return 'Gemüsegerichte'
+    else:
+        return 'Sonstiges'
+
+
 class RecipeRecommender:
     def __init__(self, mongo_uri, db_name='recipes', collection_name='tracks'):
         """
@@ -50,6 +96,9 @@ class RecipeRecommender:
         self.vectorizer = None
         self.ingredients_matrix = None
         self.ingredient_names = set()
+        # Basiszutaten pro geladenem Rezept als interne IDs (wird in load_data() erstellt)
+        self.base_ingredient_matrix = None
+        self.base_ingredient_names = []
         self.client = None
         self.db = None
         self.collection = None
@@ -58,6 +107,26 @@ class RecipeRecommender:
         self.test_recipes = None
         self.category_map = {}
         self.reverse_category_map = {}
+        # Serving-Index: wird einmalig in preprocess_data() erstellt
+        self.all_recipes = None
+        self.recipe_matrix = None
+        self.recipe_ids = None
+        self.ingredient_vocabulary = {}
+        self.recipe_ingredient_matrix = None
+        self.recipe_ingredient_counts = None
+        self.recipe_category_ids = None
+        self.ingredient_postings = None
+        self.term_postings = None
+        self.recipe_count_order = None
+        self.suggestion_index = None
+        # Zustand für inkrementelles Training (siehe update_incremental())
+        self.term_counts = None
+        self.document_frequency = None
+        self.n_documents = 0
+        self.watermark = None
+        self.category_source = None
+        self.rows_at_full_rebuild = 0
+        self.changed_since_full = 0
 
     def connect(self):
         """Stellt die Verbindung zu MongoDB her."""
@@ -70,30 +139,76 @@ class RecipeRecommender:
             logger.error(f"Fehler bei der Verbindung zu MongoDB: {e}")
             raise
 
-    def load_data(self):
-        """Lädt die Rezeptdaten aus MongoDB."""
+    def load_data(self, batch_size=1000):
+        """
+        Lädt die Rezeptdaten aus MongoDB.
+
+        Der Cursor wird blockweise (batch_size) durchlaufen und liefert nur die
+        benötigten Felder (RECIPE_PROJECTION). Im selben Durchgang werden die
+        Basiszutaten (beim Import gespeichert, bei älteren Dokumenten hier
+        ergänzt) als interne IDs in kompakten Arrays abgelegt, sodass der
+        Speicherbedarf nicht mit vollständigen Dokumenten wächst.
+
+        Args:
+            batch_size (int): Anzahl Dokumente pro Cursor-Batch.
+        """
         self.connect()
-        # Lade alle Rezepte aus der Collection
-        recipes = list(self.collection.find())
-        self.client.close()
+        # Rezepte, die nach diesem Zeitpunkt hinzukommen, übernimmt update_incremental()
+        self.watermark = datetime.now(timezone.utc)
+        try:
+            cursor = self.collection.find({}, RECIPE_PROJECTION, batch_size=batch_size)
+            return self.load_documents(cursor)
+        finally:
+            self.client.close()
+
+    def load_documents(self, documents):
+        """
+        Übernimmt Rezeptdokumente (wie in MongoDB gespeichert) aus einem beliebigen Iterable.
 
-        if not recipes:
+        Wird von load_data() mit dem MongoDB-Cursor aufgerufen; Benchmarks und
+        Tests können so ohne Datenbank trainieren.
+
+        Args:
+            documents (iterable): Dokumente mit _id, name, ingredients und optional category.
+        """
+        ids, names, categories, ingredients_lists, ingredients_texts = [], [], [], [], []
+        has_category = False
+        interned = {}
+        base_indices = array('i')
+        base_indptr = array('q', [0])
+
+        for doc in documents:
+            ingredients = add_base_ingredients(doc.get('ingredients') or [])
+            bases = recipe_base_ingredients(ingredients)
+            base_indices.extend(sorted({interned.setdefault(base, len(interned)) for base in bases}))
+            base_indptr.append(len(base_indices))
+
+            ids.append(doc.get('_id'))
+            names.append(doc.get('name'))
+            ingredients_lists.append(ingredients)
+            ingredients_texts.append(' '.join(bases))
+            if doc.get('category') is not None:
+                has_category = True
+            categories.append(doc.get('category'))
+
+        if not ids:
             logger.error("Keine Rezepte in der MongoDB-Collection gefunden.")
             raise ValueError("Keine Rezepte in der MongoDB-Collection gefunden.")
 
-        # Konvertiere die Liste von Rezepten in einen DataFrame
-        self.recipes = pd.DataFrame(recipes)
+        # Erstelle den DataFrame spaltenweise aus den projizierten Feldern
+        columns = {'_id': ids, 'name': names, 'ingredients': ingredients_lists}
+        if has_category:
+            columns['category'] = categories
+        columns['ingredients_text'] = ingredients_texts
+        self.recipes = pd.DataFrame(columns)
 
-        # Extrahiere alle einzigartigen Zutaten
-        for recipe in recipes:
-            for ingredient_obj in recipe.get('ingredients', []):
-                if isinstance(ingredient_obj, dict) and 'ingredient' in ingredient_obj:
-                    ingredient_name = ingredient_obj['ingredient'].lower()
-                    # Entferne Kommentare in Klammern für die Zutatenerkennung
-                    ingredient_name = re.sub(r'\([^)]*\)', '', ingredient_name).strip()
-                    # Entferne Zusatzinformationen nach Komma für Basiszutat
-                    base_ingredient = ingredient_name.split(',')[0].strip()
-                    self.ingredient_names.add(base_ingredient)
+        indices = np.frombuffer(base_indices, dtype=np.int32)
+        self.base_ingredient_matrix = csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), indices, np.frombuffer(base_indptr, dtype=np.int64)),
+            shape=(len(ids), len(interned))
+        )
+        self.base_ingredient_names = list(interned)
+        self.ingredient_names = set(interned)
 
         logger.info(f"Daten geladen: {len(self.recipes)} Rezepte mit {len(self.ingredient_names)} einzigartigen Zutaten")
         return self
@@ -109,34 +224,21 @@ class RecipeRecommender:
             logger.error("Spalte 'ingredients' fehlt im DataFrame")
             raise ValueError("Spalte 'ingredients' fehlt im DataFrame")
 
-        # Erstelle einen String mit allen Zutaten pro Rezept
-        self.recipes['ingredients_text'] = self.recipes['ingredients'].apply(
-            lambda ingredients_list: ' '.join([
-                re.sub(r'\([^)]*\)', '', ingredient_obj['ingredient']).split(',')[0].strip().lower()
-                for ingredient_obj in ingredients_list
-                if isinstance(ingredient_obj, dict) and 'ingredient' in ingredient_obj
-            ])
-        )
+        # Erstelle einen String mit allen Zutaten pro Rezept (falls nicht bereits in load_data() geschehen)
+        if 'ingredients_text' not in self.recipes.columns:
+            self.recipes['ingredients_text'] = self.recipes['ingredients'].apply(
+                lambda ingredients_list: ' '.join(recipe_base_ingredients(ingredients_list))
+            )
 
         # Extrahiere Kategorien aus den Rezepten (falls vorhanden) für die Klassifikation
         if 'category' in self.recipes.columns:
             self.recipes['category'] = self.recipes['category'].fillna('Sonstiges')
+            self.category_source = 'data'
         else:
             # Wenn keine Kategorie vorhanden ist, erstelle eine einfache basierend auf Zutaten
-            def assign_category(ingredients_text):
-                if 'mehl' in ingredients_text and ('zucker' in ingredients_text or 'schokolade' in ingredients_text):
-                    return 'Gebäck'
-                elif 'fleisch' in ingredients_text or 'huhn' in ingredients_text or 'rind' in ingredients_text:
-                    return 'Fleischgerichte'
-                elif 'fisch' in ingredients_text or 'lachs' in ingredients_text:
-                    return 'Fischgerichte'
-                elif 'gemüse' in ingredients_text or 'tomate' in ingredients_text or 'salat' in ingredients_text:
-                    return 'Gemüsegerichte'
-                else:
-                    return 'Sonstiges'
-            
             self.recipes['category'] = self.recipes['ingredients_text'].apply(assign_category)
-        
+            self.category_source = 'ingredients'
+
         # Erzeuge eine Zuordnung von Kategorie zu numerischen Werten
         categories = sorted(self.recipes['category'].unique())
         self.category_map = {cat: idx for idx, cat in enumerate(categories)}
@@ -159,6 +261,9 @@ class RecipeRecommender:
         # Trainiere einen RandomForest-Klassifikator zur Kategorisierung von Rezepten
         self.train_classifier()
 
+        # Erstelle den Serving-Index, damit recommend() nur noch die Anfrage vektorisieren muss
+        self.build_serving_index()
+
         logger.info("Daten vorverarbeitet und Modelle erstellt")
         return self
     
@@ -179,6 +284,328 @@ class RecipeRecommender:
         logger.info(f"Klassifikator trainiert - Genauigkeit: {accuracy:.2f}, F1-Score: {f1:.2f}")
         return self
 
+    def build_serving_index(self):
+        """
+        Erstellt den Serving-Index für Empfehlungen.
+
+        Der Index enthält die kombinierte Rezepttabelle (Trainings- und Testdaten),
+        die L2-normalisierte TF-IDF-Matrix im CSR-Format und die Zuordnung von
+        Matrixzeilen zu Rezept-IDs. Da die Zeilen normalisiert sind, entspricht die
+        Kosinus-Ähnlichkeit einem dünnbesetzten Skalarprodukt.
+        """
+        if self.vectorizer is None or self.train_recipes is None:
+            logger.error("Modell nicht trainiert. Rufen Sie zuerst preprocess_data() auf.")
+            raise ValueError("Modell nicht trainiert. Rufen Sie zuerst preprocess_data() auf.")
+
+        combined = pd.concat([self.train_recipes, self.test_recipes])
+        source_rows = combined.index.to_numpy()
+        self.all_recipes = combined.reset_index(drop=True)
+
+        # Rohe Termhäufigkeiten aufbewahren, damit die IDF bei inkrementellen
+        # Updates neu berechnet werden kann, ohne die Texte erneut zu verarbeiten
+        self.term_counts = self._count_terms(self.all_recipes['ingredients_text'])
+        self.recipe_matrix = self._tfidf_rows(self.term_counts)
+        self.document_frequency = np.bincount(self.term_counts.indices, minlength=self.term_counts.shape[1]).astype(np.int64)
+        self.n_documents = self.term_counts.shape[0]
+        self.rows_at_full_rebuild = self.term_counts.shape[0]
+        self.changed_since_full = 0
+
+        # Binäre Rezept×Zutat-Inzidenzmatrix über die Basiszutaten.
+        # Damit lassen sich Übereinstimmungen pro Anfrage als ein Matrix-Vektor-Produkt berechnen.
+        self.ingredient_vocabulary, self.recipe_ingredient_matrix = self._build_ingredient_incidence(source_rows)
+        self._build_row_index()
+
+        logger.info(f"Serving-Index erstellt: {self.recipe_matrix.shape[0]} Rezepte, {self.recipe_matrix.shape[1]} Merkmale")
+        return self
+
+    def _build_row_index(self):
+        """Erstellt die aus Rezepttabelle, TF-IDF- und Inzidenzmatrix abgeleiteten Strukturen."""
+        if '_id' in self.all_recipes.columns:
+            self.recipe_ids = self.all_recipes['_id'].astype(str).to_numpy()
+        else:
+            self.recipe_ids = np.full(len(self.all_recipes), '', dtype=object)
+
+        self.recipe_ingredient_counts = np.diff(self.recipe_ingredient_matrix.indptr).astype(np.int32)
+        self.recipe_category_ids = self.all_recipes['category_id'].to_numpy(dtype=np.int64)
+
+        # Invertierte Indizes (Zutat bzw. TF-IDF-Term -> sortierte Rezeptzeilen) für die Kandidatenauswahl.
+        # Im CSC-Format sind die Zeilenindizes einer Spalte genau deren Posting-Liste.
+        self.ingredient_postings = self.recipe_ingredient_matrix.tocsc()
+        self.ingredient_postings.sort_indices()
+        self.term_postings = self.recipe_matrix.tocsc()
+        self.term_postings.sort_indices()
+        # Rezepte absteigend nach Zutatenanzahl, um die Normalisierung fehlender Zutaten
+        # auch ohne Bewertung aller Rezepte exakt zu bestimmen
+        self.recipe_count_order = np.argsort(-self.recipe_ingredient_counts, kind='stable')
+
+        self._build_suggestion_index()
+        return self
+
+    def _count_terms(self, texts):
+        """Zählt die Terme des TF-IDF-Vokabulars pro Text (ohne IDF-Gewichtung)."""
+        counter = CountVectorizer(vocabulary=self.vectorizer.get_feature_names_out(), dtype=np.int32)
+        return counter.transform(texts).tocsr()
+
+    def _tfidf_rows(self, term_counts):
+        """Gewichtet Termhäufigkeiten mit der aktuellen IDF und normalisiert die Zeilen (L2)."""
+        weighted = term_counts.astype(np.float64) @ diags(self.vectorizer.idf_)
+        return normalize(weighted, norm='l2', copy=False).tocsr().astype(np.float32)
+
+    def refit_idf(self):
+        """
+        Berechnet die IDF aus den gespeicherten Dokumenthäufigkeiten neu.
+
+        Verwendet dieselbe geglättete Formel wie TfidfVectorizer:
+        idf = ln((1 + n) / (1 + df)) + 1. Danach werden die TF-IDF-Zeilen aus den
+        gespeicherten Termhäufigkeiten neu gewichtet.
+        """
+        self.vectorizer.idf_ = np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1
+        self.recipe_matrix = self._tfidf_rows(self.term_counts)
+        return self
+
+    def update_incremental(self, drift_threshold=DEFAULT_DRIFT_THRESHOLD, batch_size=1000):
+        """
+        Aktualisiert ein geladenes Modell nur mit neuen oder geänderten Rezepten.
+
+        Geladen werden Rezepte, deren _id oder updated_at jünger als das Wasserzeichen
+        des Modells ist. Geänderte Rezepte ersetzen ihre bisherige Zeile, neue werden
+        angehängt. Rezepte, deren _id nicht mehr in der Collection vorkommt, werden
+        entfernt (dafür werden nur die _ids aller Dokumente gelesen). Dokumenthäufigkeiten und IDF werden anhand der Änderungen
+        nachgeführt; TF-IDF-Vokabular und Klassifikator bleiben unverändert.
+
+        Überschreitet der Anteil geänderter Rezepte seit dem letzten vollständigen
+        Training oder der Anteil unbekannter Terme drift_threshold, oder taucht
+        eine unbekannte Kategorie auf, wird nichts geändert und False zurückgegeben.
+
+        Args:
+            drift_threshold (float): Maximal tolerierte Drift (0-1).
+            batch_size (int): Anzahl Dokumente pro Cursor-Batch.
+
+        Returns:
+            bool: True nach erfolgreichem Update, False wenn vollständig neu trainiert werden muss.
+        """
+        if any(getattr(self, name, None) is None for name in ('term_counts', 'document_frequency', 'watermark')):
+            logger.warning("Modell enthält keinen Zustand für inkrementelles Training")
+            return False
+        if (self.recipe_ids == '').any():
+            logger.warning("Modell enthält Rezepte ohne _id - gelöschte Rezepte sind nicht erkennbar")
+            return False
+
+        started_at = datetime.now(timezone.utc)
+        query = {'$or': [
+            {'_id': {'$gt': ObjectId.from_datetime(self.watermark)}},
+            {'updated_at': {'$gt': self.watermark}},
+        ]}
+        self.connect()
+        try:
+            docs = {}
+            for doc in self.collection.find(query, RECIPE_PROJECTION, batch_size=batch_size):
+                docs[str(doc['_id'])] = doc
+            # Gelöschte Rezepte: IDs im Modell, die in der Collection fehlen
+            current_ids = [str(doc['_id']) for doc in self.collection.find({}, {'_id': 1}, batch_size=batch_size)]
+        finally:
+            self.client.close()
+
+        deleted = np.flatnonzero(~pd.Index(self.recipe_ids).isin(current_ids))
+
+        if not docs and not len(deleted):
+            logger.info("Keine neuen, geänderten oder gelöschten Rezepte seit dem letzten Training")
+            self.watermark = started_at
+            return True
+
+        # Neue Zeilen aufbauen und die Drift gegenüber dem bestehenden Vokabular messen
+        known_terms = set(self.vectorizer.get_feature_names_out())
+        analyzer = self.vectorizer.build_analyzer()
+        rows = {'_id': [], 'name': [], 'ingredients': [], 'category': [], 'ingredients_text': []}
+        recipe_bases = []
+        unseen_tokens = total_tokens = 0
+        for recipe_id, doc in docs.items():
+            ingredients = add_base_ingredients(doc.get('ingredients') or [])
+            bases = recipe_base_ingredients(ingredients)
+            text = ' '.join(bases)
+            tokens = analyzer(text)
+            total_tokens += len(tokens)
+            unseen_tokens += sum(token not in known_terms for token in tokens)
+
+            category = doc.get('category')
+            if category is None:
+                category = assign_category(text) if self.category_source == 'ingredients' else 'Sonstiges'
+            if category not in self.category_map:
+                logger.info(f"Unbekannte Kategorie '{category}' - vollständiges Training erforderlich")
+                return False
+
+            rows['_id'].append(recipe_id)
+            rows['name'].append(doc.get('name'))
+            rows['ingredients'].append(ingredients)
+            rows['category'].append(category)
+            rows['ingredients_text'].append(text)
+            recipe_bases.append(sorted(set(bases)))
+
+        changed = len(docs) + len(deleted)
+        changed_fraction = (self.changed_since_full + changed) / max(self.rows_at_full_rebuild, 1)
+        unseen_fraction = unseen_tokens / total_tokens if total_tokens else 0.0
+        logger.info(
+            f"{len(docs)} neue/geänderte, {len(deleted)} gelöschte Rezepte, Anteil seit vollständigem Training: {changed_fraction:.2%}, "
+            f"unbekannte Terme: {unseen_fraction:.2%}"
+        )
+        if max(changed_fraction, unseen_fraction) > drift_threshold:
+            logger.info(f"Drift über Schwellenwert {drift_threshold:.2%} - vollständiges Training erforderlich")
+            return False
+
+        # Geladene Artefakte halten die Rezepte spaltenweise kodiert; für Änderungen als DataFrame dekodieren
+        if isinstance(self.all_recipes, RecipeTable):
+            self.all_recipes = self.all_recipes.to_frame()
+
+        # Ersetzte und gelöschte Rezepte entfernen; neue Versionen werden zusammen mit neuen Rezepten angehängt
+        replaced = pd.Index(self.recipe_ids).get_indexer(rows['_id'])
+        replaced = replaced[replaced >= 0]
+        removed = np.union1d(replaced, deleted)
+        keep = np.ones(len(self.all_recipes), dtype=bool)
+        keep[removed] = False
+
+        new_recipes = pd.DataFrame(rows)
+        new_recipes['category_id'] = new_recipes['category'].map(self.category_map)
+        columns = [column for column in self.all_recipes.columns if column in new_recipes.columns]
+        self.all_recipes = pd.concat(
+            [self.all_recipes[keep], new_recipes[columns]], ignore_index=True
+        )
+
+        # Dokumenthäufigkeiten nachführen und die IDF neu berechnen
+        new_counts = self._count_terms(rows['ingredients_text'])
+        old_counts = self.term_counts[removed]
+        self.document_frequency = (
+            np.asarray(self.document_frequency, dtype=np.int64)
+            - np.bincount(old_counts.indices, minlength=old_counts.shape[1])
+            + np.bincount(new_counts.indices, minlength=new_counts.shape[1])
+        )
+        self.n_documents += len(docs) - len(removed)
+        self.term_counts = vstack([self.term_counts[keep], new_counts], format='csr')
+        self.refit_idf()
+
+        # Neue Basiszutaten erhalten fortlaufende IDs am Ende des Vokabulars
+        self.ingredient_vocabulary = dict(self.ingredient_vocabulary)
+        for bases in recipe_bases:
+            for ingredient in bases:
+                self.ingredient_vocabulary.setdefault(ingredient, len(self.ingredient_vocabulary))
+        self.ingredient_names = set(self.ingredient_vocabulary)
+        indptr = np.zeros(len(recipe_bases) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(bases) for bases in recipe_bases])
+        indices = np.fromiter(
+            (self.ingredient_vocabulary[ingredient] for bases in recipe_bases for ingredient in bases),
+            dtype=np.int32, count=indptr[-1]
+        )
+        kept = self.recipe_ingredient_matrix[keep]
+        shape = (kept.shape[0], len(self.ingredient_vocabulary))
+        self.recipe_ingredient_matrix = vstack([
+            csr_matrix((kept.data, kept.indices, kept.indptr), shape=shape),
+            csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                       shape=(len(recipe_bases), len(self.ingredient_vocabulary))),
+        ], format='csr')
+        self.recipe_ingredient_matrix.sort_indices()
+
+        self._build_row_index()
+        self.changed_since_full += changed
+        self.watermark = started_at
+        logger.info(
+            f"Modell inkrementell aktualisiert: {len(docs) - len(replaced)} neue, {len(replaced)} geänderte, "
+            f"{len(deleted)} gelöschte Rezepte, insgesamt {len(self.all_recipes)}"
+        )
+        return True
+
+    def _build_ingredient_incidence(self, source_rows):
+        """
+        Erstellt das alphabetische Zutatenvokabular und die binäre Inzidenzmatrix der Serving-Tabelle.
+
+        Wurden die Basiszutaten bereits in load_data() als IDs abgelegt, werden nur
+        die Zeilen umsortiert und die IDs umnummeriert; sonst werden die Zutaten
+        aus der Rezepttabelle normalisiert.
+
+        Args:
+            source_rows (np.ndarray): Zeile in self.recipes für jede Zeile der Serving-Tabelle.
+        """
+        loaded = getattr(self, 'base_ingredient_matrix', None)
+        if loaded is not None and loaded.shape[0] == len(self.recipes):
+            names = self.base_ingredient_names
+            order = sorted(range(len(names)), key=names.__getitem__)
+            remap = np.empty(len(names), dtype=np.int32)
+            remap[order] = np.arange(len(names), dtype=np.int32)
+
+            rows = loaded[source_rows]
+            matrix = csr_matrix((rows.data, remap[rows.indices], rows.indptr), shape=rows.shape)
+            matrix.sort_indices()
+            vocabulary = {names[idx]: new_idx for new_idx, idx in enumerate(order)}
+            return vocabulary, matrix
+
+        recipe_bases = [set(recipe_base_ingredients(ingredients)) for ingredients in self.all_recipes['ingredients']]
+        vocabulary = {ingredient: idx for idx, ingredient in enumerate(sorted(set().union(*recipe_bases)))}
+        indptr = np.zeros(len(recipe_bases) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(bases) for bases in recipe_bases])
+        indices = np.fromiter(
+            (vocabulary[ingredient] for bases in recipe_bases for ingredient in sorted(bases)),
+            dtype=np.int32, count=indptr[-1]
+        )
+        matrix = csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), indices, indptr),
+            shape=(len(recipe_bases), len(vocabulary))
+        )
+        return vocabulary, matrix
+
+    def _build_suggestion_index(self):
+        """Erstellt den Vorschlagsindex, sortiert nach Anzahl Rezepte pro Zutat."""
+        recipes_per_ingredient = np.diff(self.ingredient_postings.indptr)
+        # Zutaten ohne Rezepte (z.B. nach dem Entfernen gelöschter Rezepte) nicht vorschlagen
+        self.suggestion_index = SuggestionIndex({
+            ingredient: count
+            for ingredient, count in zip(self.ingredient_vocabulary, recipes_per_ingredient) if count > 0
+        })
+        return self
+
+    @staticmethod
+    def _posting_list(postings, column):
+        """Gibt die sortierten Rezeptzeilen einer Spalte eines CSC-Postings-Index zurück."""
+        return postings.indices[postings.indptr[column]:postings.indptr[column + 1]]
+
+    def _candidate_rows(self, ingredient_columns, term_columns):
+        """
+        Bestimmt die Kandidatenrezepte einer Anfrage über die invertierten Indizes.
+
+        Kandidaten sind alle Rezepte, die mindestens eine Basiszutat oder einen
+        TF-IDF-Term mit der Anfrage teilen. Alle anderen Rezepte haben weder
+        Ähnlichkeit noch Übereinstimmung. Der Aufwand wächst mit der Länge der
+        Posting-Listen und nicht mit der Größe des Korpus.
+
+        Returns:
+            tuple: (sortierte Rezeptzeilen, Anzahl übereinstimmender Zutaten pro Zeile)
+        """
+        empty = np.empty(0, dtype=np.int32)
+        ingredient_hits = [self._posting_list(self.ingredient_postings, col) for col in ingredient_columns]
+        term_hits = [self._posting_list(self.term_postings, col) for col in term_columns]
+
+        if ingredient_hits:
+            ingredient_rows, ingredient_counts = np.unique(np.concatenate(ingredient_hits), return_counts=True)
+        else:
+            ingredient_rows, ingredient_counts = empty, empty
+        candidates = np.union1d(ingredient_rows, np.concatenate(term_hits) if term_hits else empty)
+
+        matching_counts = np.zeros(len(candidates), dtype=np.int32)
+        matching_counts[np.searchsorted(candidates, ingredient_rows)] = ingredient_counts
+        return candidates, matching_counts
+
+    def _max_missing(self, candidates, missing_counts):
+        """
+        Bestimmt die maximale Anzahl fehlender Zutaten über alle Rezepte.
+
+        Rezepten außerhalb der Kandidatenmenge fehlen alle ihre Zutaten. Unter den
+        ersten len(candidates) + 1 Rezepten der absteigend sortierten Zutatenanzahl
+        liegt daher immer das größte Nicht-Kandidaten-Rezept.
+        """
+        max_missing = missing_counts.max() if len(missing_counts) else 0
+        if len(candidates) < len(self.recipe_ingredient_counts):
+            head = self.recipe_count_order[:len(candidates) + 1]
+            outside = head[~np.isin(head, candidates)]
+            max_missing = max(max_missing, self.recipe_ingredient_counts[outside[0]])
+        return max_missing if max_missing > 0 else 1
+
     def evaluate_model(self):
         """Bewertet die Leistung des Modells mit verschiedenen Metriken."""
         if self.classifier is None or self.test_ingredients_matrix is None:
@@ -208,7 +635,7 @@ class RecipeRecommender:
         
         return metrics
 
-    def recommend(self, user_ingredients, top_n=5, threshold=0.3):
+    def recommend(self, user_ingredients, top_n=5, threshold=0.3, timer=None):
         """
         Empfiehlt Rezepte basierend auf den vom Benutzer angegebenen Zutaten.
 
@@ -216,6 +643,8 @@ class RecipeRecommender:
             user_ingredients (list): Liste der Zutaten, die der Benutzer hat.
             top_n (int): Anzahl der zu empfehlenden Rezepte.
             threshold (float): Mindestwert für die Ähnlichkeit (0-1).
+            timer (StageTimer): Optional; erhält die Zeiten der Stufen vectorize,
+                classify, candidates, similarity, rank und materialize.
 
         Returns:
             list: Liste der empfohlenen Rezepte mit Ähnlichkeitswerten.
@@ -227,150 +656,298 @@ class RecipeRecommender:
         if not self.vectorizer:
             logger.error("Modell wurde nicht trainiert. Bitte rufen Sie preprocess_data() auf.")
             raise ValueError("Modell wurde nicht trainiert. Bitte rufen Sie preprocess_data() auf.")
+        if top_n <= 0:
+            return []
 
         # Erstelle einen String aus den Benutzerzutaten
+        timer = timer or NULL_TIMER
         user_ingredients_text = ' '.join(user_ingredients)
         user_vector = self.vectorizer.transform([user_ingredients_text])
+        timer.mark('vectorize')
 
         # Wenn der Klassifikator trainiert wurde, prognostiziere die wahrscheinlichste Kategorie
-        predicted_category = None
+        category_id = None
         if self.classifier is not None:
             category_id = self.classifier.predict(user_vector)[0]
-            predicted_category = self.reverse_category_map.get(category_id)
-            logger.info(f"Prognostizierte Kategorie für Zutaten: {predicted_category}")
+            logger.info(f"Prognostizierte Kategorie für Zutaten: {self.reverse_category_map.get(category_id)}")
+        timer.mark('classify')
 
-        # Kombiniere alle Rezepte für die Ähnlichkeitsberechnung
-        all_recipes = pd.concat([self.train_recipes, self.test_recipes]).reset_index(drop=True)
-        all_matrix = self.vectorizer.transform(all_recipes['ingredients_text'])
+        # Ältere Modelle ohne Serving-Index: Index einmalig nachträglich erstellen
+        if getattr(self, 'ingredient_postings', None) is None:
+            self.build_serving_index()
 
-        # Berechne die Ähnlichkeit zwischen Benutzerzutaten und allen Rezepten
-        similarity_scores = cosine_similarity(user_vector, all_matrix).flatten()
+        # Bewerte Rezepte, die eine Zutat oder einen Term mit der Anfrage teilen; alle anderen
+        # ergänzt _rank_candidates() nur, falls sie den Schwellwert bzw. die Top-n erreichen können
+        user_ingredients_set = set(user_ingredients)
+        ingredient_columns = [self.ingredient_vocabulary[ing] for ing in user_ingredients_set if ing in self.ingredient_vocabulary]
+        candidates, matching_counts = self._candidate_rows(ingredient_columns, user_vector.indices)
+        timer.mark('candidates')
 
-        # Berechne den Prozentsatz der vorhandenen Zutaten und fehlenden Zutaten
-        matching_percentages = []
-        missing_counts = []
-        
-        for _, recipe in all_recipes.iterrows():
-            recipe_ingredients = set([
-                re.sub(r'\([^)]*\)', '', ingredient_obj['ingredient']).split(',')[0].strip().lower()
-                for ingredient_obj in recipe['ingredients']
-                if isinstance(ingredient_obj, dict) and 'ingredient' in ingredient_obj
-            ])
-            
-            if not recipe_ingredients:
-                matching_percentages.append(0)
-                missing_counts.append(0)
-                continue
-                
-            user_ingredients_set = set(user_ingredients)
-            matching_ingredients = user_ingredients_set.intersection(recipe_ingredients)
-            missing_ingredients = recipe_ingredients - user_ingredients_set
-            
-            # Prozentsatz der übereinstimmenden Zutaten
-            match_percentage = len(matching_ingredients) / len(recipe_ingredients) * 100
-            matching_percentages.append(match_percentage)
-            
-            # Anzahl fehlender Zutaten
-            missing_counts.append(len(missing_ingredients))
+        # Berechne die Kosinus-Ähnlichkeit als Skalarprodukt mit der normalisierten Rezeptmatrix
+        similarity_scores = (self.recipe_matrix[candidates] @ user_vector.T).toarray().ravel()
+        timer.mark('similarity')
+
+        recommendations = self._rank_candidates(
+            candidates, similarity_scores, matching_counts, category_id,
+            user_ingredients_set, top_n, threshold, timer
+        )
+        logger.info(f"{len(recommendations)} Rezepte empfohlen")
+        return recommendations
+
+    def recommend_many(self, ingredient_lists, top_n=5, threshold=0.3, timer=None):
+        """
+        Empfiehlt Rezepte für mehrere Zutatenlisten in einem Durchgang.
+
+        Alle Anfragen werden gemeinsam vektorisiert und klassifiziert. Ähnlichkeiten
+        und Übereinstimmungen werden mit je einem dünnbesetzten Matrix-Matrix-Produkt
+        berechnet, die Top-k-Auswahl erfolgt anschließend pro Anfrage.
+
+        Args:
+            ingredient_lists (list): Liste von Zutatenlisten.
+            top_n (int): Anzahl der zu empfehlenden Rezepte pro Anfrage.
+            threshold (float): Mindestwert für die Ähnlichkeit (0-1).
+            timer (StageTimer): Optional; erhält die über alle Anfragen summierten Stufenzeiten.
+
+        Returns:
+            list: Empfehlungslisten in der Reihenfolge der Anfragen.
+        """
+        if not self.vectorizer:
+            logger.error("Modell wurde nicht trainiert. Bitte rufen Sie preprocess_data() auf.")
+            raise ValueError("Modell wurde nicht trainiert. Bitte rufen Sie preprocess_data() auf.")
+        if not ingredient_lists:
+            return []
+        if top_n <= 0:
+            return [[] for _ in ingredient_lists]
+
+        if getattr(self, 'ingredient_postings', None) is None:
+            self.build_serving_index()
+
+        timer = timer or NULL_TIMER
+        queries = [[ingredient.lower().strip() for ingredient in ingredients] for ingredients in ingredient_lists]
+        query_sets = [set(query) for query in queries]
+
+        # Eine Matrix für alle Anfragen und ein einziger Aufruf des Klassifikators
+        user_matrix = self.vectorizer.transform([' '.join(query) for query in queries])
+        timer.mark('vectorize')
+        if self.classifier is not None:
+            category_ids = self.classifier.predict(user_matrix)
+        else:
+            category_ids = [None] * len(queries)
+        timer.mark('classify')
+
+        # Binäre Anfrage×Zutat-Matrix für die Übereinstimmungen
+        query_columns = [
+            sorted(self.ingredient_vocabulary[ing] for ing in query_set if ing in self.ingredient_vocabulary)
+            for query_set in query_sets
+        ]
+        indptr = np.zeros(len(queries) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(columns) for columns in query_columns])
+        indices = np.fromiter((col for columns in query_columns for col in columns), dtype=np.int32, count=indptr[-1])
+        query_matrix = csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), indices, indptr),
+            shape=(len(queries), len(self.ingredient_vocabulary))
+        )
+
+        # Die transponierten Postings sind CSR-Matrizen (Spalte -> Rezepte),
+        # die Produkte enthalten also nur Kandidatenrezepte als Nicht-Null-Einträge
+        similarities = (user_matrix @ self.term_postings.T).tocsr()
+        matches = (query_matrix @ self.ingredient_postings.T).tocsr()
+        timer.mark('similarity')
+
+        results = []
+        for i in range(len(queries)):
+            sim_rows = similarities.indices[similarities.indptr[i]:similarities.indptr[i + 1]]
+            sim_values = similarities.data[similarities.indptr[i]:similarities.indptr[i + 1]]
+            match_rows = matches.indices[matches.indptr[i]:matches.indptr[i + 1]]
+            match_values = matches.data[matches.indptr[i]:matches.indptr[i + 1]]
+
+            candidates = np.union1d(sim_rows, match_rows)
+            matching_counts = np.zeros(len(candidates), dtype=np.int32)
+            matching_counts[np.searchsorted(candidates, match_rows)] = match_values
+            similarity_scores = np.zeros(len(candidates), dtype=np.float64)
+            similarity_scores[np.searchsorted(candidates, sim_rows)] = sim_values
+            timer.mark('candidates')
+
+            results.append(self._rank_candidates(
+                candidates, similarity_scores, matching_counts, category_ids[i],
+                query_sets[i], top_n, threshold, timer
+            ))
+
+        logger.info(f"Empfehlungen für {len(queries)} Anfragen berechnet")
+        return results
+
+    def _combined_scores(self, candidates, similarity_scores, matching_counts, category_id, max_missing):
+        """
+        Berechnet den kombinierten Score der Kandidatenrezepte.
+
+        Returns:
+            tuple: (kombinierte Scores, Prozentsatz übereinstimmender Zutaten, Anzahl fehlender Zutaten)
+        """
+        # Prozentsatz der übereinstimmenden Zutaten und Anzahl fehlender Zutaten
+        recipe_counts = self.recipe_ingredient_counts[candidates]
+        matching_percentages = np.divide(
+            matching_counts * 100.0, recipe_counts,
+            out=np.zeros(len(recipe_counts), dtype=np.float64), where=recipe_counts > 0
+        )
+        missing_counts = recipe_counts - matching_counts
 
         # Berechne einen gewichteten Score basierend auf:
         # 1. Ähnlichkeitswert (30%)
         # 2. Prozentsatz übereinstimmender Zutaten (40%)
         # 3. Negativ gewichtete Anzahl fehlender Zutaten (30%)
-        max_missing = max(missing_counts) if missing_counts else 1
-        normalized_missing = [1 - (count / max_missing) for count in missing_counts]
-        
+        normalized_missing = 1 - missing_counts / max_missing
+
         combined_scores = (
-            0.3 * similarity_scores + 
-            0.4 * (np.array(matching_percentages) / 100) + 
-            0.3 * np.array(normalized_missing)
+            0.3 * similarity_scores +
+            0.4 * (matching_percentages / 100) +
+            0.3 * normalized_missing
         )
 
-        # Filter nach Kategorie, wenn eine prognostiziert wurde
-        if predicted_category:
-            # Erhöhe den Score für Rezepte in der prognostizierten Kategorie
-            category_boost = np.zeros_like(combined_scores)
-            for i, recipe in all_recipes.iterrows():
-                if recipe['category'] == predicted_category:
-                    category_boost[i] = 0.1  # 10% Bonus für passende Kategorie
-            combined_scores += category_boost
+        # Erhöhe den Score für Rezepte in der prognostizierten Kategorie um 10%
+        if self.reverse_category_map.get(category_id):
+            combined_scores += 0.1 * (self.recipe_category_ids[candidates] == category_id)
 
-        # Filtere nach Mindestähnlichkeit
+        return combined_scores, matching_percentages, missing_counts
+
+    def _outside_rows(self, candidates, combined_scores, max_missing, category_id, top_n, threshold):
+        """
+        Bestimmt die Rezepte außerhalb der Kandidatenmenge, die in die Top-n gelangen können.
+
+        Nicht-Kandidaten haben weder Ähnlichkeit noch Übereinstimmung. Ihr Score
+        0.3 * (1 - Zutatenanzahl / max_missing), plus 0.1 in der prognostizierten
+        Kategorie, hängt also nur von Zutatenanzahl und Kategorie ab und kann den
+        Schwellwert bei wenigen Zutaten trotzdem erreichen. Über recipe_count_order
+        werden nur Rezepte betrachtet, deren Zutatenanzahl dafür klein genug ist.
+
+        Returns:
+            np.ndarray: Zusätzlich zu bewertende Rezeptzeilen (ggf. leer).
+        """
+        if top_n <= 0:
+            return np.empty(0, dtype=candidates.dtype)
+
+        # Ein Nicht-Kandidat muss den Schwellwert und, bei genügend Kandidaten, den k-besten Score erreichen
+        cutoff = threshold
+        valid_scores = combined_scores[combined_scores >= threshold]
+        if len(valid_scores) >= top_n:
+            cutoff = max(cutoff, np.partition(valid_scores, len(valid_scores) - top_n)[len(valid_scores) - top_n])
+
+        boost = 0.1 if self.reverse_category_map.get(category_id) else 0.0
+        # Größte Zutatenanzahl, mit der der Score cutoff noch erreicht (mit bzw. ohne Kategorie-Bonus);
+        # die kleine Toleranz gleicht Rundungsfehler aus, zu viel gewählte Zeilen werden ohnehin exakt bewertet
+        boosted_limit = max_missing * (1 - (cutoff - boost) / 0.3) + 1e-9
+        plain_limit = max_missing * (1 - cutoff / 0.3) + 1e-9
+        if boosted_limit < 0 or len(candidates) >= len(self.recipe_ingredient_counts):
+            return np.empty(0, dtype=candidates.dtype)
+
+        # recipe_count_order ist absteigend nach Zutatenanzahl sortiert, die gesuchten Rezepte bilden das Ende
+        counts = self.recipe_ingredient_counts
+        start = bisect.bisect_left(self.recipe_count_order, -boosted_limit, key=lambda row: -counts[row])
+        rows = np.asarray(self.recipe_count_order[start:])
+        rows = rows[~np.isin(rows, candidates)]
+        if boost:
+            rows = rows[(counts[rows] <= plain_limit) | (self.recipe_category_ids[rows] == category_id)]
+        return rows.astype(candidates.dtype, copy=False)
+
+    def _rank_candidates(self, candidates, similarity_scores, matching_counts, category_id,
+                         user_ingredients_set, top_n, threshold, timer=NULL_TIMER):
+        """
+        Bewertet die Kandidatenrezepte einer Anfrage und erstellt die Top-n-Empfehlungen.
+
+        Args:
+            candidates (np.ndarray): Sortierte Zeilen der Kandidatenrezepte.
+            similarity_scores (np.ndarray): Kosinus-Ähnlichkeit pro Kandidat.
+            matching_counts (np.ndarray): Anzahl übereinstimmender Basiszutaten pro Kandidat.
+            category_id: Prognostizierte Kategorie-ID oder None.
+            user_ingredients_set (set): Normalisierte Benutzerzutaten.
+            top_n (int): Anzahl der zu empfehlenden Rezepte.
+            threshold (float): Mindestwert für den kombinierten Score.
+            timer (StageTimer): Erhält die Zeiten der Stufen rank und materialize.
+
+        Returns:
+            list: Liste der empfohlenen Rezepte, absteigend nach kombiniertem Score.
+        """
+        if top_n <= 0:
+            timer.mark('rank')
+            return []
+
+        # Die Normalisierung fehlender Zutaten bezieht sich immer auf alle Rezepte
+        max_missing = self._max_missing(candidates, self.recipe_ingredient_counts[candidates] - matching_counts)
+        combined_scores, matching_percentages, missing_counts = self._combined_scores(
+            candidates, similarity_scores, matching_counts, category_id, max_missing
+        )
+
+        # Rezepte außerhalb der Kandidatenmenge, die den Schwellwert bzw. die Top-n noch erreichen
+        outside = self._outside_rows(candidates, combined_scores, max_missing, category_id, top_n, threshold)
+        if len(outside):
+            order = np.argsort(np.concatenate([candidates, outside]), kind='stable')
+            candidates = np.concatenate([candidates, outside])[order]
+            similarity_scores = np.concatenate([similarity_scores, np.zeros(len(outside))])[order]
+            matching_counts = np.concatenate([matching_counts, np.zeros(len(outside), dtype=matching_counts.dtype)])[order]
+            combined_scores, matching_percentages, missing_counts = self._combined_scores(
+                candidates, similarity_scores, matching_counts, category_id, max_missing
+            )
+
+        # Filtere nach Mindestähnlichkeit und wähle die besten top_n ohne vollständige Sortierung
         valid_indices = np.where(combined_scores >= threshold)[0]
-        if len(valid_indices) < top_n:
-            # Wenn zu wenige Rezepte über dem Schwellwert liegen, nehme die besten verfügbaren
-            valid_indices = np.argsort(combined_scores)[-min(top_n, len(combined_scores)):][::-1]
-        else:
-            # Sortiere die validen Indizes nach Score
-            valid_indices = valid_indices[np.argsort(combined_scores[valid_indices])[::-1][:top_n]]
+        if len(valid_indices) > top_n:
+            valid_indices = valid_indices[np.argpartition(-combined_scores[valid_indices], top_n - 1)[:top_n]]
+        valid_indices = valid_indices[np.argsort(-combined_scores[valid_indices], kind='stable')]
+        timer.mark('rank')
 
         # Erstelle Liste der empfohlenen Rezepte
         recommendations = []
         for idx in valid_indices:
-            # Prüfe, ob der Score ausreichend ist
-            if combined_scores[idx] < threshold:
-                continue
-                
-            missing_ingredients = []
-            recipe_ingredients = set([
-                re.sub(r'\([^)]*\)', '', ingredient_obj['ingredient']).split(',')[0].strip().lower()
-                for ingredient_obj in all_recipes.iloc[idx]['ingredients']
-                if isinstance(ingredient_obj, dict) and 'ingredient' in ingredient_obj
-            ])
-            user_ingredients_set = set(user_ingredients)
-
-            for ingredient in recipe_ingredients:
-                if ingredient not in user_ingredients_set:
-                    # Finde das Original-Zutatenobjekt für fehlende Zutaten
-                    original_ingredients = []
-                    for ing_obj in all_recipes.iloc[idx]['ingredients']:
-                        if isinstance(ing_obj, dict) and 'ingredient' in ing_obj:
-                            base_ing = re.sub(r'\([^)]*\)', '', ing_obj['ingredient']).split(',')[0].strip().lower()
-                            if base_ing == ingredient:
-                                original_ingredients.append(ing_obj)
-
-                    if original_ingredients:
-                        missing_ingredients.extend(original_ingredients)
-
-            # Berechne zusätzliche Metriken
-            match_score = matching_percentages[idx]
-            missing_ingredient_count = missing_counts[idx]
-            
+            row = candidates[idx]
+            recipe = self._recipe_record(row)
+            # Teile die Original-Zutatenobjekte anhand der gespeicherten Basiszutat
+            # in vorhandene und fehlende Zutaten auf
+            available_ingredients, missing_ingredients = [], []
+            for ingredient_obj in recipe['ingredients']:
+                if not isinstance(ingredient_obj, dict) or 'ingredient' not in ingredient_obj:
+                    continue
+                if ingredient_base(ingredient_obj) in user_ingredients_set:
+                    available_ingredients.append(ingredient_obj)
+                else:
+                    missing_ingredients.append(ingredient_obj)
+
             recommendations.append({
-                'id': str(all_recipes.iloc[idx].get('_id', '')),
-                'name': all_recipes.iloc[idx]['name'],
-                'category': all_recipes.iloc[idx].get('category', 'Keine Kategorie'),
-                'similarity': similarity_scores[idx],
-                'match_percentage': match_score,
-                'missing_ingredient_count': missing_ingredient_count,
-                'combined_score': combined_scores[idx],
-                'full_recipe': all_recipes.iloc[idx].to_dict(),
+                'id': str(self.recipe_ids[row]),
+                'name': recipe['name'],
+                'category': recipe.get('category', 'Keine Kategorie'),
+                'similarity': float(similarity_scores[idx]),
+                'match_percentage': float(matching_percentages[idx]),
+                'missing_ingredient_count': int(missing_counts[idx]),
+                'combined_score': float(combined_scores[idx]),
+                'full_recipe': recipe,
+                'available_ingredients': available_ingredients,
                 'missing_ingredients': missing_ingredients
             })
 
-        # Sortiere abschließend nach kombiniertem Score
-        recommendations.sort(key=lambda x: x['combined_score'], reverse=True)
-        
-        logger.info(f"{len(recommendations)} Rezepte empfohlen")
+        timer.mark('materialize')
         return recommendations
 
+    def _recipe_record(self, row):
+        """Gibt die Metadaten eines Rezepts als Dictionary (Spalte -> Wert) zurück."""
+        if isinstance(self.all_recipes, RecipeTable):
+            # Geladene Artefakte: nur diese Zeile dekodieren
+            return self.all_recipes.row(row)
+        return self.all_recipes.iloc[row].to_dict()
+
     def suggest_ingredients(self, partial_name, max_suggestions=5):
-        """Schlägt Zutaten basierend auf einem Teilnamen vor."""
+        """Schlägt Zutaten basierend auf einem Teilnamen vor, sortiert nach Beliebtheit."""
         if not self.ingredient_names:
             logger.error("Keine Zutatennamen verfügbar. Rufen Sie zuerst load_data() auf.")
             return []
-            
-        suggestions = []
-        partial_name = partial_name.lower()
-
-        for ingredient in sorted(self.ingredient_names):
-            if partial_name in ingredient:
-                suggestions.append(ingredient)
 
-            if len(suggestions) >= max_suggestions:
-                break
+        # Geladene Artefakte und ältere Modelle: Vorschlagsindex einmalig nachträglich erstellen
+        if getattr(self, 'suggestion_index', None) is None:
+            if getattr(self, 'ingredient_postings', None) is None:
+                self.build_serving_index()
+            else:
+                self._build_suggestion_index()
 
-        logger.info(f"{len(suggestions)} Zutatenvorschläge für '{partial_name}' gefunden")
+        suggestions = self.suggestion_index.suggest(partial_name, max_suggestions)
+        logger.debug(f"{len(suggestions)} Zutatenvorschläge für '{partial_name}' gefunden")
         return suggestions
 
     def save_model(self, filename='RecipeRecommender.pkl'):
@@ -405,6 +982,41 @@ class RecipeRecommender:
             
         return self
 
+    def save_artifact(self, path='RecipeRecommender.zip'):
+        """
+        Speichert das Modell im kompakten Artefaktformat (siehe model/artifact.py).
+
+        Endet path auf .zip, wird das Artefakt-Verzeichnis zusätzlich für den Upload gepackt.
+        """
+        if self.recipe_matrix is None:
+            logger.error("Modell nicht trainiert. Rufen Sie zuerst preprocess_data() auf.")
+            raise ValueError("Modell nicht trainiert. Rufen Sie zuerst preprocess_data() auf.")
+
+        directory = path[:-len('.zip')] if path.endswith('.zip') else path
+        artifact.save_artifact(self, directory)
+        if path.endswith('.zip'):
+            artifact.pack_artifact(directory, path)
+        logger.info(f"Modell-Artefakt gespeichert als {path}")
+        return self
+
+    @classmethod
+    def load_artifact(cls, path='RecipeRecommender.zip', mmap_mode='r'):
+        """
+        Lädt ein Modell aus dem Artefaktformat.
+
+        Die Arrays werden per Memory-Mapping geladen; eine ZIP-Datei wird dafür
+        zuerst neben sich in ein Verzeichnis pro Version entpackt (bzw. ein bereits
+        entpacktes verwendet). Es wird keine MongoDB-Verbindung aufgebaut.
+        """
+        directory = path
+        if path.endswith('.zip'):
+            directory = artifact.extract_artifact(path)
+
+        model = cls(mongo_uri='')
+        artifact.load_artifact(model, directory, mmap_mode=mmap_mode)
+        logger.info(f"Modell-Artefakt geladen aus {path} ({len(model.all_recipes)} Rezepte)")
+        return model
+
     @classmethod
     def load_model(cls, filename='RecipeRecommender.pkl'):
         """Lädt ein gespeichertes Modell."""
@@ -438,8 +1050,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Recipe Recommender Model Training')
     parser.add_argument('-u', '--uri', type=str, 
                         help='MongoDB connection URI (optional, uses env vars if not provided)')
-    parser.add_argument('-o', '--output', type=str, default='RecipeRecommender.pkl',
-                        help='Output file for the trained model (default: RecipeRecommender.pkl)')
+    parser.add_argument('-o', '--output', type=str, default='RecipeRecommender.zip',
+                        help='Output file for the trained model; .pkl writes a legacy pickle (default: RecipeRecommender.zip)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='MongoDB cursor batch size while loading recipes (default: 1000)')
+    parser.add_argument('--incremental', type=str, metavar='ARTIFACT',
+                        help='Previous model artifact (.zip or directory); only new or changed recipes are folded in')
+    parser.add_argument('--drift-threshold', type=float, default=DEFAULT_DRIFT_THRESHOLD,
+                        help=f'Share of changed recipes or unseen terms that forces a full rebuild (default: {DEFAULT_DRIFT_THRESHOLD})')
     parser.add_argument('--test', action='store_true',
                         help='Run a test recommendation after training')
     parser.add_argument('--ingredients', type=str, default="Mehl,Eier,Milch,Zucker",
@@ -465,19 +1083,35 @@ if __name__ == "__main__":
         logger.info("Verbindungs-URI aus Umgebungsvariablen generiert.")
     
     try:
-        # Erstelle und trainiere das Modell
-        logger.info("Starte Training des RecipeRecommender-Modells...")
-        model = RecipeRecommender(MONGO_URI)
-        model.load_data()
-        model.preprocess_data()
-        
-        # Evaluiere das Modell
-        logger.info("Evaluiere Modell...")
-        metrics = model.evaluate_model()
+        model = None
+        if args.incremental:
+            # Inkrementelles Training: vorheriges Modell laden und nur neue Rezepte übernehmen
+            if os.path.exists(args.incremental):
+                logger.info(f"Starte inkrementelles Training ausgehend von {args.incremental}...")
+                model = RecipeRecommender.load_artifact(args.incremental, mmap_mode=None)
+                model.mongo_uri = MONGO_URI
+                if not model.update_incremental(args.drift_threshold, batch_size=args.batch_size):
+                    model = None
+            else:
+                logger.warning(f"Vorheriges Modell {args.incremental} nicht gefunden")
+
+        if model is None:
+            # Erstelle und trainiere das Modell
+            logger.info("Starte Training des RecipeRecommender-Modells...")
+            model = RecipeRecommender(MONGO_URI)
+            model.load_data(batch_size=args.batch_size)
+            model.preprocess_data()
+
+            # Evaluiere das Modell
+            logger.info("Evaluiere Modell...")
+            metrics = model.evaluate_model()
         
         # Speichere das Modell
         logger.info(f"Speichere Modell in {args.output}...")
-        model.save_model(args.output)
+        if args.output.endswith('.pkl'):
+            model.save_model(args.output)
+        else:
+            model.save_artifact(args.output)
         logger.info(f"Modell erfolgreich gespeichert!")
         
         # Optional: Testempfehlung
@@ -44,16 +44,21 @@ try:
         # Create the container
         container_client = blob_service_client.create_container(container_name)
 
-    local_file_name = "RecipeRecommender.pkl"
-    upload_file_path = os.path.join(".", local_file_name)
+    # Artefakt (RecipeRecommender.zip) und optional das ältere Pickle-Format hochladen
+    local_file_names = [name for name in ("RecipeRecommender.zip", "RecipeRecommender.pkl") if os.path.exists(name)]
+    if not local_file_names:
+        raise FileNotFoundError("Kein Modell gefunden (RecipeRecommender.zip oder RecipeRecommender.pkl)")
 
-    # Create a blob client using the local file name as the name for the blob
-    blob_client = blob_service_client.get_blob_client(container=container_name, blob=local_file_name)
-    print("\nUploading to Azure Storage as blob:\n\t" + local_file_name)
+    for local_file_name in local_file_names:
+        upload_file_path = os.path.join(".", local_file_name)
 
-    # Upload the created file
-    with open(file=upload_file_path, mode="rb") as data:
-        blob_client.upload_blob(data)
+        # Create a blob client using the local file name as the name for the blob
+        blob_client = blob_service_client.get_blob_client(container=container_name, blob=local_file_name)
+        print("\nUploading to Azure Storage as blob:\n\t" + local_file_name)
+
+        # Upload the created file
+        with open(file=upload_file_path, mode="rb") as data:
+            blob_client.upload_blob(data)
 
 except Exception as ex:
     print('Exception:')
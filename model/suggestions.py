@@ -0,0 +1,173 @@
+# model/suggestions.py
+# Vorberechneter Index für die Autovervollständigung von Zutaten
+
+import bisect
+
+import numpy as np
+
+from model.columnar import StringArray
+
+
+class Postings:
+    """
+    Zuordnung Zeichenkette -> aufsteigende Zutaten-IDs in Array-Form.
+
+    Die Schlüssel liegen sortiert in einem StringArray, die IDs aller Schlüssel
+    hintereinander in ids. Gesucht wird per Binärsuche, sodass ein geladener
+    Index ohne Aufbau eines Dictionaries direkt aus den Arrays arbeitet.
+    """
+
+    __slots__ = ('keys', 'offsets', 'ids')
+
+    def __init__(self, keys, offsets, ids):
+        self.keys = keys
+        self.offsets = offsets
+        self.ids = ids
+
+    @classmethod
+    def from_dict(cls, mapping):
+        keys = sorted(mapping)
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(mapping[key]) for key in keys])
+        ids = np.fromiter((idx for key in keys for idx in mapping[key]), dtype=np.int32, count=offsets[-1])
+        return cls(StringArray.from_strings(keys), offsets, ids)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, key, default=()):
+        """Gibt die IDs zu key als Liste zurück (bzw. default)."""
+        # UTF-8 erhält die Sortierung, verglichen werden daher die Bytes ohne Dekodieren
+        encoded = key.encode('utf-8')
+        position = bisect.bisect_left(range(len(self.keys)), encoded, key=self.keys.raw)
+        if position < len(self.keys) and self.keys.raw(position) == encoded:
+            return self.ids[self.offsets[position]:self.offsets[position + 1]].tolist()
+        return default
+
+    def arrays(self, name):
+        return {
+            f'{name}.keys.data': self.keys.data, f'{name}.keys.offsets': self.keys.offsets,
+            f'{name}.offsets': self.offsets, f'{name}.ids': self.ids,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, name):
+        return cls(
+            StringArray(arrays[f'{name}.keys.data'], arrays[f'{name}.keys.offsets']),
+            arrays[f'{name}.offsets'], arrays[f'{name}.ids']
+        )
+
+
+class SuggestionIndex:
+    """
+    Index für Zutatenvorschläge mit Präfix- und Infix-Suche.
+
+    Die Zutaten werden nach Beliebtheit (Anzahl Rezepte, in denen sie vorkommen)
+    sortiert abgelegt, die interne ID einer Zutat entspricht also ihrem Rang.
+
+    - Präfixsuche: Jeder Präfix verweist auf die bereits nach Rang sortierten
+      besten IDs (wie ein Trie mit vorberechneten Top-k pro Knoten). Eine Anfrage
+      ist damit ein einzelner Dictionary-Zugriff.
+    - Infixsuche: Trigramm -> aufsteigende IDs. Durchsucht wird nur die kürzeste
+      Posting-Liste der Anfrage-Trigramme, und zwar in Rangfolge mit Abbruch
+      nach den ersten Treffern. Anfragen mit zwei Zeichen (die kürzesten, die
+      /api/suggestions annimmt) verwenden einen Bigramm-Index.
+
+    Alle Strukturen bestehen aus NumPy-Arrays (siehe Postings) und werden mit
+    dem Modell-Artefakt gespeichert und per mmap geladen (to_arrays/from_arrays).
+    """
+
+    # Namen der Postings-Strukturen in to_arrays()
+    POSTINGS = ('prefixes', 'bigrams', 'trigrams')
+
+    def __init__(self, ingredient_counts, max_prefix_results=20):
+        """
+        Args:
+            ingredient_counts (dict): Zutat -> Anzahl Rezepte mit dieser Zutat.
+            max_prefix_results (int): Anzahl vorberechneter Treffer pro Präfix.
+        """
+        ranked = sorted(
+            ((name, count) for name, count in ingredient_counts.items() if name),
+            key=lambda item: (-item[1], item[0])
+        )
+        self.names = StringArray.from_strings(name for name, _ in ranked)
+        self.counts = np.array([count for _, count in ranked], dtype=np.int64)
+        self.max_prefix_results = max_prefix_results
+
+        prefixes = {}
+        bigrams = {}
+        trigrams = {}
+        for idx, (name, _) in enumerate(ranked):
+            for end in range(1, len(name) + 1):
+                bucket = prefixes.setdefault(name[:end], [])
+                if len(bucket) < max_prefix_results:
+                    bucket.append(idx)
+            for gram in {name[i:i + 2] for i in range(len(name) - 1)}:
+                bigrams.setdefault(gram, []).append(idx)
+            for gram in {name[i:i + 3] for i in range(len(name) - 2)}:
+                trigrams.setdefault(gram, []).append(idx)
+
+        self.prefixes = Postings.from_dict(prefixes)
+        self.bigrams = Postings.from_dict(bigrams)
+        self.trigrams = Postings.from_dict(trigrams)
+
+    @classmethod
+    def from_arrays(cls, arrays, max_prefix_results=20):
+        """Erstellt den Index aus mit to_arrays() gespeicherten (ggf. per mmap geladenen) Arrays."""
+        index = cls.__new__(cls)
+        index.names = StringArray(arrays['names.data'], arrays['names.offsets'])
+        index.counts = arrays['counts']
+        index.max_prefix_results = max_prefix_results
+        for name in cls.POSTINGS:
+            setattr(index, name, Postings.from_arrays(arrays, name))
+        return index
+
+    def to_arrays(self):
+        """Gibt alle Arrays des Index als Dictionary (Name -> Array) zurück."""
+        arrays = {'names.data': self.names.data, 'names.offsets': self.names.offsets, 'counts': self.counts}
+        for name in self.POSTINGS:
+            arrays.update(getattr(self, name).arrays(name))
+        return arrays
+
+    def __len__(self):
+        return len(self.names)
+
+    def _infix_postings(self, query):
+        """Gibt die kürzeste Posting-Liste zurück, die alle Treffer für query enthält."""
+        if len(query) < 2:
+            # Einzelne Zeichen: alle Zutaten in Rangfolge (Abbruch nach den ersten Treffern)
+            return range(len(self.names))
+        if len(query) == 2:
+            # Die Posting-Liste des Bigramms enthält genau die Treffer
+            return self.bigrams.get(query, ())
+
+        shortest = None
+        for i in range(len(query) - 2):
+            postings = self.trigrams.get(query[i:i + 3], None)
+            if postings is None:
+                return ()
+            if shortest is None or len(postings) < len(shortest):
+                shortest = postings
+        return shortest
+
+    def suggest(self, partial_name, max_suggestions=5):
+        """
+        Schlägt Zutaten vor, die partial_name enthalten.
+
+        Zutaten, die mit partial_name beginnen, werden zuerst geliefert, danach
+        Zutaten, die partial_name an anderer Stelle enthalten. Innerhalb beider
+        Gruppen wird nach Beliebtheit sortiert.
+        """
+        query = partial_name.lower().strip()
+        if not query or max_suggestions <= 0:
+            return []
+
+        result_ids = self.prefixes.get(query, [])[:max_suggestions]
+        if len(result_ids) < max_suggestions:
+            for idx in self._infix_postings(query):
+                if query in self.names[idx] and idx not in result_ids:
+                    result_ids.append(idx)
+                    if len(result_ids) >= max_suggestions:
+                        break
+
+        return [self.names[idx] for idx in result_ids]
@@ -0,0 +1,48 @@
+# model/timing.py
+# Leichtgewichtige Zeitmessung pro Verarbeitungsschritt
+#
+# recommend() ruft an jeder Stufengrenze timer.mark(<stufe>) auf. Ohne Timer wird
+# NULL_TIMER verwendet, dessen mark() nichts tut; mit Timer kostet eine Stufe
+# einen Aufruf von time.perf_counter().
+
+import time
+
+
+class StageTimer:
+    """
+    Summiert die Zeit zwischen aufeinanderfolgenden mark()-Aufrufen pro Stufe.
+
+    Jede Stufe erhält die Zeit seit dem vorherigen mark() bzw. seit dem Erstellen
+    des Timers. Wiederholte Stufen (z.B. in recommend_many()) werden aufaddiert.
+    """
+
+    __slots__ = ('stages', 'started', '_last')
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.stages = {}
+
+    def mark(self, stage):
+        """Schließt die laufende Stufe unter dem Namen stage ab."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    @property
+    def total(self):
+        """Zeit seit dem Erstellen des Timers bis zum letzten mark() in Sekunden."""
+        return self._last - self.started
+
+
+class _NullTimer:
+    """Timer ohne Wirkung für Aufrufe ohne Zeitmessung."""
+
+    __slots__ = ()
+    stages = {}
+    total = 0.0
+
+    def mark(self, stage):
+        pass
+
+
+NULL_TIMER = _NullTimer()
@@ -1,12 +1,48 @@
+import gzip
 import json
 import argparse
-from pymongo import MongoClient, IndexModel, ASCENDING
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from pymongo import MongoClient, IndexModel, ASCENDING, InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+# Schnellerer JSON-Parser, falls installiert (orjson.JSONDecodeError erbt von json.JSONDecodeError)
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# Füge das Stammverzeichnis zum Python-Pfad hinzu, damit die gemeinsame Normalisierung importiert werden kann
+root_dir = Path(__file__).parent.parent.parent.absolute()
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from model.ingredients import add_base_ingredients, recipe_content_hash
+from model.quantities import add_quantities
 
 class MongoImporter:
-    def __init__(self, input_file, mongo_uri, collection_name):
+    def __init__(self, input_file, mongo_uri, collection_name, batch_size=100, upsert=False,
+                 delta=False, delete_missing=False):
         self.input_file = input_file
         self.mongo_uri = mongo_uri
         self.collection_name = collection_name
+        self.batch_size = batch_size
+        # Upsert-Modus: Collection nicht leeren, sondern Rezepte anhand des Namens ersetzen bzw. einfügen
+        self.upsert = upsert
+        # Delta-Modus: nur neue und geänderte Rezepte schreiben (Vergleich über content_hash)
+        self.delta = delta
+        self.delete_missing = delete_missing
+        self.existing_hashes = {}
+        self.unchanged_count = 0
+        # Ergebnis des letzten read_lines()-Durchlaufs (vollständig gelesen, Dokumente, Parse-Fehler)
+        self.read_complete = False
+        self.read_documents = 0
+        self.read_errors = 0
         self.client = None
         self.db = None
         self.collection = None
@@ -18,9 +54,26 @@ class MongoImporter:
         self.collection = self.db[self.collection_name]
         print(f"Verbunden mit Datenbank 'recipes', Collection '{self.collection_name}'")
         
-        # Erstelle einen Index für das 'name'-Feld für schnellere Duplikat-Erkennung
-        self.collection.create_index([("name", ASCENDING)])
-        print("Index auf 'name'-Feld erstellt")
+        if self.upsert or self.delta:
+            self.create_unique_name_index()
+        elif "name_1" not in self.collection.index_information():
+            # Erstelle einen Index für das 'name'-Feld für schnellere Duplikat-Erkennung
+            # (ein eindeutiger Index aus dem Upsert-Modus erfüllt denselben Zweck)
+            self.collection.create_index([("name", ASCENDING)])
+            print("Index auf 'name'-Feld erstellt")
+
+    def create_unique_name_index(self):
+        """Erstellt einen eindeutigen Index auf 'name' und ersetzt dafür einen bestehenden nicht eindeutigen Index."""
+        existing = self.collection.index_information().get("name_1")
+        if existing is not None and not existing.get("unique"):
+            self.collection.drop_index("name_1")
+            print("Nicht eindeutigen Index auf 'name'-Feld entfernt")
+        try:
+            self.collection.create_index([("name", ASCENDING)], unique=True)
+            print("Eindeutiger Index auf 'name'-Feld erstellt")
+        except Exception as e:
+            print(f"Konnte eindeutigen Index nicht erstellen (doppelte Namen in der Collection?): {e}")
+            raise
 
     def clear_collection(self):
         """Löscht alle vorhandenen Dokumente in der Collection."""
@@ -40,20 +93,33 @@ class MongoImporter:
             except Exception as e2:
                 print(f"Konnte Collection nicht neu erstellen: {e2}")
 
+    def open_input(self):
+        """Öffnet die Eingabedatei, mit gzip komprimierte Dateien (.gz) werden transparent entpackt."""
+        if self.input_file.endswith('.gz'):
+            return gzip.open(self.input_file, 'rt', encoding='utf-8')
+        return open(self.input_file, 'r', encoding='utf-8')
+
     def read_lines(self):
         """Liest die JSON-Lines-Datei und gibt Batches von Datensätzen zurück."""
         batch = []
         line_count = 0
         error_count = 0
+        self.read_complete = False
+        self.read_documents = 0
         
-        with open(self.input_file, 'r', encoding='utf-8') as f:
+        with self.open_input() as f:
             for line in f:
                 line_count += 1
                 if line.strip():  # Ignoriere Leerzeilen
                     try:
-                        data = json.loads(line)
+                        data = json_loads(line)
+                        # Basiszutaten und kanonische Mengen einmalig beim Import berechnen
+                        # (falls Spider bzw. Pipeline sie nicht schon gesetzt haben)
+                        add_base_ingredients(data.get('ingredients'))
+                        add_quantities(data.get('ingredients'))
                         batch.append(data)
-                        if len(batch) >= 100:  # Batch-Größe
+                        self.read_documents += 1
+                        if len(batch) >= self.batch_size:
                             yield batch
                             batch = []
                     except json.JSONDecodeError as e:
@@ -65,6 +131,8 @@ class MongoImporter:
         if batch:
             yield batch
             
+        self.read_errors = error_count
+        self.read_complete = True
         print(f"Datei gelesen: {line_count} Zeilen, {error_count} Fehler")
 
     def check_and_filter_duplicates(self, batch):
@@ -95,29 +163,304 @@ class MongoImporter:
                 duplicates_count += 1
                 continue
             
-            # Prüfe, ob Name mehrfach im Batch vorkommt
-            # Wenn ja, nimm nur das erste Vorkommen
-            if name in [d.get('name') for d in filtered_batch]:
-                duplicates_count += 1
-                continue
-                
-            # Ansonsten füge das Dokument zum gefilterten Batch hinzu
+            # Ansonsten füge das Dokument zum gefilterten Batch hinzu.
+            # Über existing_names wird auch nur das erste Vorkommen im Batch übernommen.
             filtered_batch.append(doc)
-            
-            # Füge den Namen zur Liste der existierenden Namen hinzu
             existing_names.add(name)
             
         return filtered_batch, duplicates_count
 
-    def save_to_mongodb(self):
-        """Hauptmethode zum Import von Daten in MongoDB."""
+    def build_upserts(self, batch, seen_names):
+        """
+        Erstellt ReplaceOne-Operationen (upsert) für einen Batch.
+
+        Pro Name wird nur das erste Vorkommen im gesamten Import übernommen;
+        Dokumente ohne Namen können nicht zugeordnet werden und werden übersprungen.
+
+        Returns:
+            tuple: (Liste der Operationen, Anzahl übersprungener Dokumente)
+        """
+        operations = []
+        skipped = 0
+        updated_at = datetime.now(timezone.utc)
+        for doc in batch:
+            name = doc.get('name')
+            if name is None or name in seen_names:
+                skipped += 1
+                continue
+            seen_names.add(name)
+            # updated_at dient dem inkrementellen Training als Wasserzeichen
+            doc['updated_at'] = updated_at
+            operations.append(ReplaceOne({'name': name}, doc, upsert=True))
+        return operations, skipped
+
+    def load_content_hashes(self):
+        """Lädt Name und Inhalts-Hash aller vorhandenen Rezepte in einem einzigen projizierten Durchlauf."""
+        cursor = self.collection.find({}, {'name': 1, 'content_hash': 1, '_id': 0}, batch_size=10000)
+        self.existing_hashes = {doc['name']: doc.get('content_hash') for doc in cursor if 'name' in doc}
+        self.unchanged_count = 0
+        print(f"{len(self.existing_hashes)} vorhandene Rezepte für den Delta-Abgleich geladen")
+
+    def build_delta(self, batch, seen_names):
+        """
+        Erstellt Schreiboperationen nur für neue und geänderte Rezepte.
+
+        Unveränderte Rezepte (gleicher content_hash) werden gezählt und übersprungen.
+
+        Returns:
+            tuple: (Liste der Operationen, Anzahl übersprungener Duplikate)
+        """
+        operations = []
+        skipped = 0
+        updated_at = datetime.now(timezone.utc)
+        for doc in batch:
+            name = doc.get('name')
+            if name is None or name in seen_names:
+                skipped += 1
+                continue
+            seen_names.add(name)
+
+            doc['content_hash'] = recipe_content_hash(doc)
+            if name in self.existing_hashes:
+                if self.existing_hashes[name] == doc['content_hash']:
+                    self.unchanged_count += 1
+                    continue
+                doc['updated_at'] = updated_at
+                operations.append(ReplaceOne({'name': name}, doc, upsert=True))
+            else:
+                doc['updated_at'] = updated_at
+                operations.append(InsertOne(doc))
+        return operations, skipped
+
+    def input_fully_read(self, stats):
+        """
+        Prüft, ob die Eingabedatei vollständig und fehlerfrei verarbeitet wurde.
+
+        Nur dann enthält seen_names alle Rezepte des Feeds; andernfalls würden
+        nicht gelesene Rezepte als fehlend gelöscht.
+        """
+        if not self.read_complete or self.read_errors:
+            return False
+        # Der parallele Import zählt die vom Leser übernommenen Dokumente mit
+        return stats.get('read', self.read_documents) == self.read_documents
+
+    def delete_missing_recipes(self, seen_names):
+        """Löscht Rezepte, die nicht mehr im Feed enthalten sind, und gibt deren Anzahl zurück."""
+        missing = [name for name in self.existing_hashes if name not in seen_names]
+        deleted = 0
+        for start in range(0, len(missing), self.batch_size):
+            result = self.collection.delete_many({'name': {'$in': missing[start:start + self.batch_size]}})
+            deleted += result.deleted_count
+        return deleted
+
+    def bulk_import(self, build_operations):
+        """
+        Importiert die Daten batchweise mit je einem ungeordneten bulk_write, ohne die Collection zu leeren.
+
+        Args:
+            build_operations (callable): build_operations(batch, seen_names) -> (Operationen, übersprungen).
+        """
+        stats = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        seen_names = set()
+
+        for idx, batch in enumerate(self.read_lines()):
+            operations, skipped = build_operations(batch, seen_names)
+            stats['skipped'] += skipped
+            if not operations:
+                print(f"Batch {idx + 1}: Keine Einträge zu speichern, {skipped} Duplikate übersprungen.")
+                continue
+            try:
+                result = self.collection.bulk_write(operations, ordered=False)
+                inserted = result.inserted_count + result.upserted_count
+                updated = result.matched_count
+            except BulkWriteError as e:
+                details = e.details
+                inserted = details.get('nInserted', 0) + details.get('nUpserted', 0)
+                updated = details.get('nMatched', 0)
+                stats['errors'] += len(details.get('writeErrors', []))
+                print(f"Fehler beim Speichern von Batch {idx + 1}: {len(details.get('writeErrors', []))} Schreibfehler")
+            except Exception as e:
+                stats['errors'] += len(operations)
+                print(f"Fehler beim Speichern von Batch {idx + 1}: {e}")
+                continue
+            stats['inserted'] += inserted
+            stats['updated'] += updated
+            print(f"Batch {idx + 1}: {inserted} eingefügt, {updated} aktualisiert, {skipped} Duplikate übersprungen.")
+
+        print(f"Import abgeschlossen: {stats['inserted']} Dokumente eingefügt, {stats['updated']} aktualisiert, {stats['skipped']} Duplikate übersprungen.")
+        stats['seen_names'] = seen_names
+        return stats
+
+    def build_inserts(self, batch, seen_names):
+        """Erstellt InsertOne-Operationen für einen Batch und überspringt bereits importierte Namen."""
+        operations = []
+        skipped = 0
+        for doc in batch:
+            name = doc.get('name')
+            if name is not None:
+                if name in seen_names:
+                    skipped += 1
+                    continue
+                seen_names.add(name)
+            operations.append(InsertOne(doc))
+        return operations, skipped
+
+    def pipelined_import(self, build_operations, workers=4, queue_size=8):
+        """
+        Importiert die Daten mit überlappendem Lesen und Schreiben.
+
+        Ein Leser-Thread parst die Datei und legt fertige Schreiboperationen in eine
+        begrenzte Queue; ist sie voll, wartet der Leser (Backpressure). workers
+        Schreib-Threads teilen sich den MongoClient (und damit dessen Verbindungspool)
+        und schreiben jeden Batch mit einem ungeordneten bulk_write.
+
+        Args:
+            build_operations (callable): build_operations(batch, seen_names) -> (Operationen, übersprungen).
+            workers (int): Anzahl Schreib-Threads.
+            queue_size (int): Maximale Anzahl wartender Batches.
+        """
+        batches = queue.Queue(maxsize=queue_size)
+        lock = threading.Lock()
+        stats = {'read': 0, 'read_seconds': 0.0, 'written': 0, 'write_seconds': 0.0,
+                 'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        seen_names = set()
+        # Fehler des Leser-Threads, wird nach dem Beenden aller Threads erneut ausgelöst
+        read_errors = []
+
+        def reader():
+            try:
+                started = time.perf_counter()
+                for batch in self.read_lines():
+                    operations, skipped = build_operations(batch, seen_names)
+                    stats['read'] += len(batch)
+                    stats['skipped'] += skipped
+                    stats['read_seconds'] += time.perf_counter() - started
+                    if operations:
+                        batches.put(operations)
+                    started = time.perf_counter()
+            except Exception as e:
+                print(f"Fehler beim Lesen der Eingabedatei: {e}")
+                read_errors.append(e)
+            finally:
+                for _ in range(workers):
+                    batches.put(None)
+
+        def writer():
+            while True:
+                operations = batches.get()
+                if operations is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    result = self.collection.bulk_write(operations, ordered=False)
+                    inserted = result.inserted_count + result.upserted_count
+                    updated = result.matched_count
+                    errors = 0
+                except BulkWriteError as e:
+                    details = e.details
+                    inserted = details.get('nInserted', 0) + details.get('nUpserted', 0)
+                    updated = details.get('nMatched', 0)
+                    errors = len(details.get('writeErrors', []))
+                except Exception as e:
+                    print(f"Fehler beim Speichern eines Batches: {e}")
+                    inserted, updated, errors = 0, 0, len(operations)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    stats['written'] += len(operations)
+                    stats['write_seconds'] += elapsed
+                    stats['inserted'] += inserted
+                    stats['updated'] += updated
+                    stats['errors'] += errors
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=reader, name="import-reader")]
+        threads += [threading.Thread(target=writer, name=f"import-writer-{i}") for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        # Ein abgebrochenes Lesen darf nicht wie ein vollständiger Import aussehen
+        # (im Standardmodus wurde die Collection bereits geleert)
+        if read_errors:
+            raise RuntimeError(
+                f"Import nach {stats['read']} gelesenen Dokumenten abgebrochen "
+                f"({stats['inserted']} eingefügt, {stats['updated']} aktualisiert): {read_errors[0]}"
+            ) from read_errors[0]
+
+        def rate(docs, seconds):
+            return docs / seconds if seconds > 0 else 0.0
+
+        print(f"Import abgeschlossen: {stats['inserted']} Dokumente eingefügt, {stats['updated']} aktualisiert, "
+              f"{stats['skipped']} Duplikate übersprungen, {stats['errors']} Fehler.")
+        print(f"Lesen/Parsen:  {stats['read']} Dokumente in {stats['read_seconds']:.2f}s "
+              f"({rate(stats['read'], stats['read_seconds']):.0f} Dokumente/s)")
+        print(f"Schreiben:     {stats['written']} Dokumente in {stats['write_seconds']:.2f}s über {workers} Worker "
+              f"({rate(stats['written'], stats['write_seconds'] / workers):.0f} Dokumente/s)")
+        print(f"Gesamt:        {elapsed:.2f}s ({rate(stats['read'], elapsed):.0f} Dokumente/s)")
+        stats['seen_names'] = seen_names
+        return stats
+
+    def save_to_mongodb(self, workers=0, summary_file=None):
+        """
+        Hauptmethode zum Import von Daten in MongoDB.
+
+        Args:
+            workers (int): Anzahl Schreib-Threads für den parallelen Import (0 = sequentiell).
+            summary_file (str): Optionaler Pfad für eine JSON-Zusammenfassung des Imports.
+        """
         # Verbindung herstellen
         self.connect()
-        
-        # Collection leeren
-        self.clear_collection()
-        
-        # Daten importieren
+
+        try:
+            if self.delta:
+                self.load_content_hashes()
+                build_operations = self.build_delta
+            elif self.upsert:
+                build_operations = self.build_upserts
+            else:
+                # Collection leeren
+                self.clear_collection()
+                build_operations = self.build_inserts if workers > 0 else None
+
+            if workers > 0:
+                stats = self.pipelined_import(build_operations, workers=workers)
+            elif build_operations is not None:
+                stats = self.bulk_import(build_operations)
+            else:
+                stats = self.insert_batches()
+
+            summary = {
+                'inserted': stats['inserted'],
+                'updated': stats['updated'],
+                'unchanged': self.unchanged_count,
+                'deleted': 0,
+                'skipped': stats['skipped'],
+            }
+            if self.delta:
+                if self.delete_missing and self.input_fully_read(stats):
+                    summary['deleted'] = self.delete_missing_recipes(stats['seen_names'])
+                elif self.delete_missing:
+                    print(f"Löschen übersprungen: Eingabedatei nicht vollständig gelesen "
+                          f"({self.read_documents} Dokumente, {self.read_errors} Parse-Fehler).")
+                print(f"Delta-Import: {summary['inserted']} eingefügt, {summary['updated']} aktualisiert, "
+                      f"{summary['unchanged']} unverändert, {summary['deleted']} gelöscht.")
+                if summary['deleted']:
+                    print("Hinweis: Gelöschte Rezepte werden beim nächsten Training aus dem Modell entfernt.")
+
+            if summary_file:
+                summary['changed'] = summary['inserted'] + summary['updated'] + summary['deleted'] > 0
+                with open(summary_file, 'w', encoding='utf-8') as f:
+                    json.dump(summary, f, indent=2)
+            return summary
+        finally:
+            # Verbindung schließen
+            self.client.close()
+            print("Verbindung geschlossen.")
+
+    def insert_batches(self):
+        """Fügt die Batches nach der Duplikatprüfung einzeln mit insert_many ein (ursprünglicher Modus)."""
         total_inserted = 0
         total_duplicates = 0
         
@@ -140,17 +483,29 @@ class MongoImporter:
                     print(f"Fehler beim Speichern von Batch {idx + 1}: {e}")
         
         print(f"Import abgeschlossen: {total_inserted} Dokumente importiert, {total_duplicates} Duplikate übersprungen.")
-        
-        # Verbindung schließen
-        self.client.close()
-        print("Verbindung geschlossen.")
+        return {'inserted': total_inserted, 'updated': 0, 'skipped': total_duplicates}
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Import JSON Lines into MongoDB")
-    parser.add_argument("-i", "--input", required=True, help="Input JSON Lines file")
+    parser.add_argument("-i", "--input", required=True, help="Input JSON Lines file (.jl or gzip-compressed .jl.gz)")
     parser.add_argument("-u", "--uri", required=True, help="MongoDB URI")
     parser.add_argument("-c", "--collection", required=True, help="MongoDB Collection")
+    parser.add_argument("-b", "--batch-size", type=int, default=100, help="Documents per batch (default: 100)")
+    parser.add_argument("--upsert", action="store_true",
+                        help="Replace/insert recipes by name instead of clearing the collection first")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only write new or changed recipes (compared by content hash)")
+    parser.add_argument("--delete-missing", action="store_true",
+                        help="With --delta: delete recipes that are missing from the input")
+    parser.add_argument("-w", "--workers", type=int, default=0,
+                        help="Writer threads for a pipelined import; 0 imports sequentially (default: 0)")
+    parser.add_argument("--summary", help="Write an import summary (inserted/updated/unchanged/deleted) as JSON")
     args = parser.parse_args()
     
-    importer = MongoImporter(args.input, args.uri, args.collection)
-    importer.save_to_mongodb()
\ No newline at end of file
+    importer = MongoImporter(args.input, args.uri, args.collection, batch_size=args.batch_size, upsert=args.upsert,
+                             delta=args.delta, delete_missing=args.delete_missing)
+    try:
+        importer.save_to_mongodb(workers=args.workers, summary_file=args.summary)
+    except Exception as e:
+        print(f"Import fehlgeschlagen: {e}")
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,210 @@
+# Offline-Benchmark für die Parse-Callbacks des RecipeSpider
+#
+# 1. Einmalig Kategorie- und Rezeptseiten in einen lokalen Korpus speichern:
+#      python replay.py capture --limit 200
+# 2. Gespeicherte Seiten ohne Netzwerk durch parse() und parse_recipe() schicken:
+#      python replay.py bench --repeat 5
+# 3. Extrahierte Rezepte mit einem früheren Export vergleichen (Exit-Code 1 bei Abweichungen):
+#      python replay.py bench --regression output.jl
+#
+# Aus dem Verzeichnis spider/ (neben scrapy.cfg) ausführen.
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.project import get_project_settings
+
+from spider.spiders.getRecipesData import RecipeSpider
+
+CALLBACKS = ("parse", "parse_recipe")
+INDEX_FILE = "index.jsonl"
+
+
+def capture(corpus_dir, start_urls=None, limit=0):
+    """Crawlt mit RecipeSpider und speichert jede Kategorie- und Rezeptseite im Korpus."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    index_path = os.path.join(corpus_dir, INDEX_FILE)
+    seen = set()
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            seen = {json.loads(line)['url'] for line in f if line.strip()}
+
+    index = open(index_path, 'a', encoding='utf-8')
+    captured = 0
+
+    def save_response(response, request, spider):
+        nonlocal captured
+        callback = getattr(request.callback, '__name__', 'parse') if request.callback else 'parse'
+        if callback not in CALLBACKS or response.status != 200 or response.url in seen:
+            return
+        file_name = hashlib.sha1(response.url.encode('utf-8')).hexdigest() + ".html"
+        with open(os.path.join(corpus_dir, file_name), 'wb') as f:
+            f.write(response.body)
+        index.write(json.dumps({'url': response.url, 'callback': callback, 'file': file_name}) + "\n")
+        seen.add(response.url)
+        captured += 1
+
+    settings = get_project_settings()
+    # Seiten direkt vom Server holen und nichts in MongoDB schreiben
+    settings.set("HTTPCACHE_ENABLED", False)
+    settings.set("ITEM_PIPELINES", {})
+    if limit:
+        settings.set("CLOSESPIDER_PAGECOUNT", limit)
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(RecipeSpider)
+    crawler.signals.connect(save_response, signal=signals.response_received)
+    process.crawl(crawler, **({'start_urls': start_urls} if start_urls else {}))
+    try:
+        process.start()
+    finally:
+        index.close()
+    print(f"{captured} Seiten gespeichert in {corpus_dir} ({len(seen)} insgesamt)")
+
+
+def load_corpus(corpus_dir):
+    """Lädt den Korpus als Liste von (url, callback, body)."""
+    pages = []
+    with open(os.path.join(corpus_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                with open(os.path.join(corpus_dir, entry['file']), 'rb') as page:
+                    pages.append((entry['url'], entry['callback'], page.read()))
+    return pages
+
+
+def run_callbacks(spider, pages):
+    """
+    Schickt jede Seite einmal durch ihren Callback.
+
+    Für jede Seite wird eine neue HtmlResponse erzeugt, damit das Parsen des HTML
+    (lxml) in der gemessenen Zeit enthalten ist.
+
+    Returns:
+        tuple: (Zeiten pro Callback in Sekunden, Anzahl Folge-Requests, extrahierte Items)
+    """
+    timings = {callback: 0.0 for callback in CALLBACKS}
+    requests = 0
+    items = []
+    for url, callback, body in pages:
+        response = HtmlResponse(url=url, body=body, encoding='utf-8', request=Request(url))
+        start = time.perf_counter()
+        results = list(getattr(spider, callback)(response))
+        timings[callback] += time.perf_counter() - start
+        for result in results:
+            if isinstance(result, Request):
+                requests += 1
+            else:
+                items.append(dict(result))
+    return timings, requests, items
+
+
+def compare_items(items, reference_file, tolerance=1e-6):
+    """
+    Vergleicht extrahierte Rezepte (Name, Menge, Einheit, Zutat) mit einem früheren Export.
+
+    Returns:
+        list: Beschreibungen der Abweichungen (leer, wenn alles übereinstimmt).
+    """
+    reference = {}
+    with open(reference_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                recipe = json.loads(line)
+                reference[recipe.get('name')] = recipe
+
+    def key(ingredient_obj):
+        return ingredient_obj.get('ingredient'), ingredient_obj.get('unit') or '', ingredient_obj.get('amount')
+
+    def same(a, b):
+        if isinstance(a[2], (int, float)) and isinstance(b[2], (int, float)):
+            return a[:2] == b[:2] and abs(a[2] - b[2]) <= tolerance
+        return a == b
+
+    differences = []
+    compared = 0
+    for item in items:
+        expected = reference.get(item.get('name'))
+        if expected is None:
+            continue
+        compared += 1
+        actual_ingredients = [key(i) for i in item.get('ingredients') or []]
+        expected_ingredients = [key(i) for i in expected.get('ingredients') or []]
+        if len(actual_ingredients) != len(expected_ingredients):
+            differences.append(
+                f"{item['name']}: {len(actual_ingredients)} Zutaten statt {len(expected_ingredients)}"
+            )
+            continue
+        for actual, wanted in zip(actual_ingredients, expected_ingredients):
+            if not same(actual, wanted):
+                differences.append(f"{item['name']}: {actual} statt {wanted}")
+
+    if items and not compared:
+        differences.append(f"Keines der {len(items)} Rezepte ist in {reference_file} enthalten")
+    print(f"Regression: {compared} von {len(items)} Rezepten im Referenzexport gefunden, "
+          f"{len(differences)} Abweichungen")
+    return differences
+
+
+def bench(corpus_dir, repeat=5, regression=None):
+    pages = load_corpus(corpus_dir)
+    if not pages:
+        raise SystemExit(f"Keine Seiten im Korpus {corpus_dir}")
+    spider = RecipeSpider()
+    page_counts = {callback: sum(1 for page in pages if page[1] == callback) for callback in CALLBACKS}
+
+    # Aufwärmen (Imports, kompilierte Selektoren) und Items für den Regressionstest
+    _, requests, items = run_callbacks(spider, pages)
+
+    totals = {callback: 0.0 for callback in CALLBACKS}
+    for _ in range(repeat):
+        timings, _, _ = run_callbacks(spider, pages)
+        for callback, seconds in timings.items():
+            totals[callback] += seconds
+
+    print(f"{len(pages)} Seiten x {repeat}: {len(items)} Rezepte, {requests} Folge-Requests pro Durchlauf")
+    for callback in CALLBACKS:
+        calls = page_counts[callback] * repeat
+        if calls:
+            print(f"  {callback:<13} {calls:>6} Aufrufe, {totals[callback] / calls * 1000:8.3f} ms/Seite, "
+                  f"{totals[callback]:.3f} s gesamt")
+    total_seconds = sum(totals.values())
+    if total_seconds:
+        print(f"  {len(items) * repeat / total_seconds:,.0f} Items/s, {len(pages) * repeat / total_seconds:,.0f} Seiten/s")
+
+    if regression:
+        differences = compare_items(items, regression)
+        for difference in differences[:50]:
+            print(f"  {difference}")
+        if differences:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capture recipe pages once and replay them through the spider callbacks")
+    parser.add_argument("-d", "--corpus", default="fixtures/pages",
+                        help="Directory of the captured pages (default: fixtures/pages)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    capture_parser = subparsers.add_parser("capture", help="Crawl the site and store category and recipe pages")
+    capture_parser.add_argument("--start-urls", help="Other category pages (comma separated)")
+    capture_parser.add_argument("--limit", type=int, default=0, help="Stop after this many responses (default: no limit)")
+
+    bench_parser = subparsers.add_parser("bench", help="Replay the stored pages through parse and parse_recipe")
+    bench_parser.add_argument("-r", "--repeat", type=int, default=5, help="Timed passes over the corpus (default: 5)")
+    bench_parser.add_argument("--regression", metavar="OUTPUT_JL",
+                              help="Compare the extracted recipes with a previous export, e.g. output.jl")
+
+    args = parser.parse_args()
+    if args.command == "capture":
+        capture(args.corpus, start_urls=args.start_urls, limit=args.limit)
+    else:
+        bench(args.corpus, repeat=args.repeat, regression=args.regression)
@@ -3,7 +3,15 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import hashlib
+import re
+import time
+
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.extensions.httpcache import rfc1123_to_epoch
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.misc import load_object
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
@@ -101,3 +109,226 @@ class SpiderDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class IncrementalCachePolicy:
+    """
+    Cache-Policy für inkrementelles Crawlen (HTTPCACHE_POLICY).
+
+    Baut auf der HttpCacheMiddleware und deren persistentem Speicher auf, der pro
+    URL Header (ETag, Last-Modified) und Inhalt aufbewahrt:
+
+    - Rezeptseiten (INCREMENTAL_RECIPE_URL_PATTERN), die vor weniger als
+      INCREMENTAL_RECIPE_MAX_AGE Sekunden geladen wurden, gelten ohne Anfrage als unverändert.
+    - Alle anderen Seiten werden mit einer bedingten Anfrage (If-None-Match /
+      If-Modified-Since) revalidiert.
+    - Eine Antwort 304 oder eine 200-Antwort mit gleichem Inhalts-Hash gilt als
+      unverändert; die Middleware liefert dann die gespeicherte Antwort mit dem
+      Flag 'cached', das der Spider zum Überspringen von parse_recipe nutzt.
+    """
+
+    def __init__(self, settings):
+        self.ignore_schemes = settings.getlist("HTTPCACHE_IGNORE_SCHEMES")
+        self.ignore_http_codes = [int(code) for code in settings.getlist("HTTPCACHE_IGNORE_HTTP_CODES")]
+        self.recipe_pattern = re.compile(settings.get("INCREMENTAL_RECIPE_URL_PATTERN", r"/rezepte-kochideen/rezepte/"))
+        self.recipe_max_age = settings.getfloat("INCREMENTAL_RECIPE_MAX_AGE", 0)
+
+    def should_cache_request(self, request):
+        return urlparse_cached(request).scheme not in self.ignore_schemes
+
+    def should_cache_response(self, response, request):
+        return response.status == 200 and response.status not in self.ignore_http_codes
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        if self.recipe_max_age and self.recipe_pattern.search(request.url):
+            fetched_at = rfc1123_to_epoch(cachedresponse.headers.get(b"Date"))
+            if fetched_at is not None and time.time() - fetched_at < self.recipe_max_age:
+                return True
+
+        # Bedingte Anfrage: der Server antwortet mit 304, falls sich nichts geändert hat
+        etag = cachedresponse.headers.get(b"ETag")
+        if etag:
+            request.headers[b"If-None-Match"] = etag
+        last_modified = cachedresponse.headers.get(b"Last-Modified")
+        if last_modified:
+            request.headers[b"If-Modified-Since"] = last_modified
+        return False
+
+    def is_cached_response_valid(self, cachedresponse, response, request):
+        if response.status == 304:
+            return True
+        if response.status == 200:
+            # Server ohne Validatoren: Inhalt vergleichen
+            return hashlib.sha256(response.body).digest() == hashlib.sha256(cachedresponse.body).digest()
+        # Bei Serverfehlern die gespeicherte Version weiterverwenden
+        return response.status >= 500
+
+
+class AdaptiveRateMiddleware:
+    """
+    Downloader-Middleware, die Verzögerung und Parallelität pro Download-Slot
+    anhand der beobachteten Antwortzeiten und Fehlerraten anpasst.
+
+    Solange ein Slot eine Verzögerung hat, sendet Scrapy nur eine Anfrage pro
+    Verzögerung; eine höhere Parallelität allein bringt dann nichts. Wie bei
+    AutoThrottle wird die Verzögerung daher aus der Parallelität abgeleitet:
+    Zielverzögerung = geglättete Antwortzeit / Parallelität, d.h. im Mittel sind
+    so viele Anfragen gleichzeitig unterwegs, wie die Parallelität angibt.
+
+    - Antworten 429/503 sowie Download- und Verbindungsfehler (RETRY_EXCEPTIONS,
+      z.B. Timeouts) verdoppeln die Verzögerung (Retry-After wird berücksichtigt)
+      und setzen die Parallelität auf 1 zurück. Andere Ausnahmen, etwa
+      IgnoreRequest von RobotsTxtMiddleware oder HttpCacheMiddleware, ändern nichts.
+    - Liegt die geglättete Antwortzeit über ADAPTIVE_TARGET_LATENCY, sinkt die Parallelität.
+    - Nach ADAPTIVE_SUCCESS_WINDOW erfolgreichen, schnellen Antworten steigt die
+      Parallelität um eins.
+    - Die Verzögerung nähert sich nach jeder Antwort der Zielverzögerung an
+      (Mittelwert aus bisheriger und Zielverzögerung); Fehlerantworten dürfen
+      sie nur erhöhen.
+
+    Verzögerung und Parallelität bleiben immer innerhalb von ADAPTIVE_MIN_DELAY..
+    ADAPTIVE_MAX_DELAY bzw. 1..ADAPTIVE_MAX_CONCURRENCY; ADAPTIVE_MIN_DELAY begrenzt
+    damit den Durchsatz auf 1 / ADAPTIVE_MIN_DELAY Seiten pro Sekunde und Slot.
+    robots.txt wird weiterhin von der RobotsTxtMiddleware beachtet. Beim Schließen
+    des Spiders wird eine Zusammenfassung (Seiten/min, Bytes, Latenz-Perzentile,
+    Wiederholungen) ausgegeben.
+    """
+
+    BACKOFF_STATUS = (429, 503)
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool("ADAPTIVE_RATE_ENABLED"):
+            raise NotConfigured
+        self.crawler = crawler
+        self.min_delay = settings.getfloat("ADAPTIVE_MIN_DELAY", 0.25)
+        self.max_delay = settings.getfloat("ADAPTIVE_MAX_DELAY", 30.0)
+        self.max_concurrency = settings.getint("ADAPTIVE_MAX_CONCURRENCY", 4)
+        self.target_latency = settings.getfloat("ADAPTIVE_TARGET_LATENCY", 1.0)
+        self.success_window = settings.getint("ADAPTIVE_SUCCESS_WINDOW", 20)
+        self.start_delay = min(max(settings.getfloat("DOWNLOAD_DELAY"), self.min_delay), self.max_delay)
+        # Dieselben Netzwerkfehler, die Scrapy wiederholt
+        self.backoff_exceptions = tuple(
+            load_object(exception) if isinstance(exception, str) else exception
+            for exception in settings.getlist("RETRY_EXCEPTIONS")
+        )
+        self.slots = {}
+        self.latencies = []
+        self.backoffs = 0
+        self.started_at = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler)
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        self.started_at = time.monotonic()
+
+    def _state(self, request):
+        """Gibt (Downloader-Slot, Regelzustand) für den Slot der Anfrage zurück."""
+        downloader = self.crawler.engine.downloader
+        key = downloader.get_slot_key(request)
+        slot = downloader.slots.get(key)
+        state = self.slots.setdefault(key, {
+            "delay": self.start_delay, "concurrency": 1, "latency": None, "successes": 0,
+        })
+        return slot, state
+
+    def _apply(self, slot, state):
+        state["delay"] = min(max(state["delay"], self.min_delay), self.max_delay)
+        state["concurrency"] = min(max(state["concurrency"], 1), self.max_concurrency)
+        if slot is not None:
+            slot.delay = state["delay"]
+            slot.concurrency = state["concurrency"]
+
+    def _backoff(self, slot, state, retry_after=None):
+        self.backoffs += 1
+        state["delay"] = max(state["delay"] * 2, retry_after or 0)
+        state["concurrency"] = 1
+        state["successes"] = 0
+        self._apply(slot, state)
+
+    def process_request(self, request, spider):
+        slot, state = self._state(request)
+        self._apply(slot, state)
+        return None
+
+    def process_response(self, request, response, spider):
+        latency = request.meta.get("download_latency")
+        if latency is None:
+            # Antwort aus dem HTTP-Cache ohne Netzwerkzugriff
+            return response
+        slot, state = self._state(request)
+        self.latencies.append(latency)
+
+        if response.status in self.BACKOFF_STATUS:
+            retry_after = response.headers.get(b"Retry-After")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            self._backoff(slot, state, retry_after)
+            return response
+
+        # Geglättete Antwortzeit (exponentieller gleitender Mittelwert)
+        state["latency"] = latency if state["latency"] is None else 0.8 * state["latency"] + 0.2 * latency
+        if state["latency"] > self.target_latency:
+            state["concurrency"] -= 1
+            state["successes"] = 0
+        else:
+            state["successes"] += 1
+            if state["successes"] >= self.success_window:
+                state["successes"] = 0
+                state["concurrency"] += 1
+        state["concurrency"] = min(max(state["concurrency"], 1), self.max_concurrency)
+
+        # Verzögerung so wählen, dass im Mittel concurrency Anfragen unterwegs sind
+        target_delay = state["latency"] / state["concurrency"]
+        new_delay = (state["delay"] + target_delay) / 2
+        if response.status >= 400:
+            new_delay = max(new_delay, state["delay"])
+        state["delay"] = new_delay
+        self._apply(slot, state)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        # process_exception() erhält auch Ausnahmen aus process_request() anderer
+        # Middlewares (z.B. IgnoreRequest für robots.txt); diese betreffen den Server nicht
+        if isinstance(exception, IgnoreRequest) or not isinstance(exception, self.backoff_exceptions):
+            return None
+        slot, state = self._state(request)
+        self._backoff(slot, state)
+        return None
+
+    def spider_closed(self, spider):
+        stats = self.crawler.stats
+        elapsed_minutes = (time.monotonic() - self.started_at) / 60 if self.started_at else 0
+        responses = stats.get_value("downloader/response_count", 0)
+        latencies = sorted(self.latencies)
+
+        def percentile(q):
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)] if latencies else 0.0
+
+        summary = {
+            "pages_per_minute": responses / elapsed_minutes if elapsed_minutes else 0.0,
+            "response_bytes": stats.get_value("downloader/response_bytes", 0),
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+            "latency_p99": percentile(0.99),
+            "retries": stats.get_value("retry/count", 0),
+            "backoffs": self.backoffs,
+        }
+        for key, value in summary.items():
+            stats.set_value(f"adaptive/{key}", value)
+        spider.logger.info(
+            f"Crawl-Statistik: {summary['pages_per_minute']:.1f} Seiten/min, {summary['response_bytes']} Bytes, "
+            f"Latenz p50/p95/p99 {summary['latency_p50']:.2f}/{summary['latency_p95']:.2f}/{summary['latency_p99']:.2f}s, "
+            f"{summary['retries']} Wiederholungen, {summary['backoffs']} Drosselungen"
+        )
+        for key, state in self.slots.items():
+            spider.logger.info(
+                f"Slot {key}: Verzögerung {state['delay']:.2f}s, Parallelität {state['concurrency']}"
+            )
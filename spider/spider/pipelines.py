@@ -3,11 +3,168 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from pymongo import MongoClient, ASCENDING, InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+# Füge das Stammverzeichnis zum Python-Pfad hinzu, damit die gemeinsame Normalisierung importiert werden kann
+root_dir = Path(__file__).parent.parent.parent.absolute()
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from model.ingredients import add_base_ingredients, recipe_content_hash
 
 
 class SpiderPipeline:
     def process_item(self, item, spider):
         return item
+
+
+class BaseIngredientPipeline:
+    """Speichert zu jeder Zutat die normalisierte Basiszutat ('base_ingredient')."""
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        add_base_ingredients(adapter.get('ingredients'))
+        return item
+
+
+class MongoPipeline:
+    """
+    Schreibt Rezepte direkt während des Crawls in MongoDB.
+
+    Items werden gepuffert und per ungeordnetem bulk_write geschrieben, sobald
+    MONGO_BATCH_SIZE Items anstehen oder MONGO_FLUSH_INTERVAL Sekunden vergangen
+    sind, spätestens beim Schließen des Spiders. Wie beim Delta-Import
+    (mongo_import.py --delta) werden unveränderte Rezepte anhand des
+    content_hash übersprungen. Ohne MONGO_URI ist die Pipeline deaktiviert.
+    """
+
+    def __init__(self, mongo_uri, database, collection, batch_size=500, flush_interval=5.0, summary_file=None):
+        self.mongo_uri = mongo_uri
+        self.database = database
+        self.collection_name = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.summary_file = summary_file
+        self.client = None
+        self.collection = None
+        self.existing_hashes = {}
+        self.seen_names = set()
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.flush_loop = None
+        self.stats = None
+        self.counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'skipped': 0, 'errors': 0}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.get('MONGO_URI'):
+            raise NotConfigured("MONGO_URI nicht gesetzt")
+        pipeline = cls(
+            mongo_uri=settings.get('MONGO_URI'),
+            database=settings.get('MONGO_DATABASE', 'recipes'),
+            collection=settings.get('MONGO_COLLECTION', 'tracks'),
+            batch_size=settings.getint('MONGO_BATCH_SIZE', 500),
+            flush_interval=settings.getfloat('MONGO_FLUSH_INTERVAL', 5.0),
+            summary_file=settings.get('MONGO_SUMMARY_FILE'),
+        )
+        pipeline.stats = crawler.stats
+        return pipeline
+
+    def open_spider(self, spider):
+        self.client = MongoClient(self.mongo_uri)
+        self.collection = self.client[self.database][self.collection_name]
+
+        # Eindeutiger Name wie im Upsert-Modus von mongo_import.py
+        existing = self.collection.index_information().get("name_1")
+        if existing is not None and not existing.get("unique"):
+            self.collection.drop_index("name_1")
+        self.collection.create_index([("name", ASCENDING)], unique=True)
+
+        cursor = self.collection.find({}, {'name': 1, 'content_hash': 1, '_id': 0}, batch_size=10000)
+        self.existing_hashes = {doc['name']: doc.get('content_hash') for doc in cursor if 'name' in doc}
+        spider.logger.info(f"MongoPipeline: {len(self.existing_hashes)} vorhandene Rezepte geladen")
+
+        # Zeitgesteuertes Schreiben, auch wenn nur wenige Items anfallen
+        if self.flush_interval > 0:
+            self.flush_loop = task.LoopingCall(self.flush_if_due, spider)
+            self.flush_loop.start(self.flush_interval, now=False)
+
+    def process_item(self, item, spider):
+        doc = ItemAdapter(item).asdict()
+        name = doc.get('name')
+        if name is None or name in self.seen_names:
+            self.counts['skipped'] += 1
+            return item
+        self.seen_names.add(name)
+
+        add_base_ingredients(doc.get('ingredients'))
+        doc['content_hash'] = recipe_content_hash(doc)
+        if self.existing_hashes.get(name) == doc['content_hash']:
+            self.counts['unchanged'] += 1
+            return item
+
+        doc['updated_at'] = datetime.now(timezone.utc)
+        if name in self.existing_hashes:
+            self.buffer.append(ReplaceOne({'name': name}, doc, upsert=True))
+        else:
+            self.buffer.append(InsertOne(doc))
+
+        if len(self.buffer) >= self.batch_size:
+            self.flush(spider)
+        return item
+
+    def flush_if_due(self, spider):
+        if self.buffer and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush(spider)
+
+    def flush(self, spider):
+        """Schreibt alle gepufferten Operationen mit einem ungeordneten bulk_write."""
+        operations, self.buffer = self.buffer, []
+        self.last_flush = time.monotonic()
+        if not operations:
+            return
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            self.counts['inserted'] += result.inserted_count + result.upserted_count
+            self.counts['updated'] += result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            self.counts['inserted'] += details.get('nInserted', 0) + details.get('nUpserted', 0)
+            self.counts['updated'] += details.get('nMatched', 0)
+            self.counts['errors'] += len(details.get('writeErrors', []))
+            spider.logger.error(f"MongoPipeline: {len(details.get('writeErrors', []))} Schreibfehler")
+        except Exception as e:
+            self.counts['errors'] += len(operations)
+            spider.logger.error(f"MongoPipeline: Fehler beim Schreiben von {len(operations)} Rezepten: {e}")
+        spider.logger.debug(f"MongoPipeline: {len(operations)} Rezepte geschrieben")
+
+    def close_spider(self, spider):
+        if self.flush_loop is not None and self.flush_loop.running:
+            self.flush_loop.stop()
+        try:
+            self.flush(spider)
+        finally:
+            self.client.close()
+
+        for key, value in self.counts.items():
+            self.stats.set_value(f'mongo/{key}', value)
+        spider.logger.info(
+            f"MongoPipeline: {self.counts['inserted']} eingefügt, {self.counts['updated']} aktualisiert, "
+            f"{self.counts['unchanged']} unverändert, {self.counts['errors']} Fehler"
+        )
+        if self.summary_file:
+            summary = dict(self.counts, changed=self.counts['inserted'] + self.counts['updated'] > 0)
+            with open(self.summary_file, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
@@ -7,6 +7,8 @@
 #     https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 #     https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import os
+
 BOT_NAME = "spider"
 
 SPIDER_MODULES = ["spider.spiders"]
@@ -25,6 +27,7 @@ ROBOTSTXT_OBEY = True
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
 # See also autothrottle settings and docs
+# Startwert, wird von der AdaptiveRateMiddleware angepasst
 DOWNLOAD_DELAY = 2
 # The download delay setting will honor only one of:
 #CONCURRENT_REQUESTS_PER_DOMAIN = 16
@@ -50,9 +53,21 @@ DOWNLOAD_DELAY = 2
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "spider.middlewares.SpiderDownloaderMiddleware": 543,
-#}
+# AdaptiveRateMiddleware liegt vor dem HttpCacheMiddleware (900), damit sie
+# die echten Netzwerkantworten (inkl. 304/429) sieht
+DOWNLOADER_MIDDLEWARES = {
+    "spider.middlewares.AdaptiveRateMiddleware": 950,
+}
+
+# Adaptive Crawl-Rate: Verzögerung und Parallelität pro Domain innerhalb dieser Grenzen.
+# Die Verzögerung folgt Antwortzeit / Parallelität (wie AutoThrottle), ADAPTIVE_MIN_DELAY
+# begrenzt den Durchsatz auf höchstens 1 / ADAPTIVE_MIN_DELAY Seiten pro Sekunde.
+ADAPTIVE_RATE_ENABLED = True
+ADAPTIVE_MIN_DELAY = 0.25
+ADAPTIVE_MAX_DELAY = 30.0
+ADAPTIVE_MAX_CONCURRENCY = 4
+ADAPTIVE_TARGET_LATENCY = 1.0
+ADAPTIVE_SUCCESS_WINDOW = 20
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -63,9 +78,18 @@ DOWNLOAD_DELAY = 2
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
-    "scrapy.pipelines.files.FilesPipeline": 300,
+    "spider.pipelines.BaseIngredientPipeline": 300,
+    "spider.pipelines.MongoPipeline": 400,
 }
-FILES_STORE = 'downloads'
+
+# MongoDB-Pipeline: schreibt Rezepte während des Crawls gebündelt in die Datenbank.
+# Ohne MONGO_URI (bzw. Umgebungsvariable MONGODB_URI) ist sie deaktiviert;
+# der JSONL-Export (-o output.jl) bleibt davon unabhängig optional.
+MONGO_URI = os.environ.get("MONGODB_URI")
+MONGO_DATABASE = "recipes"
+MONGO_COLLECTION = "tracks"
+MONGO_BATCH_SIZE = 500
+MONGO_FLUSH_INTERVAL = 5.0
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -82,11 +106,19 @@ FILES_STORE = 'downloads'
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-#HTTPCACHE_ENABLED = True
-#HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = "httpcache"
-#HTTPCACHE_IGNORE_HTTP_CODES = []
-#HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+# Inkrementelles Crawlen: der Cache (.scrapy/httpcache) bleibt zwischen Läufen erhalten,
+# unveränderte Seiten werden per bedingter Anfrage erkannt und nicht erneut geparst.
+# Vollständiger Crawl: scrapy crawl recipe_spider -s HTTPCACHE_ENABLED=0
+HTTPCACHE_ENABLED = True
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_IGNORE_HTTP_CODES = []
+HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_POLICY = "spider.middlewares.IncrementalCachePolicy"
+HTTPCACHE_GZIP = True
+# Rezeptseiten, die vor weniger als dieser Anzahl Sekunden geladen wurden, werden gar nicht angefragt
+INCREMENTAL_RECIPE_MAX_AGE = 7 * 24 * 3600
+INCREMENTAL_RECIPE_URL_PATTERN = r"/rezepte-kochideen/rezepte/"
 
 # Set settings whose default value is deprecated to a future-proof value
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
@@ -1,32 +1,26 @@
 import scrapy
-import re
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
 from ..items import SpiderItem
 
-class RecipeSpider(scrapy.Spider):
-    name = "recipe_spider"
-    allowed_domains = ["swissmilk.ch"]
-    start_urls = [
-        "https://www.swissmilk.ch/de/rezepte-kochideen/grundrezepte/",
-        "https://www.swissmilk.ch/de/rezepte-kochideen/low-carb/",
-        "https://www.swissmilk.ch/de/rezepte-kochideen/hauptgaenge/",
-        "https://www.swissmilk.ch/de/rezepte-kochideen/vegetarisch/"
+# Füge das Stammverzeichnis zum Python-Pfad hinzu, damit der gemeinsame Mengenparser importiert werden kann
+root_dir = Path(__file__).parent.parent.parent.parent.absolute()
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
 
-    ]
+from model.quantities import parse_quantity
+
+class RecipeParserMixin:
+    """Parsen einzelner Rezeptseiten; gemeinsam genutzt von RecipeSpider und RecipeSitemapSpider."""
 
-    def parse(self, response):
-        # Extrahieren Sie alle Rezept-Links von der Kategorie-Seite
-        recipe_links = response.css('a[href*="/rezepte-kochideen/rezepte/"]::attr(href)').getall()
-        for link in recipe_links:
-            if link.startswith('/'):
-                link = response.urljoin(link)
-            yield response.follow(link, self.parse_recipe)
-        
-        # Überprüfen Sie auf Pagination, falls vorhanden
-        next_page = response.css('a.next::attr(href)').get()
-        if next_page is not None:
-            yield response.follow(next_page, self.parse)
-    
     def parse_recipe(self, response):
+        # Inkrementelles Crawlen: unveränderte Seiten stammen aus dem HTTP-Cache
+        # (siehe IncrementalCachePolicy) und wurden bereits in einem früheren Lauf exportiert
+        if 'cached' in response.flags:
+            self.crawler.stats.inc_value('incremental/unchanged_recipes')
+            return
+
         # Erstelle ein neues RecipeItem
         item = SpiderItem()
         
@@ -51,58 +45,49 @@ class RecipeSpider(scrapy.Spider):
     def parse_ingredient(self, amount_text, ingredient_text):
         """
         Parse amount and unit from amount_text and separate them.
-        Example: "200 g" -> {"amount": 200, "unit": "g", "ingredient": "Mehl"}
+        Example: "200 g" -> {"amount": 200.0, "unit": "g", "ingredient": "Mehl",
+                             "canonical_amount": 200.0, "canonical_unit": "g"}
         """
-        # Regulärer Ausdruck, um Menge und Einheit zu trennen
-        # Sucht nach Zahlen (auch mit Komma/Punkt) und optionalen Brüchen (½, ¼, etc.)
-        # gefolgt von einer optionalen Einheit
-        pattern = r'((?:\d+(?:[.,]\d+)?(?:\s*-\s*\d+(?:[.,]\d+)?)?|\d*[¼½¾](?:\s*-\s*\d*[¼½¾])?))\s*([a-zA-ZäöüÄÖÜß]+\.?)?'
-        match = re.match(pattern, amount_text)
-        
-        if match:
-            amount_str, unit = match.groups()
-            amount_str = amount_str.strip() if amount_str else ""
-            unit = unit.strip() if unit else ""
-            
-            # Konvertiere Bruchzahlen in Dezimalzahlen
-            amount = None
-            try:
-                # Versuche, direkt als Zahl zu parsen
-                amount = float(amount_str.replace(',', '.'))
-            except ValueError:
-                # Spezielle Behandlung für Brüche
-                if '¼' in amount_str:
-                    amount_str = amount_str.replace('¼', '.25')
-                if '½' in amount_str:
-                    amount_str = amount_str.replace('½', '.5')
-                if '¾' in amount_str:
-                    amount_str = amount_str.replace('¾', '.75')
-                
-                # Bereich wie "1-2" -> Nehme den Mittelwert
-                if '-' in amount_str:
-                    parts = amount_str.split('-')
-                    if len(parts) == 2:
-                        try:
-                            min_val = float(parts[0].strip().replace(',', '.'))
-                            max_val = float(parts[1].strip().replace(',', '.'))
-                            amount = (min_val + max_val) / 2
-                        except ValueError:
-                            pass
-                
-                # Falls immer noch kein Wert, versuche erneut zu parsen
-                if amount is None:
-                    try:
-                        amount = float(amount_str.replace(',', '.'))
-                    except ValueError:
-                        # Wenn alles fehlschlägt, behalte den ursprünglichen String
-                        amount = amount_str
-        else:
-            # Wenn keine Übereinstimmung gefunden wird, behalte den ursprünglichen Text
-            amount = amount_text
-            unit = ""
-        
+        # Gemeinsamer Parser (model/quantities.py): Brüche, Bereiche (Mittelwert) und
+        # Umrechnung in g, ml oder Stück
+        quantity = parse_quantity(amount_text)
         return {
-            "amount": amount,
-            "unit": unit,
-            "ingredient": ingredient_text
-        }
\ No newline at end of file
+            "amount": quantity.amount,
+            "unit": quantity.unit,
+            "ingredient": ingredient_text,
+            "canonical_amount": quantity.canonical_amount,
+            "canonical_unit": quantity.canonical_unit,
+        }
+
+
+class RecipeSpider(RecipeParserMixin, scrapy.Spider):
+    name = "recipe_spider"
+    allowed_domains = ["swissmilk.ch"]
+    start_urls = [
+        "https://www.swissmilk.ch/de/rezepte-kochideen/grundrezepte/",
+        "https://www.swissmilk.ch/de/rezepte-kochideen/low-carb/",
+        "https://www.swissmilk.ch/de/rezepte-kochideen/hauptgaenge/",
+        "https://www.swissmilk.ch/de/rezepte-kochideen/vegetarisch/"
+
+    ]
+
+    def __init__(self, start_urls=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Optional andere Startseiten (kommagetrennt), z.B. ein lokaler Server mit gespeicherten Seiten:
+        # scrapy crawl recipe_spider -a start_urls=http://localhost:8000/de/rezepte-kochideen/grundrezepte/
+        if start_urls:
+            self.start_urls = [url.strip() for url in start_urls.split(',') if url.strip()]
+            self.allowed_domains = sorted({urlparse(url).hostname for url in self.start_urls})
+
+    def parse(self, response):
+        # Extrahieren Sie alle Rezept-Links von der Kategorie-Seite
+        recipe_links = response.css('a[href*="/rezepte-kochideen/rezepte/"]::attr(href)').getall()
+        for link in recipe_links:
+            if link.startswith('/'):
+                link = response.urljoin(link)
+            yield response.follow(link, self.parse_recipe)
+        
+        # Überprüfen Sie auf Pagination, falls vorhanden
+        next_page = response.css('a.next::attr(href)').get()
+        if next_page is not None:
+            yield response.follow(next_page, self.parse)
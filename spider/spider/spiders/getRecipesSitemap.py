@@ -0,0 +1,108 @@
+import json
+import os
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from scrapy import signals
+from scrapy.spiders import SitemapSpider
+from scrapy.utils.project import data_path
+
+from .getRecipesData import RecipeParserMixin
+
+class RecipeSitemapSpider(RecipeParserMixin, SitemapSpider):
+    """
+    Findet Rezepte über die Sitemap statt über die Kategorieseiten.
+
+    Angefragt werden nur Rezept-URLs, deren <lastmod> nach dem letzten
+    erfolgreichen Crawl liegt (bzw. Einträge ohne <lastmod>). Der Zeitpunkt
+    wird nach einem vollständig und fehlerfrei beendeten Lauf in
+    SITEMAP_STATE_FILE gespeichert (siehe ERROR_STATS).
+
+    Argumente:
+        -a sitemap_urls=...   Andere Sitemaps bzw. robots.txt (kommagetrennt)
+        -a since=2025-01-31   Nur Rezepte, die nach diesem Zeitpunkt geändert wurden
+        -a full=1             Alle Rezepte der Sitemap anfragen
+    """
+    name = "recipe_sitemap_spider"
+    allowed_domains = ["swissmilk.ch"]
+    # Die Sitemaps werden aus der robots.txt gelesen
+    sitemap_urls = ["https://www.swissmilk.ch/robots.txt"]
+    sitemap_rules = [
+        (r"/de/rezepte-kochideen/rezepte/", "parse_recipe"),
+    ]
+    custom_settings = {
+        # <lastmod> entscheidet über neue Anfragen; geänderte Seiten immer revalidieren
+        "INCREMENTAL_RECIPE_MAX_AGE": 0,
+    }
+    # Statistiken, die auf nicht gespeicherte Rezepte hinweisen: Verbindungsfehler,
+    # Antworten außerhalb 2xx (auch nach Wiederholungen), Fehler beim Parsen und
+    # Schreibfehler der MongoPipeline. Ist einer davon > 0, bleibt der Zeitpunkt
+    # des letzten Crawls unverändert und der nächste Lauf fragt die Rezepte erneut an.
+    ERROR_STATS = (
+        "downloader/exception_count",
+        "httperror/response_ignored_count",
+        "spider_exceptions/count",
+        "mongo/errors",
+    )
+
+    def __init__(self, sitemap_urls=None, since=None, full=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if sitemap_urls:
+            self.sitemap_urls = [url.strip() for url in sitemap_urls.split(',') if url.strip()]
+            self.allowed_domains = sorted({urlparse(url).hostname for url in self.sitemap_urls})
+        self.since_arg = since
+        self.full = bool(full)
+        self.since = None
+        self.started_at = datetime.now(timezone.utc)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.state_file = crawler.settings.get("SITEMAP_STATE_FILE") or data_path("sitemap_state.json", createdir=True)
+        if not spider.full:
+            spider.since = parse_lastmod(spider.since_arg) if spider.since_arg else spider.load_last_crawl()
+        crawler.signals.connect(spider.save_last_crawl, signal=signals.spider_closed)
+        return spider
+
+    def load_last_crawl(self):
+        """Liest den Zeitpunkt des letzten erfolgreichen Crawls (oder None)."""
+        if not os.path.exists(self.state_file):
+            return None
+        with open(self.state_file, 'r', encoding='utf-8') as f:
+            return parse_lastmod(json.load(f).get('last_crawl'))
+
+    def save_last_crawl(self, spider, reason):
+        """Speichert den Startzeitpunkt dieses Laufs, falls er vollständig und ohne Fehler beendet wurde."""
+        if reason != 'finished':
+            self.logger.info(f"Crawl nicht vollständig ({reason}), Zeitpunkt des letzten Crawls bleibt unverändert")
+            return
+        stats = self.crawler.stats
+        errors = {key: stats.get_value(key) for key in self.ERROR_STATS if stats.get_value(key, 0)}
+        if errors:
+            self.logger.warning(f"Crawl mit Fehlern beendet ({errors}), Zeitpunkt des letzten Crawls bleibt unverändert")
+            return
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump({'last_crawl': self.started_at.isoformat()}, f)
+
+    def sitemap_filter(self, entries):
+        """Lässt nur Einträge durch, die seit dem letzten Crawl geändert wurden."""
+        for entry in entries:
+            lastmod = parse_lastmod(entry.get('lastmod'))
+            if self.since is not None and lastmod is not None and lastmod <= self.since:
+                self.crawler.stats.inc_value('sitemap/unchanged')
+                continue
+            self.crawler.stats.inc_value('sitemap/selected')
+            yield entry
+
+
+def parse_lastmod(value):
+    """Wandelt einen W3C-Zeitstempel (<lastmod>) in ein datetime in UTC um; None, falls ungültig."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
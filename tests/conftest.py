@@ -0,0 +1,56 @@
+# tests/conftest.py
+# Gemeinsame Fixtures: ein offline (ohne MongoDB) trainiertes Modell auf spider/output.jl
+
+import json
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+from bson import ObjectId
+
+# Stammverzeichnis zum Python-Pfad hinzufügen, damit model/ und backend/ importierbar sind
+root_dir = Path(__file__).parent.parent.absolute()
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from benchmarks.corpus import CorpusGenerator
+from model.recipe_model import RecipeRecommender
+
+SOURCE_FILE = root_dir / 'spider' / 'output.jl'
+
+
+def read_documents(path=SOURCE_FILE):
+    """Liest den Scrapy-Export als Rezeptdokumente mit _id (wie nach dem Import in MongoDB)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [{'_id': ObjectId(), **json.loads(line)} for line in f if line.strip()]
+
+
+def train_model(documents):
+    model = RecipeRecommender('mongodb://offline')
+    # load_documents() ergänzt base_ingredient in place, daher Kopien der Zutatenlisten
+    model.load_documents({**doc, 'ingredients': [dict(i) for i in doc['ingredients']]} for doc in documents)
+    return model.preprocess_data()
+
+
+@pytest.fixture(scope='session', autouse=True)
+def quiet_logging():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture(scope='session')
+def documents():
+    return read_documents()
+
+
+@pytest.fixture(scope='session')
+def model(documents):
+    return train_model(documents)
+
+
+@pytest.fixture(scope='session')
+def queries():
+    generated = CorpusGenerator(str(SOURCE_FILE), seed=7).queries(300, min_ingredients=1, max_ingredients=6)
+    return generated + [['Tomaten', 'Zwiebeln'], ['Salz'], ['unbekannte zutat'], []]
@@ -0,0 +1,108 @@
+# tests/test_artifact.py
+# Speichern, Entpacken und Laden des Artefaktformats
+
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from model import artifact
+from model.columnar import RecipeTable
+from model.recipe_model import RecipeRecommender
+
+
+def load_names(zip_path):
+    model = RecipeRecommender.load_artifact(zip_path)
+    return [r['name'] for r in model.recommend(['Tomaten', 'Zwiebeln'], top_n=5)]
+
+
+def summary(recommendations):
+    return [(r['id'], r['name'], round(r['combined_score'], 9), r['missing_ingredients']) for r in recommendations]
+
+
+def test_artifact_round_trip(model, queries, tmp_path):
+    zip_path = str(tmp_path / 'RecipeRecommender.zip')
+    model.save_artifact(zip_path)
+    loaded = RecipeRecommender.load_artifact(zip_path)
+
+    # Rezepte und Vorschlagsindex werden per mmap geladen statt geparst bzw. neu aufgebaut
+    assert isinstance(loaded.all_recipes, RecipeTable)
+    assert loaded.suggestion_index is not None
+    assert loaded.all_recipes.to_frame()['name'].tolist() == model.all_recipes['name'].tolist()
+
+    for ingredients in queries[:50]:
+        assert summary(loaded.recommend(ingredients)) == summary(model.recommend(ingredients))
+    for term in ('zw', 'Zwi', 'mehl', 'er', 'x'):
+        assert loaded.suggest_ingredients(term, 8) == model.suggest_ingredients(term, 8)
+
+
+def test_saving_a_loaded_artifact(model, tmp_path):
+    model.save_artifact(str(tmp_path / 'first.zip'))
+    loaded = RecipeRecommender.load_artifact(str(tmp_path / 'first.zip'))
+    loaded.save_artifact(str(tmp_path / 'second.zip'))
+
+    reloaded = RecipeRecommender.load_artifact(str(tmp_path / 'second.zip'))
+    assert summary(reloaded.recommend(['Tomaten', 'Zwiebeln'])) == summary(model.recommend(['Tomaten', 'Zwiebeln']))
+
+
+def test_concurrent_extraction(model, tmp_path):
+    zip_path = str(tmp_path / 'RecipeRecommender.zip')
+    model.save_artifact(zip_path)
+
+    # Mehrere Prozesse entpacken und laden dieselbe Version gleichzeitig
+    with ProcessPoolExecutor(max_workers=8, mp_context=get_context('fork')) as pool:
+        results = list(pool.map(load_names, [zip_path] * 16))
+    assert all(result == results[0] for result in results)
+
+    directory = artifact.extraction_directory(zip_path)
+    assert os.path.exists(os.path.join(directory, artifact.MANIFEST_FILE))
+    assert not [name for name in os.listdir(tmp_path) if '.tmp-' in name]
+
+
+def test_new_version_does_not_replace_loaded_directory(model, tmp_path):
+    zip_path = str(tmp_path / 'RecipeRecommender.zip')
+    model.save_artifact(zip_path)
+    old_directory = artifact.extract_artifact(zip_path)
+    old_files = sorted(os.listdir(old_directory))
+
+    model.save_artifact(zip_path)
+    new_directory = artifact.extract_artifact(zip_path)
+
+    assert new_directory != old_directory
+    assert sorted(os.listdir(old_directory)) == old_files
+    assert artifact.extract_artifact(zip_path) == new_directory
+
+
+def test_legacy_pickle_of_loaded_artifact(model, tmp_path):
+    model.save_artifact(str(tmp_path / 'RecipeRecommender.zip'))
+    loaded = RecipeRecommender.load_artifact(str(tmp_path / 'RecipeRecommender.zip'))
+    loaded.save_model(str(tmp_path / 'RecipeRecommender.pkl'))
+
+    unpickled = RecipeRecommender.load_model(str(tmp_path / 'RecipeRecommender.pkl'))
+    assert summary(unpickled.recommend(['Tomaten', 'Zwiebeln'])) == summary(model.recommend(['Tomaten', 'Zwiebeln']))
+    assert unpickled.suggest_ingredients('zw', 8) == model.suggest_ingredients('zw', 8)
+
+
+def test_save_replaces_previous_files(model, tmp_path):
+    zip_path = str(tmp_path / 'RecipeRecommender.zip')
+    directory = str(tmp_path / 'RecipeRecommender')
+    model.save_artifact(zip_path)
+    files = sorted(os.listdir(directory))
+    # Überbleibsel einer früheren Speicherung (z.B. eine inzwischen entfernte Spalte)
+    open(os.path.join(directory, 'recipes.alt.data.npy'), 'wb').close()
+
+    model.save_artifact(zip_path)
+    assert sorted(os.listdir(directory)) == files
+    with zipfile.ZipFile(zip_path) as archive:
+        assert sorted(archive.namelist()) == files
+    assert sorted(os.listdir(tmp_path)) == ['RecipeRecommender', 'RecipeRecommender.zip']
+
+
+def test_loaded_directory_can_be_saved_in_place(model, tmp_path):
+    directory = str(tmp_path / 'RecipeRecommender')
+    model.save_artifact(directory)
+    loaded = RecipeRecommender.load_artifact(directory)
+
+    loaded.save_artifact(directory)
+    reloaded = RecipeRecommender.load_artifact(directory)
+    assert summary(reloaded.recommend(['Tomaten', 'Zwiebeln'])) == summary(model.recommend(['Tomaten', 'Zwiebeln']))
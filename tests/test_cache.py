@@ -0,0 +1,110 @@
+# tests/test_cache.py
+# RecommendationCache mit Stub-Modell und steuerbarer Uhr
+
+import pytest
+
+from model.cache import RecommendationCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubModel:
+    """Zählt die Aufrufe von recommend() und gibt die Anfrage als Ergebnis zurück."""
+
+    def __init__(self):
+        self.calls = []
+
+    def recommend(self, ingredients, top_n=5, threshold=0.3, timer=None):
+        self.calls.append((ingredients, top_n, threshold))
+        return [{'ingredients': ingredients, 'top_n': top_n}]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    cache = RecommendationCache(max_entries=2, ttl_seconds=60, clock=clock)
+    cache.set_model_version('v1')
+    return cache
+
+
+def test_key_ignores_order_case_whitespace_and_duplicates():
+    key = RecommendationCache.make_key([' Tomaten', 'zwiebeln', 'tomaten ', ''], 5, 0.3)
+    assert key == (('tomaten', 'zwiebeln'), 5, 0.3)
+    assert key == RecommendationCache.make_key(['Zwiebeln', 'Tomaten'], '5', '0.3')
+
+
+def test_equivalent_queries_share_an_entry(cache):
+    model = StubModel()
+    first = cache.recommend(model, ['Tomaten', 'Zwiebeln'], model_version='v1')
+    second = cache.recommend(model, ['zwiebeln ', 'TOMATEN', 'Tomaten'], model_version='v1')
+
+    assert second is first
+    assert model.calls == [(['tomaten', 'zwiebeln'], 5, 0.3)]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_top_n_and_threshold_are_part_of_the_key(cache):
+    model = StubModel()
+    cache.recommend(model, ['Salz'], top_n=5, model_version='v1')
+    cache.recommend(model, ['Salz'], top_n=10, model_version='v1')
+    cache.recommend(model, ['Salz'], top_n=5, threshold=0.5, model_version='v1')
+    assert len(model.calls) == 3
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.evictions == 1
+    assert cache.stats()['size'] == 2
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put('a', 1)
+    clock.now = 59.9
+    assert cache.get('a') == 1
+    clock.now = 60.0
+    assert cache.get('a') is None
+    assert cache.expirations == 1
+
+
+def test_new_model_version_invalidates_entries(cache):
+    model = StubModel()
+    cache.recommend(model, ['Salz'], model_version='v1')
+    cache.set_model_version('v2')
+
+    assert cache.stats()['size'] == 0
+    assert cache.invalidations == 1
+    cache.recommend(model, ['Salz'], model_version='v2')
+    assert len(model.calls) == 2
+
+
+def test_results_of_a_replaced_version_are_not_stored(cache):
+    model = StubModel()
+    # Anfrage mit dem alten Modell während des Wechsels auf v2
+    cache.set_model_version('v2')
+    cache.recommend(model, ['Salz'], model_version='v1')
+    cache.recommend(model, ['Salz'], model_version='v1')
+
+    assert len(model.calls) == 2
+    assert cache.stats()['size'] == 0
+
+
+def test_zero_entries_disables_cache(clock):
+    cache = RecommendationCache(max_entries=0, clock=clock)
+    cache.put('a', 1)
+    assert cache.get('a') is None
@@ -0,0 +1,121 @@
+# tests/test_incremental.py
+# Inkrementelles Training (update_incremental) gegen eine mongomock-Collection
+
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import numpy as np
+import pytest
+from bson import ObjectId
+
+import model.recipe_model as recipe_model
+from model.ingredients import add_base_ingredients, recipe_base_ingredients
+from model.recipe_model import RecipeRecommender
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    client = mongomock.MongoClient()
+    # connect() erstellt den Client selbst; close() darf die Daten nicht verwerfen
+    monkeypatch.setattr(recipe_model, 'MongoClient', lambda uri: client)
+    monkeypatch.setattr(client, 'close', lambda: None)
+    return client['recipes']['tracks']
+
+
+def insert(collection, documents, created=None):
+    """Fügt Kopien ein; _ids mit Zeitstempel created (Standard: jetzt, also neuer als das Wasserzeichen)."""
+    timestamp = ObjectId.from_datetime(created or datetime.now(timezone.utc)).binary[:4]
+    copies = [
+        {**doc, '_id': ObjectId(timestamp + ObjectId().binary[4:]), 'ingredients': [dict(i) for i in doc['ingredients']]}
+        for doc in documents
+    ]
+    collection.insert_many(copies)
+    return [doc['_id'] for doc in copies]
+
+
+def trained(collection, documents):
+    # Beim Training vorhandene Rezepte sind älter als das Wasserzeichen (ObjectIds haben Sekundenauflösung)
+    insert(collection, documents, created=datetime.now(timezone.utc) - timedelta(hours=1))
+    model = RecipeRecommender('mongodb://test')
+    model.load_data()
+    return model.preprocess_data()
+
+
+def base_ingredients(doc):
+    return recipe_base_ingredients(add_base_ingredients([dict(i) for i in doc['ingredients']]))
+
+
+def assert_matches_collection(model, collection):
+    """Vergleicht den Zustand mit einer Neuberechnung aus der Collection (bei festem Vokabular)."""
+    docs = {str(doc['_id']): doc for doc in collection.find()}
+    ids = [str(recipe_id) for recipe_id in model.recipe_ids]
+    assert sorted(ids) == sorted(docs)
+    assert len(model.all_recipes) == model.n_documents == len(docs)
+
+    counts = model._count_terms([' '.join(base_ingredients(docs[recipe_id])) for recipe_id in ids])
+    np.testing.assert_array_equal(model.document_frequency, np.bincount(counts.indices, minlength=counts.shape[1]))
+    expected_idf = np.log((1 + len(docs)) / (1 + model.document_frequency)) + 1
+    np.testing.assert_allclose(model.vectorizer.idf_, expected_idf)
+    np.testing.assert_allclose(model.recipe_matrix.toarray(), model._tfidf_rows(counts).toarray(), atol=1e-6)
+
+    names = list(model.ingredient_vocabulary)
+    for row, recipe_id in enumerate(ids):
+        columns = model.recipe_ingredient_matrix[row].indices
+        assert {names[column] for column in columns} == set(base_ingredients(docs[recipe_id]))
+
+
+def test_update_folds_in_new_changed_and_deleted_recipes(collection, documents):
+    model = trained(collection, documents[:90])
+    ids = list(model.all_recipes['_id'])
+
+    insert(collection, documents[90:])
+    for recipe_id, source in zip(ids[:3], documents[95:98]):
+        collection.update_one({'_id': recipe_id}, {'$set': {
+            'ingredients': [dict(i) for i in source['ingredients']],
+            'updated_at': datetime.now(timezone.utc),
+        }})
+    deleted = ids[10:15]
+    collection.delete_many({'_id': {'$in': deleted}})
+
+    assert model.update_incremental(drift_threshold=1.0)
+    assert_matches_collection(model, collection)
+    assert model.changed_since_full == len(documents[90:]) + 3 + len(deleted)
+
+
+def test_deleted_recipes_are_not_recommended_or_suggested(collection, documents):
+    model = trained(collection, documents)
+    # Eine Zutat, die nur in einem Rezept vorkommt
+    names = list(model.ingredient_vocabulary)
+    counts = np.diff(model.ingredient_postings.indptr)
+    ingredient = names[int(np.flatnonzero(counts == 1)[0])]
+    row = int(model._posting_list(model.ingredient_postings, model.ingredient_vocabulary[ingredient])[0])
+    recipe_id = model.recipe_ids[row]
+    assert ingredient in model.suggest_ingredients(ingredient, max_suggestions=20)
+
+    collection.delete_one({'_id': model.all_recipes['_id'].iloc[row]})
+    assert model.update_incremental(drift_threshold=1.0)
+
+    assert_matches_collection(model, collection)
+    assert recipe_id not in set(model.recipe_ids)
+    recommended = {recipe['id'] for recipe in model.recommend([ingredient], top_n=len(documents), threshold=0.0)}
+    assert recipe_id not in recommended
+    assert ingredient not in model.suggest_ingredients(ingredient, max_suggestions=20)
+
+
+def test_update_without_changes_keeps_model(collection, documents):
+    model = trained(collection, documents)
+    watermark = model.watermark
+
+    assert model.update_incremental()
+    assert len(model.all_recipes) == len(documents)
+    assert model.changed_since_full == 0
+    assert model.watermark > watermark
+
+
+def test_deletions_count_towards_drift(collection, documents):
+    model = trained(collection, documents)
+    collection.delete_many({'_id': {'$in': list(model.all_recipes['_id'][:20])}})
+
+    assert not model.update_incremental(drift_threshold=0.1)
+    assert len(model.all_recipes) == model.n_documents == len(documents)
+    assert model.changed_since_full == 0
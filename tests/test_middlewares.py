@@ -0,0 +1,170 @@
+# tests/test_middlewares.py
+# Downloader-Middlewares des Spiders mit synthetischen Antworten (ohne Netzwerk)
+
+import sys
+import time
+from email.utils import formatdate
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse, Request
+from scrapy.settings import Settings
+from scrapy.spiders import Spider
+from scrapy.utils.test import get_crawler
+from twisted.internet.error import ConnectionRefusedError, TimeoutError
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'spider'))
+from spider.middlewares import AdaptiveRateMiddleware, IncrementalCachePolicy
+
+URL = 'https://www.example.com/rezepte-kochideen/rezepte/pancakes'
+LIST_URL = 'https://www.example.com/rezepte-kochideen/'
+
+
+def adaptive_middleware(**settings):
+    crawler = get_crawler(settings_dict={'ADAPTIVE_RATE_ENABLED': True, 'DOWNLOAD_DELAY': 1.0, **settings})
+    # Downloader-Slot wie in Scrapy: Verzögerung und Parallelität als Attribute
+    slot = SimpleNamespace(delay=0.0, concurrency=8)
+    crawler.engine = SimpleNamespace(downloader=SimpleNamespace(
+        get_slot_key=lambda request: 'www.example.com', slots={'www.example.com': slot}
+    ))
+    return AdaptiveRateMiddleware(crawler), slot
+
+
+def response(status=200, latency=0.2, headers=None):
+    request = Request(URL, meta={'download_latency': latency} if latency is not None else {})
+    return request, HtmlResponse(URL, status=status, headers=headers, body=b'<html></html>', request=request)
+
+
+def test_ignored_requests_do_not_back_off():
+    middleware, slot = adaptive_middleware()
+    middleware.process_request(Request(URL), None)
+
+    assert middleware.process_exception(Request(URL), IgnoreRequest("robots.txt"), None) is None
+    assert middleware.process_exception(Request(URL), ValueError("Parserfehler"), None) is None
+    assert (slot.delay, slot.concurrency) == (1.0, 1)
+    assert middleware.backoffs == 0
+
+
+@pytest.mark.parametrize('exception', [TimeoutError(), ConnectionRefusedError()])
+def test_network_errors_back_off(exception):
+    middleware, slot = adaptive_middleware()
+    middleware.process_request(Request(URL), None)
+
+    middleware.process_exception(Request(URL), exception, None)
+    assert (slot.delay, slot.concurrency) == (2.0, 1)
+    assert middleware.backoffs == 1
+
+
+def test_throttling_response_respects_retry_after():
+    middleware, slot = adaptive_middleware()
+    request, throttled = response(status=503, headers={'Retry-After': '10'})
+
+    middleware.process_response(request, throttled, None)
+    assert slot.delay == 10.0
+    assert middleware.backoffs == 1
+
+
+def test_fast_responses_lower_delay_and_raise_concurrency():
+    middleware, slot = adaptive_middleware(ADAPTIVE_SUCCESS_WINDOW=5, ADAPTIVE_MIN_DELAY=0.05)
+    for _ in range(40):
+        middleware.process_response(*response(latency=0.2), None)
+
+    assert slot.concurrency == middleware.max_concurrency
+    # Verzögerung nähert sich Antwortzeit / Parallelität
+    assert slot.delay == pytest.approx(0.2 / middleware.max_concurrency, rel=0.05)
+
+
+def test_error_responses_do_not_lower_delay():
+    middleware, slot = adaptive_middleware()
+    middleware.process_response(*response(status=404, latency=0.1), None)
+    assert slot.delay == 1.0
+
+
+def test_cached_responses_are_ignored():
+    middleware, slot = adaptive_middleware()
+    middleware.process_response(*response(latency=None), None)
+    assert middleware.latencies == []
+    assert middleware.slots == {}
+
+
+@pytest.fixture
+def policy():
+    return IncrementalCachePolicy(Settings({'INCREMENTAL_RECIPE_MAX_AGE': 3600}))
+
+
+def cached(url, age=0, body=b'<html>Pancakes</html>', **headers):
+    """Gespeicherte Antwort, die vor age Sekunden geladen wurde."""
+    headers['Date'] = formatdate(time.time() - age, usegmt=True)
+    return HtmlResponse(url, status=200, headers=headers, body=body)
+
+
+def test_recent_recipe_pages_are_fresh_without_request(policy):
+    request = Request(URL)
+    assert policy.is_cached_response_fresh(cached(URL, age=60, ETag='"abc"'), request)
+    assert b'If-None-Match' not in request.headers
+
+
+def test_old_recipe_pages_are_revalidated(policy):
+    request = Request(URL)
+    last_modified = formatdate(0, usegmt=True)
+    response = cached(URL, age=7200, ETag='"abc"', **{'Last-Modified': last_modified})
+
+    assert not policy.is_cached_response_fresh(response, request)
+    assert request.headers[b'If-None-Match'] == b'"abc"'
+    assert request.headers[b'If-Modified-Since'] == last_modified.encode()
+
+
+def test_other_pages_are_always_revalidated(policy):
+    request = Request(LIST_URL)
+    assert not policy.is_cached_response_fresh(cached(LIST_URL, age=0, ETag='"liste"'), request)
+    assert request.headers[b'If-None-Match'] == b'"liste"'
+
+
+def test_recipe_max_age_zero_disables_shortcut():
+    policy = IncrementalCachePolicy(Settings({'INCREMENTAL_RECIPE_MAX_AGE': 0}))
+    assert not policy.is_cached_response_fresh(cached(URL, age=0), Request(URL))
+
+
+@pytest.mark.parametrize('status, body, unchanged', [
+    (304, b'', True),
+    (200, b'<html>Pancakes</html>', True),
+    (200, b'<html>Pancakes mit Ahornsirup</html>', False),
+    (503, b'', True),
+    (404, b'', False),
+])
+def test_revalidation_result(policy, status, body, unchanged):
+    response = HtmlResponse(URL, status=status, body=body)
+    assert policy.is_cached_response_valid(cached(URL, age=7200), response, Request(URL)) is unchanged
+
+
+def test_only_successful_responses_are_stored(policy):
+    request = Request(URL)
+    assert policy.should_cache_response(HtmlResponse(URL, status=200), request)
+    assert not policy.should_cache_response(HtmlResponse(URL, status=404), request)
+
+
+@pytest.mark.parametrize('body, skipped', [(b'<html>Pancakes</html>', True), (b'<html>Neu</html>', False)])
+def test_unchanged_content_is_served_from_cache(tmp_path, body, skipped):
+    crawler = get_crawler(settings_dict={
+        'HTTPCACHE_ENABLED': True, 'HTTPCACHE_DIR': str(tmp_path),
+        'HTTPCACHE_POLICY': 'spider.middlewares.IncrementalCachePolicy', 'INCREMENTAL_RECIPE_MAX_AGE': 3600,
+    })
+    spider = Spider.from_crawler(crawler, 'recipe_spider')
+    middleware = HttpCacheMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+
+    # Erster Lauf: Seite vor zwei Stunden gespeichert
+    first = Request(URL)
+    assert middleware.process_request(first, spider) is None
+    middleware.process_response(first, cached(URL, age=7200), spider)
+
+    # Zweiter Lauf: Server ohne Validatoren antwortet mit 200, verglichen wird der Inhalt
+    second = Request(URL)
+    assert middleware.process_request(second, spider) is None
+    result = middleware.process_response(second, HtmlResponse(URL, status=200, body=body), spider)
+    assert ('cached' in result.flags) is skipped
+    assert (result.body == b'<html>Pancakes</html>') is skipped
+    middleware.spider_closed(spider)
@@ -0,0 +1,153 @@
+# tests/test_model_store.py
+# Artefakt-Cache und Modellwechsel mit LocalModelSource über tmp_path
+
+import os
+
+import pytest
+
+import backend.model_store as model_store
+from backend.model_store import LocalModelSource, ModelCache, ModelManager
+
+BLOB_NAME = 'RecipeRecommender.zip'
+
+
+class CountingSource(LocalModelSource):
+    """LocalModelSource, die die Downloads protokolliert."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.downloads = []
+
+    def download(self, version, target_path):
+        self.downloads.append(version.container)
+        super().download(version, target_path)
+
+
+class StubModel:
+    """Ersetzt das geladene Modell; name ist der Inhalt der Artefaktdatei."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def recommend(self, ingredients, top_n=5):
+        if self.name == 'defekt':
+            raise ValueError("Modell defekt")
+        return []
+
+    def suggest_ingredients(self, partial_name, max_suggestions=8):
+        return []
+
+
+def publish(root, number, content=None):
+    """Legt recipe-model-<number>/<BLOB_NAME> in der Quelle an."""
+    container = root / f'recipe-model-{number}'
+    container.mkdir(parents=True, exist_ok=True)
+    (container / BLOB_NAME).write_text(content or f'modell-{number}', encoding='utf-8')
+
+
+@pytest.fixture
+def source(tmp_path):
+    return CountingSource(str(tmp_path / 'source'))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ModelCache(str(tmp_path / 'cache'), keep_versions=2)
+
+
+@pytest.fixture
+def manager(source, cache, monkeypatch):
+    monkeypatch.setattr(model_store, 'load_model_file', lambda path: StubModel(open(path, encoding='utf-8').read()))
+    return ModelManager(source, cache, warmup_queries=[['Mehl', 'Eier']])
+
+
+def test_latest_version_picks_highest_container(tmp_path, source):
+    assert source.latest_version() is None
+    for number in (2, 10, 9):
+        publish(tmp_path / 'source', number)
+    (tmp_path / 'source' / 'recipe-model-11.tmp').mkdir()
+
+    version = source.latest_version()
+    assert (version.container, version.blob_name) == ('recipe-model-10', BLOB_NAME)
+
+
+def test_fetch_is_content_addressed(tmp_path, source, cache):
+    publish(tmp_path / 'source', 1)
+    version = source.latest_version()
+
+    path = cache.fetch(source, version)
+    assert cache.fetch(source, version) == path
+    assert source.downloads == ['recipe-model-1']
+    assert os.path.basename(os.path.dirname(path)) == version.cache_key
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith('.part')]
+
+    # Neuer Inhalt unter demselben Container ergibt einen neuen Cache-Eintrag
+    os.utime(tmp_path / 'source' / 'recipe-model-1' / BLOB_NAME, ns=(0, 0))
+    changed = source.latest_version()
+    assert changed.cache_key != version.cache_key
+    assert cache.fetch(source, changed) != path
+    assert len(source.downloads) == 2
+
+
+def test_prune_keeps_newest_versions(tmp_path, source, cache):
+    paths = []
+    for number in (1, 2, 3):
+        publish(tmp_path / 'source', number)
+        paths.append(cache.fetch(source, source.latest_version()))
+        # Eindeutige Reihenfolge der Änderungszeiten
+        os.utime(os.path.dirname(paths[-1]), (number, number))
+
+    assert [os.path.exists(path) for path in paths] == [False, True, True]
+    assert len(os.listdir(cache.directory)) == cache.keep_versions
+
+
+def test_reload_skips_unchanged_version(tmp_path, source, manager):
+    publish(tmp_path / 'source', 1)
+    assert manager.reload()
+    model = manager.model
+
+    assert not manager.reload()
+    assert manager.model is model
+    assert source.downloads == ['recipe-model-1']
+
+
+def test_reload_swaps_model_and_notifies_listeners(tmp_path, manager):
+    publish(tmp_path / 'source', 1)
+    activated = []
+    manager.add_listener(lambda model, version: activated.append((model.name, version)))
+    assert manager.reload()
+    assert manager.status == 'ready'
+
+    publish(tmp_path / 'source', 2)
+    assert manager.reload()
+    model, version = manager.snapshot()
+    assert (model.name, version) == ('modell-2', 'recipe-model-2')
+    assert activated == [('modell-1', 'recipe-model-1'), ('modell-2', 'recipe-model-2')]
+
+
+def test_failed_warm_up_keeps_previous_model(tmp_path, manager):
+    publish(tmp_path / 'source', 1)
+    manager.reload()
+
+    publish(tmp_path / 'source', 2, content='defekt')
+    assert not manager.reload()
+    assert manager.snapshot()[1] == 'recipe-model-1'
+    assert manager.model.name == 'modell-1'
+    assert 'defekt' in manager.error
+
+
+def test_unchanged_version_clears_previous_error(tmp_path, manager):
+    publish(tmp_path / 'source', 1)
+    manager.reload()
+
+    # Quelle vorübergehend nicht erreichbar
+    def unavailable():
+        raise OSError("Quelle nicht erreichbar")
+    manager.source.latest_version = unavailable
+    assert not manager.reload()
+    assert manager.error is not None
+
+    del manager.source.latest_version
+    assert not manager.reload()
+    assert manager.error is None
+    assert manager.model.name == 'modell-1'
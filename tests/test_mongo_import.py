@@ -0,0 +1,88 @@
+# tests/test_mongo_import.py
+# Importmodi gegen eine mongomock-Collection
+
+import json
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'spider' / 'downloads'))
+import mongo_import
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = mongomock.MongoClient()
+    # MongoImporter.connect() erstellt den Client selbst; close() darf die Daten nicht verwerfen
+    monkeypatch.setattr(mongo_import, 'MongoClient', lambda uri: client)
+    monkeypatch.setattr(client, 'close', lambda: None)
+    return client
+
+
+def write_input(path, names):
+    with open(path, 'w', encoding='utf-8') as f:
+        for name in names:
+            f.write(json.dumps({'name': name, 'ingredients': [{'amount': 1.0, 'unit': '', 'ingredient': name}]}) + "\n")
+    return str(path)
+
+
+def failing_read_lines(importer, fail_after):
+    """Ersetzt read_lines() durch eine Variante, die nach fail_after Batches abbricht."""
+    original = importer.read_lines
+
+    def read_lines():
+        for number, batch in enumerate(original()):
+            if number == fail_after:
+                raise OSError("Eingabedatei abgeschnitten")
+            yield batch
+    importer.read_lines = read_lines
+
+
+def test_pipelined_import_raises_reader_error(client, tmp_path):
+    input_file = write_input(tmp_path / 'recipes.jl', [f'Rezept {i}' for i in range(10)])
+    summary_file = tmp_path / 'summary.json'
+    importer = mongo_import.MongoImporter(input_file, 'mongodb://test', 'tracks', batch_size=2)
+    failing_read_lines(importer, fail_after=2)
+
+    with pytest.raises(RuntimeError, match="abgebrochen"):
+        importer.save_to_mongodb(workers=2, summary_file=str(summary_file))
+    assert not summary_file.exists()
+
+
+def test_pipelined_import(client, tmp_path):
+    input_file = write_input(tmp_path / 'recipes.jl', [f'Rezept {i}' for i in range(10)] + ['Rezept 0'])
+    importer = mongo_import.MongoImporter(input_file, 'mongodb://test', 'tracks', batch_size=2)
+
+    summary = importer.save_to_mongodb(workers=2)
+    assert summary['inserted'] == 10
+    assert summary['skipped'] == 1
+    assert client['recipes']['tracks'].count_documents({}) == 10
+
+
+def delta_import(input_file, workers=0):
+    importer = mongo_import.MongoImporter(input_file, 'mongodb://test', 'tracks', batch_size=2,
+                                          delta=True, delete_missing=True)
+    return importer.save_to_mongodb(workers=workers)
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_delta_import_deletes_missing_recipes(client, tmp_path, workers):
+    delta_import(write_input(tmp_path / 'first.jl', ['A', 'B', 'C']), workers)
+    summary = delta_import(write_input(tmp_path / 'second.jl', ['A', 'C']), workers)
+
+    assert summary['deleted'] == 1
+    assert sorted(client['recipes']['tracks'].distinct('name')) == ['A', 'C']
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_delta_import_keeps_recipes_after_parse_errors(client, tmp_path, workers):
+    delta_import(write_input(tmp_path / 'first.jl', ['A', 'B', 'C']), workers)
+    second = write_input(tmp_path / 'second.jl', ['A', 'C'])
+    with open(second, 'a', encoding='utf-8') as f:
+        f.write('{"name": "B", "ingredients": [\n')
+    summary = delta_import(second, workers)
+
+    assert summary['deleted'] == 0
+    assert sorted(client['recipes']['tracks'].distinct('name')) == ['A', 'B', 'C']
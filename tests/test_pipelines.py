@@ -0,0 +1,116 @@
+# tests/test_pipelines.py
+# MongoPipeline des Spiders gegen eine mongomock-Collection
+
+import json
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+from scrapy.spiders import Spider
+from scrapy.utils.test import get_crawler
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'spider'))
+import spider.pipelines as pipelines
+from spider.pipelines import MongoPipeline
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = mongomock.MongoClient()
+    # open_spider() erstellt den Client selbst; close() darf die Daten nicht verwerfen
+    monkeypatch.setattr(pipelines, 'MongoClient', lambda uri: client)
+    monkeypatch.setattr(client, 'close', lambda: None)
+    # Neuere pymongo-Versionen übergeben ReplaceOne ein sort-Argument, das mongomock nicht kennt
+    add_replace = mongomock.collection.BulkOperationBuilder.add_replace
+    monkeypatch.setattr(
+        mongomock.collection.BulkOperationBuilder, 'add_replace',
+        lambda self, *args, sort=None, **kwargs: add_replace(self, *args, **kwargs)
+    )
+    return client
+
+
+@pytest.fixture
+def collection(client):
+    return client['recipes']['tracks']
+
+
+def open_pipeline(tmp_path, batch_size=2):
+    crawler = get_crawler(settings_dict={
+        'MONGO_URI': 'mongodb://test', 'MONGO_BATCH_SIZE': batch_size,
+        # Zeitgesteuertes Schreiben benötigt den Reactor und wird separat geprüft
+        'MONGO_FLUSH_INTERVAL': 0, 'MONGO_SUMMARY_FILE': str(tmp_path / 'summary.json'),
+    })
+    spider = Spider.from_crawler(crawler, 'recipe_spider')
+    pipeline = MongoPipeline.from_crawler(crawler)
+    pipeline.open_spider(spider)
+    return pipeline, spider
+
+
+def recipe(name, ingredient='Mehl', amount=1.0):
+    return {'name': name, 'ingredients': [{'amount': amount, 'unit': 'EL', 'ingredient': ingredient}]}
+
+
+def crawl(tmp_path, items, batch_size=2):
+    pipeline, spider = open_pipeline(tmp_path, batch_size)
+    for item in items:
+        pipeline.process_item(item, spider)
+    pipeline.close_spider(spider)
+    return pipeline, json.loads((tmp_path / 'summary.json').read_text(encoding='utf-8'))
+
+
+def test_items_are_written_in_batches(tmp_path, collection):
+    pipeline, spider = open_pipeline(tmp_path, batch_size=2)
+
+    pipeline.process_item(recipe('A'), spider)
+    assert collection.count_documents({}) == 0
+    pipeline.process_item(recipe('B'), spider)
+    assert collection.count_documents({}) == 2
+    pipeline.process_item(recipe('C'), spider)
+    assert collection.count_documents({}) == 2
+
+    pipeline.close_spider(spider)
+    assert collection.count_documents({}) == 3
+    doc = collection.find_one({'name': 'A'})
+    assert doc['ingredients'][0]['base_ingredient']
+    assert doc['content_hash'] and doc['updated_at']
+
+
+def test_buffer_is_flushed_after_interval(tmp_path, collection):
+    pipeline, spider = open_pipeline(tmp_path, batch_size=100)
+    pipeline.flush_interval = 5.0
+    pipeline.process_item(recipe('A'), spider)
+
+    pipeline.flush_if_due(spider)
+    assert collection.count_documents({}) == 0
+    pipeline.last_flush -= 5.0
+    pipeline.flush_if_due(spider)
+    assert collection.count_documents({}) == 1
+    pipeline.close_spider(spider)
+
+
+def test_unchanged_recipes_are_skipped(tmp_path, collection):
+    _, summary = crawl(tmp_path, [recipe('A'), recipe('B'), recipe('B', 'Zucker')])
+    assert summary == {
+        'inserted': 2, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'skipped': 1, 'errors': 0, 'changed': True,
+    }
+    first = {doc['name']: doc for doc in collection.find()}
+
+    pipeline, summary = crawl(tmp_path, [recipe('A'), recipe('B', amount=2.0), recipe('C')])
+    assert (summary['inserted'], summary['updated'], summary['unchanged']) == (1, 1, 1)
+    assert pipeline.stats.get_value('mongo/unchanged') == 1
+    docs = {doc['name']: doc for doc in collection.find()}
+    assert docs['A']['updated_at'] == first['A']['updated_at']
+    assert docs['B']['ingredients'][0]['amount'] == 2.0
+    assert docs['B']['content_hash'] != first['B']['content_hash']
+
+    _, summary = crawl(tmp_path, [recipe('A'), recipe('B', amount=2.0), recipe('C')])
+    assert summary['unchanged'] == 3
+    assert summary['changed'] is False
+
+
+def test_ingredient_without_text_is_stored(tmp_path, collection):
+    item = {'name': 'A', 'ingredients': [{'amount': 1.0, 'unit': 'Prise', 'ingredient': None}]}
+    _, summary = crawl(tmp_path, [item])
+    assert (summary['inserted'], summary['errors']) == (1, 0)
+    assert collection.find_one({'name': 'A'})['ingredients'][0]['base_ingredient'] == ''
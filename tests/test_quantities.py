@@ -0,0 +1,87 @@
+# tests/test_quantities.py
+# Mengenparser (model/quantities.py)
+
+import pytest
+
+from model.quantities import Quantity, add_quantities, format_amount, parse_quantity
+
+
+@pytest.mark.parametrize('text, amount, unit, canonical', [
+    ('200 g', 200.0, 'g', (200.0, 'g')),
+    ('1,5 kg', 1.5, 'kg', (1500.0, 'g')),
+    ('0.25 l', 0.25, 'l', (250.0, 'ml')),
+    ('3', 3.0, '', (3.0, 'piece')),
+    ('2 Stk.', 2.0, 'Stk.', (2.0, 'piece')),
+    ('1 Bund', 1.0, 'Bund', (1.0, 'piece')),
+])
+def test_plain_amounts(text, amount, unit, canonical):
+    quantity = parse_quantity(text)
+    assert (quantity.amount, quantity.unit) == (amount, unit)
+    assert (quantity.canonical_amount, quantity.canonical_unit) == canonical
+
+
+@pytest.mark.parametrize('text, amount', [
+    ('1/2 TL', 0.5),
+    ('3 / 4 TL', 0.75),
+    ('½ TL', 0.5),
+    ('1½ TL', 1.5),
+    ('1 ¾ TL', 1.75),
+    ('⅓ TL', 1 / 3),
+])
+def test_fractions(text, amount):
+    quantity = parse_quantity(text)
+    assert quantity.amount == pytest.approx(amount)
+    assert quantity.unit == 'TL'
+    assert quantity.canonical_amount == pytest.approx(amount * 5)
+
+
+@pytest.mark.parametrize('text, low, high', [
+    ('1-2 EL', 1.0, 2.0),
+    ('1 – 2 EL', 1.0, 2.0),
+    ('2 bis 3 EL', 2.0, 3.0),
+    ('½-1 EL', 0.5, 1.0),
+])
+def test_ranges_use_midpoint(text, low, high):
+    quantity = parse_quantity(text)
+    assert (quantity.amount_min, quantity.amount_max) == (low, high)
+    assert quantity.amount == (low + high) / 2
+    assert quantity.canonical_amount == (low + high) / 2 * 15
+
+
+@pytest.mark.parametrize('text', ['ca. 200 g', 'Ca. 200 g', 'circa 200 g', 'etwa 200g'])
+def test_approximate_prefix(text):
+    assert parse_quantity(text) == Quantity(200.0, 'g', 200.0, 200.0, 200.0, 'g')
+
+
+@pytest.mark.parametrize('text', ['etwas', 'wenig Salz', '', None, '1/0 TL', '1-2/0 EL'])
+def test_unparseable_amounts(text):
+    quantity = parse_quantity(text)
+    assert quantity.amount is None
+    assert quantity.canonical_unit is None
+    assert quantity.unit == (text or '')
+
+
+def test_unknown_unit_has_no_canonical_amount():
+    quantity = parse_quantity('2 Schuss')
+    assert (quantity.amount, quantity.unit, quantity.canonical_unit) == (2.0, 'Schuss', None)
+
+
+def test_add_quantities_reparses_text_amounts():
+    ingredients = [
+        {'amount': '1-2', 'unit': 'EL', 'ingredient': 'Öl'},
+        {'amount': 100.0, 'unit': 'g', 'ingredient': 'Mehl'},
+        {'amount': None, 'unit': 'etwas', 'ingredient': 'Salz'},
+    ]
+    add_quantities(ingredients)
+    assert [(i['amount'], i['canonical_amount'], i['canonical_unit']) for i in ingredients] == [
+        (1.5, 22.5, 'ml'), (100.0, 100.0, 'g'), (None, None, None),
+    ]
+
+
+@pytest.mark.parametrize('amount, unit, text', [
+    (1.5, 'EL', '1½ EL'), (0.25, 'l', '¼ l'), (2.3, 'dl', '2,3 dl'), (None, 'etwas', 'etwas'),
+])
+def test_format_amount_round_trip(amount, unit, text):
+    assert format_amount(amount, unit) == text
+    if amount is not None:
+        assert parse_quantity(text).amount == pytest.approx(amount)
@@ -0,0 +1,76 @@
+# tests/test_recommend.py
+# Die Kandidatenauswahl über die invertierten Indizes muss dieselben Empfehlungen
+# liefern wie die Bewertung aller Rezepte
+
+import numpy as np
+import pytest
+
+PARAMETERS = [(5, 0.3), (10, 0.0), (3, 0.5), (20, 0.3), (0, 0.3)]
+
+
+def recommend_unpruned(model, ingredients, top_n, threshold):
+    """Bewertet alle Rezepte des Korpus (Referenz ohne Kandidatenauswahl)."""
+    ingredients = [ingredient.lower().strip() for ingredient in ingredients]
+    user_vector = model.vectorizer.transform([' '.join(ingredients)])
+    category_id = model.classifier.predict(user_vector)[0]
+
+    columns = [model.ingredient_vocabulary[i] for i in set(ingredients) if i in model.ingredient_vocabulary]
+    matching_counts = np.asarray(model.recipe_ingredient_matrix[:, columns].sum(axis=1)).ravel().astype(np.int32)
+    similarity_scores = (model.recipe_matrix @ user_vector.T).toarray().ravel()
+    return model._rank_candidates(
+        np.arange(len(model.all_recipes)), similarity_scores, matching_counts, category_id,
+        set(ingredients), top_n, threshold
+    )
+
+
+def score_groups(recommendations, above):
+    """Score -> Rezept-IDs; innerhalb gleicher Scores ist die Reihenfolge nicht festgelegt."""
+    groups = {}
+    for r in recommendations:
+        if r['combined_score'] > above + 1e-9:
+            groups.setdefault(round(r['combined_score'], 9), set()).add(r['id'])
+    return groups
+
+
+def assert_same_ranking(actual, expected):
+    assert [round(r['combined_score'], 9) for r in actual] == [round(r['combined_score'], 9) for r in expected]
+    # Beim letzten Score kann die Auswahl unter gleich bewerteten Rezepten abweichen
+    if expected:
+        last = expected[-1]['combined_score']
+        assert score_groups(actual, last) == score_groups(expected, last)
+
+
+@pytest.fixture(scope='module', params=PARAMETERS, ids=lambda p: f'top{p[0]}-threshold{p[1]}')
+def expected(request, model, queries):
+    """Parameter und Referenzergebnisse aller Anfragen (einmal pro Parameterkombination berechnet)."""
+    top_n, threshold = request.param
+    return top_n, threshold, [recommend_unpruned(model, ingredients, top_n, threshold) for ingredients in queries]
+
+
+def test_recommend_matches_unpruned(model, queries, expected):
+    top_n, threshold, unpruned = expected
+    for ingredients, reference in zip(queries, unpruned):
+        assert_same_ranking(model.recommend(ingredients, top_n=top_n, threshold=threshold), reference)
+
+
+def test_recommend_adds_recipes_without_shared_ingredients(model):
+    # Rezepte mit wenigen Zutaten erreichen die Top-5 auch ohne Übereinstimmung
+    recommendations = model.recommend(['Tomaten', 'Zwiebeln'], top_n=5, threshold=0.3)
+    unmatched = {r['name'] for r in recommendations if r['match_percentage'] == 0 and r['similarity'] == 0}
+    assert {'Béchamelsauce', 'Auberginen im Ofen mit Kresse-Joghurt'} <= unmatched
+
+
+@pytest.mark.parametrize('top_n', [0, -1])
+def test_recommend_without_results_requested(model, top_n):
+    assert model.recommend(['Mehl', 'Eier'], top_n=top_n) == []
+
+
+def test_recommend_many_matches_unpruned(model, queries, expected):
+    top_n, threshold, unpruned = expected
+    for recommendations, reference in zip(model.recommend_many(queries, top_n=top_n, threshold=threshold), unpruned):
+        assert_same_ranking(recommendations, reference)
+
+
+@pytest.mark.parametrize('top_n', [0, -1])
+def test_recommend_many_without_results_requested(model, top_n):
+    assert model.recommend_many([['Mehl', 'Eier'], ['Tomaten']], top_n=top_n) == [[], []]
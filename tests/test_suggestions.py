@@ -0,0 +1,34 @@
+# tests/test_suggestions.py
+# Der Vorschlagsindex muss dieselben Treffer liefern wie eine vollständige Suche
+
+import pytest
+
+from model.suggestions import SuggestionIndex
+
+
+def suggest_by_scan(index, partial_name, max_suggestions):
+    """Referenz: Präfix-Treffer, danach Infix-Treffer, jeweils in Rangfolge."""
+    query = partial_name.lower().strip()
+    prefix = [name for name in index.names if name.startswith(query)]
+    infix = [name for name in index.names if query in name and not name.startswith(query)]
+    return (prefix + infix)[:max_suggestions]
+
+
+@pytest.fixture(scope='module')
+def index(model):
+    return model.suggestion_index
+
+
+@pytest.mark.parametrize('max_suggestions', [1, 8, 20])
+def test_suggest_matches_scan(index, max_suggestions):
+    names = index.names
+    terms = sorted({name[i:i + n] for name in names for n in (1, 2, 3, 4) for i in range(0, len(name) - n + 1, 3)})
+    for term in [t for t in terms if t == t.strip()] + ['zz', 'qx', 'xyz']:
+        assert index.suggest(term, max_suggestions) == suggest_by_scan(index, term, max_suggestions), term
+
+
+def test_two_character_queries_use_bigram_postings():
+    index = SuggestionIndex({'zwiebeln': 10, 'bundzwiebeln': 5, 'mehl': 3})
+    assert list(index._infix_postings('zw')) == [0, 1]
+    assert list(index._infix_postings('qq')) == []
+    assert index.suggest('zw', 5) == ['zwiebeln', 'bundzwiebeln']